@@ -5,7 +5,8 @@ import os
 import celery
 from celery.utils.log import get_logger
 from cosmic_ray.cloning import ClonedWorkspace
-from cosmic_ray.worker import worker
+from cosmic_ray.preflight import preflight
+from cosmic_ray.worker import run_work_item
 
 from .app import APP
 
@@ -17,6 +18,9 @@ log = get_logger(__name__)
 # thing to do is have the worker refuse the work.
 _workspace = None
 
+# The flaky tests found by the pre-flight check of the workspace.
+_flaky_tests = frozenset()
+
 # This is just for ensuring that I know what I'm doing. We can remove
 # this later.
 _pid = None
@@ -34,13 +38,7 @@ def worker_task(work_item, config):
     """
     _ensure_workspace(config)
 
-    result = worker(
-        work_item.module_path,
-        config.python_version,
-        work_item.operator_name,
-        work_item.occurrence,
-        config.test_command,
-        config.timeout)
+    result = run_work_item(work_item, config, _flaky_tests)
     return work_item.job_id, result
 
 
@@ -50,6 +48,7 @@ def _ensure_workspace(config):
     """
     global _workspace
     global _pid
+    global _flaky_tests
 
     if _workspace is not None:
         assert _pid == os.getpid()
@@ -63,6 +62,8 @@ def _ensure_workspace(config):
 
     os.chdir(_workspace.clone_dir)
 
+    _flaky_tests = preflight(config)
+
 
 def execute_work_items(work_items, config):
     """Execute a suite of tests for a given set of work items.
@@ -37,11 +37,11 @@ INSTALL_REQUIRES = [
     'docopt_subcommands>=3.0.0,<4.0.0',
     'exit_codes',
     'gitpython',
+    'importlib_metadata; python_version < "3.8"',
     'parso',
     'pathlib',
     'qprompt',
     'spor>=1.1.0',
-    'stevedore',
     'toml',
     'virtualenv',
     'yattag',
@@ -86,6 +86,7 @@ setup(
         'dev': ['pylint', 'autopep8'],
         'docs': ['sphinx', 'sphinx_rtd_theme'],
         'celery4_engine': ['cosmic_ray_celery4_engine'],
+        'coverage': ['coverage'],
     },
     entry_points={
         'console_scripts': [
@@ -107,9 +108,12 @@ setup(
 
         ],
         'cosmic_ray.interceptors': [
-            'spor = cosmic_ray.interceptors.spor:intercept',
-            'pragma_no_mutate = cosmic_ray.interceptors.pragma_no_mutate:intercept',
-            'operators-filter = cosmic_ray.interceptors.operators_filter:intercept',
+            'spor = cosmic_ray.interceptors.spor:SporInterceptor',
+            'pragma_no_mutate = cosmic_ray.interceptors.pragma_no_mutate:PragmaNoMutateInterceptor',
+            'operators-filter = cosmic_ray.interceptors.operators_filter:OperatorsFilterInterceptor',
+            'equivalent-mutants = cosmic_ray.interceptors.equivalent_mutants:EquivalentMutantsInterceptor',
+            'skip-patterns = cosmic_ray.interceptors.skip_patterns:SkipPatternsInterceptor',
+            'coverage = cosmic_ray.interceptors.coverage:CoverageInterceptor',
         ],
     },
     long_description=LONG_DESCRIPTION,
@@ -1,9 +1,13 @@
-"Tools for working with parso ASTs."
+"""Tools for working with parso ASTs.
 
-from abc import ABC, abstractmethod
+parso is imported by the functions which need it, since workers which splice
+mutations into the module text never parse it.
+"""
+
+# pylint: disable=import-outside-toplevel
 
-import parso.python.tree
-import parso.tree
+from abc import ABC, abstractmethod
+from collections import defaultdict, OrderedDict
 
 
 class Visitor(ABC):
@@ -11,23 +15,163 @@ class Visitor(ABC):
     """
 
     def walk(self, node):
-        "Walk a parse tree, calling visit for each node."
-        node = self.visit(node)
+        """Walk a parse tree, calling visit for each node.
+
+        The node passed to `visit` is replaced by the node it returns, and it
+        is removed from the tree if `visit` returns `None`. The children of
+        the returned node are walked next. Only the lists of children in
+        which a node is replaced or removed are changed.
 
-        if node is None:
-            return None
+        Returns: The node returned by `visit` for `node`.
+        """
+        import parso.tree
 
-        if isinstance(node, parso.tree.BaseNode):
-            walked = map(self.walk, node.children)
-            node.children = [child for child in walked if child is not None]
+        node = self.visit(node)
+        if not isinstance(node, parso.tree.BaseNode):
+            return node
+
+        # The lists of children being walked, and the index of the next child
+        # in each of them.
+        child_lists = [node.children]
+        indices = [0]
+        while child_lists:
+            children = child_lists[-1]
+            index = indices[-1]
+            if index == len(children):
+                child_lists.pop()
+                indices.pop()
+                continue
+
+            child = children[index]
+            visited = self.visit(child)
+            if visited is None:
+                del children[index]
+                continue
+
+            if visited is not child:
+                children[index] = visited
+            indices[-1] = index + 1
+            if isinstance(visited, parso.tree.BaseNode):
+                child_lists.append(visited.children)
+                indices.append(0)
 
         return node
 
+    def scan(self, node):
+        """Call visit for each node of a parse tree without changing the tree.
+
+        The values returned by `visit` are ignored. Nodes are visited in the
+        same order as by `walk`.
+        """
+        for child in iter_nodes(node):
+            self.visit(child)
+
     @abstractmethod
     def visit(self, node):
         "Called for each node in the walk."
 
 
+def iter_nodes(node):
+    """Iterate over the nodes of a parse tree in pre-order.
+
+    The tree must not be changed during the iteration.
+    """
+    import parso.tree
+
+    yield node
+    if not isinstance(node, parso.tree.BaseNode):
+        return
+
+    child_lists = [node.children]
+    indices = [0]
+    while child_lists:
+        children = child_lists[-1]
+        index = indices[-1]
+        if index == len(children):
+            child_lists.pop()
+            indices.pop()
+            continue
+
+        child = children[index]
+        indices[-1] = index + 1
+        yield child
+        if isinstance(child, parso.tree.BaseNode):
+            child_lists.append(child.children)
+            indices.append(0)
+
+
+class NodeIndex:
+    """An index of the nodes of a parse tree by their type, e.g. 'funcdef',
+    'except_clause' or 'number'.
+
+    The index is built with a single walk of the tree, and it must not be
+    used after the tree has been changed.
+    """
+
+    def __init__(self, module_tree):
+        self._by_type = defaultdict(list)
+        self._order = {}
+        for position, node in enumerate(iter_nodes(module_tree)):
+            self._by_type[node.type].append(node)
+            self._order[id(node)] = position
+
+    def nodes(self, *node_types):
+        "All nodes whose type is one of `node_types`, in pre-order."
+        if len(node_types) == 1:
+            return list(self._by_type.get(node_types[0], ()))
+        return self.sorted(node for node_type in node_types for node in self._by_type.get(node_type, ()))
+
+    def sorted(self, nodes):
+        """Sort nodes of the tree into pre-order, i.e. the order in which a
+        `Visitor` visits them. Duplicates are removed.
+        """
+        order = self._order
+        unique = {order[id(node)]: node for node in nodes}
+        return [unique[position] for position in sorted(unique)]
+
+
+# The indexes of the most recently used parse trees.
+_NODE_INDEXES = OrderedDict()
+_NODE_INDEXES_SIZE = 16
+
+
+def node_index(module_tree):
+    """Get the `NodeIndex` of a parse tree.
+
+    The indexes of the most recently used trees are remembered, so operators
+    can share them in `Operator.find_sites`. The tree must not be changed
+    after it has been indexed, except temporarily.
+    """
+    key = id(module_tree)
+    cached = _NODE_INDEXES.get(key)
+    if cached is None or cached[0] is not module_tree:
+        cached = (module_tree, NodeIndex(module_tree))
+        _NODE_INDEXES[key] = cached
+        while len(_NODE_INDEXES) > _NODE_INDEXES_SIZE:
+            _NODE_INDEXES.popitem(last=False)
+    _NODE_INDEXES.move_to_end(key)
+    return cached[1]
+
+
+def operator_sites(operator, module_tree):
+    """The nodes of a parse tree which `operator` has to look at, in the
+    order in which a `Visitor` visits them.
+
+    These are the nodes returned by the operator's `find_sites`, or every
+    node of the tree if it doesn't narrow them down.
+
+    Args:
+        operator: An `Operator` or `OperatorFamily` instance.
+        module_tree: The parse tree.
+
+    Returns: An iterable of nodes.
+    """
+    sites = operator.find_sites(module_tree)
+    if sites is None:
+        return iter_nodes(module_tree)
+    return node_index(module_tree).sorted(sites)
+
+
 def get_ast(module_path, python_version):
     """Get the AST for the code in a file.
 
@@ -40,14 +184,61 @@ def get_ast(module_path, python_version):
     with module_path.open(mode='rt', encoding='utf-8') as handle:
         source = handle.read()
 
+    import parso
+
     return parso.parse(source, version=python_version)
 
 
+# The most recently used parse trees, keyed by module path and Python version.
+_AST_CACHE = OrderedDict()
+_AST_CACHE_SIZE = 16
+
+
+def get_cached_ast(module_path, python_version, source=None):
+    """Get the AST for the code in a file, reusing an earlier parse if the
+    code hasn't changed.
+
+    The trees of the most recently used modules are cached for each process.
+    Callers must leave the tree unchanged, e.g. by using
+    `cosmic_ray.mutating.mutate_ast`.
+
+    Args:
+        module_path: pathlib.Path to the file containing the code.
+        python_version: Python version as a "MAJ.MIN" string.
+        source: The code in `module_path`, if it has already been read.
+
+    Returns: The parso parse tree for the code in `module_path`.
+    """
+    if source is None:
+        with module_path.open(mode='rt', encoding='utf-8') as handle:
+            source = handle.read()
+
+    key = (str(module_path), python_version)
+    cached = _AST_CACHE.get(key)
+    if cached is not None and cached[0] == source:
+        _AST_CACHE.move_to_end(key)
+        return cached[1]
+
+    import parso
+
+    module_ast = parso.parse(source, version=python_version)
+    _AST_CACHE[key] = (source, module_ast)
+    _AST_CACHE.move_to_end(key)
+    while len(_AST_CACHE) > _AST_CACHE_SIZE:
+        _AST_CACHE.popitem(last=False)
+
+    return module_ast
+
+
 def is_none(node):
     "Determine if a node is the `None` keyword."
+    import parso.python.tree
+
     return isinstance(node, parso.python.tree.Keyword) and node.value == 'None'
 
 
 def is_number(node):
     "Determine if a node is a number."
+    import parso.python.tree
+
     return isinstance(node, parso.python.tree.Number)
@@ -2,6 +2,10 @@
 
 Here we manage command-line parsing and launching of the internal
 machinery that does mutation testing.
+
+The commands import most of that machinery themselves, so that quick commands
+like `worker`, which execution engines run once per job, don't pay for
+importing what they don't use.
 """
 import json
 import logging
@@ -18,13 +22,10 @@ import docopt_subcommands
 from docopt_subcommands.subcommands import Subcommands
 from exit_codes import ExitCode
 
-import cosmic_ray.commands
 import cosmic_ray.modules
 import cosmic_ray.plugins
-import cosmic_ray.testing
-import cosmic_ray.worker
 from cosmic_ray.config import load_config, serialize_config
-from cosmic_ray.mutating import apply_mutation
+from cosmic_ray.exceptions import PreflightError
 from cosmic_ray.progress import report_progress
 from cosmic_ray.version import __version__
 from cosmic_ray.work_db import WorkDB, use_db
@@ -74,6 +75,7 @@ def handle_new_config(args):
 
     Create a new config file.
     """
+    import cosmic_ray.commands  # pylint: disable=import-outside-toplevel
     config = cosmic_ray.commands.new_config()
     config_str = serialize_config(config)
     with open(args['<config-file>'], mode='wt') as handle:
@@ -100,6 +102,7 @@ def handle_init(args):
     The `session-file` is the filename for the database in which the
     work order will be stored.
     """
+    import cosmic_ray.commands  # pylint: disable=import-outside-toplevel
     config_file = args['<config-file>']
 
     config = load_config(config_file)
@@ -137,6 +140,32 @@ def handle_config(args):
     return ExitCode.OK
 
 
+@dsc.command()
+def handle_baseline(args):
+    """usage: cosmic-ray baseline <session-file>
+
+    Run the unmutated test suite in a cloned workspace and record how long it
+    takes. Subsequent `exec` commands set the timeout of each test run to a
+    multiple of this baseline rather than using the fixed timeout in the
+    configuration.
+
+    This fails if the test suite does not pass on the unmutated code.
+    """
+    import cosmic_ray.commands  # pylint: disable=import-outside-toplevel
+    from cosmic_ray.commands.baseline import BaselineError  # pylint: disable=import-outside-toplevel
+    session_file = args['<session-file>']
+
+    with use_db(session_file, WorkDB.Mode.open) as database:
+        config = database.get_config()
+        try:
+            cosmic_ray.commands.baseline(database, config)
+        except BaselineError as exc:
+            print(exc, file=sys.stderr)
+            return ExitCode.DATA_ERR
+
+    return ExitCode.OK
+
+
 @dsc.command()
 def handle_exec(args):
     """usage: cosmic-ray exec <session-file>
@@ -145,6 +174,7 @@ def handle_exec(args):
     This requires that the rest of your mutation testing
     infrastructure (e.g. worker processes) are already running.
     """
+    import cosmic_ray.commands  # pylint: disable=import-outside-toplevel
     session_file = args.get('<session-file>')
     cosmic_ray.commands.execute(session_file)
 
@@ -162,10 +192,11 @@ def handle_dump(args):
     WorkResult, both JSON-serialized. The WorkResult can be null, indicating a
     WorkItem with no results.
     """
+    from cosmic_ray.mutating import render_diffs  # pylint: disable=import-outside-toplevel
     session_file = args['<session-file>']
 
     with use_db(session_file, WorkDB.Mode.open) as database:
-        for work_item, result in database.completed_work_items:
+        for work_item, result in render_diffs(database.completed_work_items, database.source_digests):
             print(json.dumps((work_item, result), cls=WorkItemJsonEncoder))
         for work_item in database.pending_work_items:
             print(json.dumps((work_item, None), cls=WorkItemJsonEncoder))
@@ -219,6 +250,7 @@ def handle_apply(args):
     options:
       --python-version=VERSION  Python major.minor version (e.g. 3.6) of the code being mutated.
     """
+    from cosmic_ray.mutating import apply_mutation  # pylint: disable=import-outside-toplevel
 
     python_version = args['--python-version']
     if python_version is None:
@@ -250,6 +282,7 @@ def handle_worker(args):
       --keep-stdout             Do not squelch stdout
 
     """
+    import cosmic_ray.worker  # pylint: disable=import-outside-toplevel
     config = load_config(args.get('<config-file>'))
 
     with open(os.devnull, 'w') as devnull:
@@ -258,8 +291,10 @@ def handle_worker(args):
                 Path(args['<module-path>']),
                 config.python_version, args['<operator>'],
                 int(args['<occurrence>']),
-                config.test_command,
-                None)
+                config.test_command_for(args['<module-path>']),
+                None,
+                fail_fast=config.fail_fast,
+                failure_patterns=config.failure_patterns)
 
     sys.stdout.write(json.dumps(work_item, cls=WorkItemJsonEncoder))
 
@@ -318,6 +353,9 @@ def main(argv=None):
         if exc.__cause__ is not None:
             print(exc.__cause__, file=sys.stderr)
         return ExitCode.CONFIG
+    except PreflightError as exc:
+        print(exc, file=sys.stderr)
+        return ExitCode.DATA_ERR
     except subprocess.CalledProcessError as exc:
         print('Error in subprocess', file=sys.stderr)
         print(exc, file=sys.stderr)
@@ -1,4 +1,7 @@
 """Support for making clones of projects for test isolation.
+
+gitpython and virtualenv are slow to import, so they're only imported when a
+workspace is actually cloned.
 """
 
 import contextlib
@@ -8,9 +11,6 @@ from pathlib import Path
 import shutil
 import subprocess
 import tempfile
-import virtualenv
-
-import git
 
 from cosmic_ray.exceptions import CosmicRayTestingException as Exc
 
@@ -74,6 +74,7 @@ class ClonedWorkspace:
         # Install into venv
         self._venv_path = Path(self._tempdir.name) / 'venv'
         log.info('Creating virtual environment in %s', self._venv_path)
+        import virtualenv  # pylint: disable=import-outside-toplevel
         virtualenv.create_environment(str(self._venv_path))
 
         _activate(self._venv_path)
@@ -121,6 +122,7 @@ def _clone_with_git(repo_uri, dest_path):
         dest_path: The location to clone to.
     """
     log.info('Cloning git repo %s to %s', repo_uri, dest_path)
+    import git  # pylint: disable=import-outside-toplevel
     git.Repo.clone_from(repo_uri, dest_path, depth=1)
 
 
@@ -144,6 +146,7 @@ def _activate(venv_path):
     Args:
         venv_path: Path of virtual environment to activate.
     """
+    import virtualenv  # pylint: disable=import-outside-toplevel
     _home_dir, _lib_dir, _inc_dir, bin_dir = virtualenv.path_locations(str(venv_path))
     activate_script = str(Path(bin_dir) / 'activate_this.py')
 
@@ -161,6 +164,7 @@ __builtins__['{0}'] = {0}
 
 
 def _install_sitecustomize(venv_path):
+    import virtualenv  # pylint: disable=import-outside-toplevel
     _home_dir, lib_dir, _inc_dir, _bin_dir = virtualenv.path_locations(str(venv_path))
     with open(str(Path(lib_dir) / 'site-packages' / 'sitecustomize.py'), mode='wt', encoding='utf-8') as sc:
         sc.write(_SITE_CUSTOMIZE)
@@ -0,0 +1,134 @@
+"""Implementation of the 'baseline' command.
+
+The baseline phase runs the unmutated test suite a few times in a cloned
+workspace and records how long it takes. `exec` then uses these timings to set
+the timeout for each job to a multiple of the baseline duration, rather than
+using the fixed `timeout` from the config.
+
+If `coverage.baseline-command` is set, the baseline also measures the coverage
+of the test suite and applies the coverage interceptor to the session (see
+`cosmic_ray.interceptors.coverage`).
+"""
+import logging
+
+from cosmic_ray.cloning import cloned_workspace
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.interceptors import coverage
+from cosmic_ray.test_selection import configure_test_selection
+from cosmic_ray.testing import run_tests
+from cosmic_ray.timing import Timer
+from cosmic_ray.work_item import TestOutcome
+
+log = logging.getLogger(__name__)
+
+
+class BaselineError(Exception):
+    "Raised when the unmutated test suite does not pass."
+
+
+def baseline(work_db, config):
+    """Run the unmutated test suite and record its timing in the session.
+
+    The test suite is run `baseline.runs` times in a workspace cloned
+    according to the `cloning` config. If `baseline.per-module` is true and
+    test-selection is configured, the selected tests for each module are
+    timed as well. If `coverage.baseline-command` is set, it is run once to
+    write the coverage data file, and the work items whose code the tests
+    never executed are marked in the session.
+
+    Args:
+      work_db: The session `WorkDB`.
+      config: The session `ConfigDict`.
+
+    Raises:
+      BaselineError: If any of the baseline test runs does not pass.
+    """
+    baseline_config = config.sub('baseline')
+    runs = int(baseline_config.get('runs', 3))
+    timeout = config.get('timeout')
+
+    configure_test_selection(work_db, config)
+    commands = {None: config.test_command_for(None)}
+    if baseline_config.get('per-module', False):
+        commands.update(
+            (module_path, config.test_command_for(module_path))
+            for module_path in config.sub('test-selection', 'selected'))
+
+    coverage_config = config.sub('coverage')
+    coverage_command = coverage_config.get('baseline-command')
+    # Resolved before changing to the cloned workspace.
+    coverage_file = coverage.data_file_path(coverage_config)
+
+    durations = {}
+    with cloned_workspace(config.cloning_config):
+        for module_path, command in commands.items():
+            log.info('Running baseline for %s: %s', module_path or 'full test suite', command)
+            durations[module_path] = [
+                _timed_run(command, None if timeout is None else float(timeout))
+                for _ in range(runs)
+            ]
+
+        if coverage_command is not None:
+            _coverage_run(coverage_command, coverage_file)
+
+    work_db.set_baseline(durations)
+
+    if coverage_command is not None:
+        coverage.intercept(work_db, coverage_config)
+
+
+def _timed_run(command, timeout):
+    "Run `command` on unmutated code, returning its duration in seconds."
+    with Timer() as timer:
+        outcome, output = run_tests(command, timeout)
+
+    if outcome != TestOutcome.SURVIVED:
+        raise BaselineError(
+            'The test command failed on unmutated code: {}\n{}'.format(command, output))
+
+    return timer.elapsed.total_seconds()
+
+
+def _coverage_run(command, data_file):
+    "Run `command` on unmutated code to write coverage data to `data_file`."
+    log.info('Measuring coverage: %s', command)
+    outcome, output = run_tests(command, extra_env={'COVERAGE_FILE': str(data_file)})
+
+    if outcome != TestOutcome.SURVIVED:
+        raise BaselineError(
+            'The coverage command failed on unmutated code: {}\n{}'.format(command, output))
+
+
+def calibrate_timeouts(work_db, config):
+    """Store the timeouts calibrated from the session's baseline in `config`.
+
+    Each timeout is `baseline.timeout-multiplier` times the longest baseline
+    run, and at least `baseline.min-timeout` seconds. This does nothing if no
+    baseline has been recorded. The timeouts are used by
+    `ConfigDict.timeout_for`.
+
+    Args:
+      work_db: The session `WorkDB`.
+      config: The session `ConfigDict`. This is modified in place.
+    """
+    durations = work_db.baseline
+    if not durations:
+        return
+
+    baseline_config = config.setdefault('baseline', ConfigDict())
+    multiplier = float(baseline_config.get('timeout-multiplier', 5))
+    min_timeout = float(baseline_config.get('min-timeout', 1))
+
+    def _timeout(runs):
+        return max(max(runs) * multiplier, min_timeout)
+
+    if None in durations:
+        baseline_config['calibrated-timeout'] = _timeout(durations[None])
+    baseline_config['module-timeouts'] = ConfigDict(
+        (module_path, _timeout(runs))
+        for module_path, runs in durations.items()
+        if module_path is not None)
+
+    log.info('Calibrated timeouts: %s, per module: %s',
+             baseline_config.get('calibrated-timeout'),
+             dict(baseline_config['module-timeouts']))
@@ -2,9 +2,15 @@
 import os
 import logging
 
+from cosmic_ray.commands.baseline import calibrate_timeouts
 from cosmic_ray.progress import reports_progress
 from cosmic_ray.work_db import use_db, WorkDB
 from cosmic_ray.plugins import get_execution_engine
+from cosmic_ray import result_cache
+from cosmic_ray.schemata import configure_schemata
+from cosmic_ray.test_selection import configure_test_selection, imported_modules
+from cosmic_ray.worker import check_failure_reporting
+from cosmic_ray.work_item import WorkerOutcome, WorkResult
 
 log = logging.getLogger(__name__)
 
@@ -29,6 +35,56 @@ def _report_progress(stream):
             file=stream)
 
 
+def _use_result_cache(work_db, config):
+    """Record the cached results of the pending work items of a session.
+
+    Returns: A tuple of the `ResultCache`, or `None` if it isn't configured,
+        and a dict mapping the job-ids of the remaining pending work items to
+        their cache keys.
+    """
+    cache = result_cache.result_cache(config)
+    if cache is None:
+        return None, {}
+
+    pending = list(work_db.pending_work_items)
+    keys = result_cache.work_item_keys(pending, config, work_db.source_digests,
+                                       imported_modules(work_db.module_paths, work_db, config))
+    cached = result_cache.lookup(cache, pending, keys, config)
+    work_db.set_results(cached.items())
+    _update_progress(work_db)
+    log.info("Found %s of %s pending results in the result cache %s", len(cached), len(pending), cache.path)
+
+    return cache, {job_id: key for job_id, key in keys.items() if job_id not in cached}
+
+
+def _copy_results_to_duplicates(work_db):
+    """Give each duplicate mutant the result of the mutant it duplicates.
+
+    Duplicates are skipped during init (see
+    `cosmic_ray.interceptors.equivalent_mutants`), so they only get an outcome
+    once the mutant they duplicate has been tested.
+    """
+    duplicates = work_db.duplicates
+    if not duplicates:
+        return
+
+    results = dict(work_db.results)
+    copies = []
+    for job_id, original in duplicates.items():
+        result = results.get(original)
+        if result is None or result.worker_outcome == WorkerOutcome.SKIPPED:
+            continue
+        # The diff of the duplicate is its own, so it's rendered from its work item.
+        copies.append((job_id, WorkResult(
+            worker_outcome=result.worker_outcome,
+            output=result.output,
+            test_outcome=result.test_outcome,
+            diff=None)))
+
+    work_db.set_results(copies)
+    log.info("Copied the results of %s duplicate mutants", len(copies))
+
+
 @reports_progress(_report_progress)
 def execute(db_name):
     """Execute any pending work in the database stored in `db_name`,
@@ -36,15 +92,33 @@ def execute(db_name):
 
     This looks for any work in `db_name` which has no results, schedules it to
     be executed, and records any results that arrive.
+
+    If a result cache is configured (see `cosmic_ray.result_cache`), the
+    cached results of the pending work are recorded first, and the results
+    which arrive are stored in the cache. Finally, duplicate mutants get the
+    results of the mutants they duplicate.
     """
     try:
         with use_db(db_name, mode=WorkDB.Mode.open) as work_db:
             _update_progress(work_db)
             config = work_db.get_config()
+            check_failure_reporting(config)
+            configure_test_selection(work_db, config)
+            calibrate_timeouts(work_db, config)
+            schema_diffs = configure_schemata(work_db, config)
             engine = get_execution_engine(config.execution_engine_name)
+            cache, cache_keys = _use_result_cache(work_db, config)
 
             def on_task_complete(job_id, work_result):
+                if work_result.diff is None and schema_diffs.get(job_id) is not None:
+                    work_result = WorkResult(
+                        worker_outcome=work_result.worker_outcome,
+                        output=work_result.output,
+                        test_outcome=work_result.test_outcome,
+                        diff=schema_diffs[job_id])
                 work_db.set_result(job_id, work_result)
+                if job_id in cache_keys and result_cache.cacheable(work_result):
+                    cache.put(cache_keys[job_id], work_result)
                 _update_progress(work_db)
                 log.info("Job %s complete", job_id)
 
@@ -55,6 +129,13 @@ def execute(db_name):
                 on_task_complete=on_task_complete)
             log.info("Execution finished")
 
+            _copy_results_to_duplicates(work_db)
+
+            if cache is not None:
+                evicted = cache.evict()
+                if evicted:
+                    log.info("Evicted %s results from the result cache", evicted)
+
     except FileNotFoundError as exc:
         raise FileNotFoundError(
             str(exc).replace('Requested file', 'Corresponding database',
@@ -2,9 +2,14 @@
 import logging
 import uuid
 
-from cosmic_ray.ast import get_ast, Visitor
+from cosmic_ray.ast import get_cached_ast, operator_sites, Visitor
+from cosmic_ray.interceptors import in_regions, intercept_work_db, is_batch_interceptor, split_decisions
 import cosmic_ray.modules
-from cosmic_ray.plugins import get_interceptor, interceptor_names, get_operator
+from cosmic_ray.operator_selection import OperatorSelection
+from cosmic_ray.mutating import line_offsets, mutation_splice
+from cosmic_ray.plugins import get_interceptor, interceptor_names, get_operator, operator_families
+from cosmic_ray.source_index import source_index
+from cosmic_ray.tokenized import sorted_mutations, tokenize_module
 from cosmic_ray.work_item import WorkItem
 
 log = logging.getLogger()
@@ -17,21 +22,42 @@ class WorkDBInitVisitor(Visitor):
     As they're found, `activate` is called and this core adds new
     WorkItems to the WorkDB. Use this core to populate a WorkDB by creating one
     for each operator-module pair and running it over the module's AST.
+
+    If the `line_offsets` of the module's code are given, each WorkItem also
+    records its mutation as a splice of the module's text, so that workers
+    don't need to parse the module.
     """
 
-    def __init__(self, module_path, op_name, work_db, operator):
+    def __init__(self, module_path, op_name, work_db, operator, offsets=None):
         self.operator = operator
         self.module_path = module_path
         self.op_name = op_name
         self.work_db = work_db
+        self.offsets = offsets
         self.occurrence = 0
 
     def visit(self, node):
-        for start, stop in self.operator.mutation_positions(node):
-            self._record_work_item(start, stop)
+        for index, (start, stop) in enumerate(self.operator.mutation_positions(node)):
+            self.record(node, index, start, stop)
         return node
 
-    def _record_work_item(self, start_pos, end_pos):
+    def record(self, node, index, start_pos, end_pos):
+        "Add a WorkItem for the `index`-th mutation of `node` by the operator."
+        self._record_work_item(start_pos, end_pos, self._splice(node, index))
+
+    def _splice(self, node, index):
+        if self.offsets is None:
+            return None
+
+        try:
+            return mutation_splice(node, self.operator, index, self.offsets)
+        except Exception as exc:  # noqa # pylint: disable=broad-except
+            # The worker will apply the mutation to the AST and report the error.
+            log.debug('Unable to splice %s mutation at %s in %s: %s',
+                      self.op_name, node.start_pos, self.module_path, exc)
+            return None
+
+    def _record_work_item(self, start_pos, end_pos, splice=None):
         self.work_db.add_work_item(
             WorkItem(
                 job_id=uuid.uuid4().hex,
@@ -39,11 +65,137 @@ class WorkDBInitVisitor(Visitor):
                 operator_name=self.op_name,
                 occurrence=self.occurrence,
                 start_pos=start_pos,
-                end_pos=end_pos))
+                end_pos=end_pos,
+                splice=splice))
 
         self.occurrence += 1
 
 
+class FamilyInitVisitor(Visitor):
+    """An AST visitor that initializes a WorkDB for the members of an
+    `OperatorFamily` in a specific module.
+
+    The family finds the mutations of all of its members in a single walk of
+    the AST. The WorkItems are the same as those which a `WorkDBInitVisitor`
+    for each member would add.
+
+    Args:
+        members: A dict which maps the names of the members to mutate with to
+            their operator names.
+    """
+
+    def __init__(self, module_path, family, members, work_db, offsets=None):
+        self.family = family
+        self.visitors = {
+            name: WorkDBInitVisitor(module_path, op_name, work_db, family.member(name), offsets)
+            for name, op_name in members.items()
+        }
+
+    def visit(self, node):
+        indices = {}
+        for name, start, stop in self.family.mutation_positions(node):
+            index = indices.get(name, 0)
+            indices[name] = index + 1
+            visitor = self.visitors.get(name)
+            if visitor is not None:
+                visitor.record(node, index, start, stop)
+        return node
+
+
+def _add_token_mutations(module_path, op_name, work_db, operator, module):
+    """Add a WorkItem to `work_db` for each mutation that an operator finds in
+    a `TokenizedModule`.
+
+    Returns: Whether the operator could find its mutations in `module`.
+    """
+    try:
+        mutations = operator.token_mutations(module)
+    except Exception:  # noqa # pylint: disable=broad-except
+        log.exception('Unable to find %s mutations in %s without parso', op_name, module_path)
+        return False
+
+    if mutations is None:
+        return False
+    _add_mutations(module_path, op_name, work_db, mutations, module)
+    return True
+
+
+def _add_family_token_mutations(module_path, family, members, work_db, module):
+    """Add a WorkItem to `work_db` for each mutation that the members of a
+    family find in a `TokenizedModule`.
+
+    Returns: The members which couldn't find their mutations in `module`, in
+        the form of `members`.
+    """
+    try:
+        mutations = family.token_mutations(module)
+    except Exception:  # noqa # pylint: disable=broad-except
+        log.exception('Unable to find %s mutations in %s without parso', type(family).__name__, module_path)
+        return members
+
+    remaining = {}
+    for name, op_name in members.items():
+        if mutations.get(name) is None:
+            remaining[name] = op_name
+        else:
+            _add_mutations(module_path, op_name, work_db, mutations[name], module)
+    return remaining
+
+
+def _add_mutations(module_path, op_name, work_db, mutations, module):
+    "Add a WorkItem to `work_db` for each of an operator's `TokenMutation`s."
+    for occurrence, mutation in enumerate(sorted_mutations(mutations)):
+        work_db.add_work_item(
+            WorkItem(
+                job_id=uuid.uuid4().hex,
+                module_path=str(module_path),
+                operator_name=op_name,
+                occurrence=occurrence,
+                start_pos=mutation.start_pos,
+                end_pos=mutation.end_pos,
+                splice=module.trimmed_splice(mutation)))
+
+
+class _WorkItemBatch:
+    """The WorkItems of a module, which are collected so that interceptors can
+    decide on them before they're added to the WorkDB.
+
+    Args:
+        excluded_regions: `IntervalIndex`es of the regions of the module which
+            must not be mutated. WorkItems inside them are dropped.
+    """
+
+    def __init__(self, excluded_regions=()):
+        self.work_items = []
+        self._excluded_regions = excluded_regions
+
+    def add_work_item(self, work_item):
+        "Add a WorkItem to the batch."
+        if not any(in_regions(regions, work_item) for regions in self._excluded_regions):
+            self.work_items.append(work_item)
+
+
+class _Module:
+    """The code of a module, which is parsed with parso when it's needed.
+
+    The parse tree is shared with interceptors through `get_cached_ast`.
+    """
+
+    def __init__(self, module_path, code, python_version):
+        self.code = code
+        self.offsets = line_offsets(code)
+        self._module_path = module_path
+        self._python_version = python_version
+        self._ast = None
+
+    @property
+    def ast(self):
+        "The parso AST of the module."
+        if self._ast is None:
+            self._ast = get_cached_ast(self._module_path, self._python_version, source=self.code)
+        return self._ast
+
+
 def init(module_paths, work_db, config):
     """Clear and initialize a work-db with work items.
 
@@ -57,24 +209,112 @@ def init(module_paths, work_db, config):
       config: The configuration for the new session.
     """
 
-    operator_names = list(cosmic_ray.plugins.operator_names())
+    selection = OperatorSelection(config.operators_config, cosmic_ray.plugins.operator_names())
+
+    # The members of operator families find their mutations together.
+    families = operator_families()
+    family_operators = {op_name for _, members in families for op_name in members.values()}
 
     work_db.set_config(config=config)
 
     work_db.clear()
 
+    interceptors = _enabled_interceptors(config)
+    batch_interceptors = [
+        interceptor(config.sub(name), config)
+        for name, interceptor in interceptors
+        if is_batch_interceptor(interceptor)
+    ]
+
     for module_path in module_paths:
-        module_ast = get_ast(
-            module_path, python_version=config.python_version)
+        with module_path.open(mode='rt', encoding='utf-8') as handle:
+            code = handle.read()
+
+        tokenized = None
+        if config.parser == 'tokenize':
+            tokenized = tokenize_module(code, config.python_version)
+
+        selected = selection.operators_for(module_path)
+        selected_names = set(selected)
+        log.debug('Applying %s operators to %s', len(selected), module_path)
+
+        # The module is only parsed with parso if an operator needs it.
+        module = _Module(module_path, code, config.python_version)
+        # The index is shared with the interceptors and stored in the session.
+        index = source_index(code)
+        batch = _WorkItemBatch(_excluded_regions(batch_interceptors, module_path, code, index))
+
+        for family_class, members in families:
+            members = {name: op_name for name, op_name in members.items() if op_name in selected_names}
+            if not members:
+                continue
+
+            family = family_class(config.python_version)
+            if tokenized is not None:
+                members = _add_family_token_mutations(module_path, family, members, batch, tokenized)
+            if members:
+                visitor = FamilyInitVisitor(module_path, family, members, batch, module.offsets)
+                for node in operator_sites(family, module.ast):
+                    visitor.visit(node)
+
+        for op_name in selected:
+            if op_name in family_operators:
+                continue
 
-        for op_name in operator_names:
             operator = get_operator(op_name)(config.python_version)
-            visitor = WorkDBInitVisitor(module_path, op_name, work_db,
-                                        operator)
-            visitor.walk(module_ast)
+            if tokenized is not None and \
+                    _add_token_mutations(module_path, op_name, batch, operator, tokenized):
+                continue
+
+            visitor = WorkDBInitVisitor(module_path, op_name, batch,
+                                        operator, module.offsets)
+            for node in operator_sites(operator, module.ast):
+                visitor.visit(node)
+
+        results, duplicates = _intercept(batch_interceptors, module_path, code, index, batch.work_items)
+        work_db.set_source_index(module_path, index)
+        work_db.add_work_items(batch.work_items, results.items(), duplicates)
+
+    for name, interceptor in interceptors:
+        if not is_batch_interceptor(interceptor):
+            interceptor(work_db, config.sub(name))
 
+
+def _enabled_interceptors(config):
+    "The `(name, interceptor)`s of the interceptors enabled in `config`."
     enabled_interceptors = config.sub('interceptors').get('enabled', ())
-    apply_interceptors(work_db, enabled_interceptors, config)
+    return [(name, get_interceptor(name))
+            for name in interceptor_names() if name in enabled_interceptors]
+
+
+def _excluded_regions(interceptors, module_path, source, index):
+    "The `IntervalIndex`es of the regions of a module which the interceptors exclude."
+    excluded = []
+    for interceptor in interceptors:
+        regions = interceptor.excluded_regions(module_path, source, index)
+        if regions:
+            excluded.append(regions)
+    return excluded
+
+
+def _intercept(interceptors, module_path, source, index, work_items):
+    """Let each `Interceptor` decide on the work items of a module which no
+    earlier interceptor has decided on.
+
+    Returns: A tuple of a dict mapping job-ids to WorkResults and a list of
+        `(job-id, duplicate-of-job-id)` tuples.
+    """
+    results = {}
+    duplicates = []
+    for interceptor in interceptors:
+        candidates = [item for item in work_items if item.job_id not in results]
+        if not candidates:
+            break
+        interceptor_results, interceptor_duplicates = split_decisions(
+            interceptor.intercept(module_path, source, candidates, index))
+        results.update(interceptor_results)
+        duplicates.extend(interceptor_duplicates)
+    return results, duplicates
 
 
 def apply_interceptors(work_db, enabled_interceptors, config):
@@ -83,4 +323,7 @@ def apply_interceptors(work_db, enabled_interceptors, config):
     for name in names:
         sub_config = config.sub(name)
         interceptor = get_interceptor(name)
-        interceptor(work_db, sub_config)
+        if is_batch_interceptor(interceptor):
+            intercept_work_db(interceptor(sub_config, config), work_db)
+        else:
+            interceptor(work_db, sub_config)
@@ -1,6 +1,7 @@
 """Configuration module."""
 from contextlib import contextmanager
 import logging
+import shlex
 import sys
 
 import toml
@@ -86,11 +87,90 @@ class ConfigDict(dict):
         """
         return self['test-command']
 
+    def test_command_for(self, module_path=None, tests=None):
+        """The command to run to execute the tests for mutants of `module_path`.
+
+        If `tests` is given, they replace the `{tests}` placeholder in the
+        test command. Otherwise, if test-selection has selected tests for the
+        module (see `cosmic_ray.test_selection`), they replace it. If neither
+        applies, the placeholder is removed so that the full test suite is
+        run.
+        """
+        selected = () if tests is None else tests
+        if tests is None and module_path is not None:
+            selected = self.sub('test-selection', 'selected').get(str(module_path), ())
+        return self.test_command.replace(
+            '{tests}', ' '.join(shlex.quote(test) for test in selected))
+
+    @property
+    def fail_fast(self):
+        """Whether to stop a test run as soon as a test fails.
+
+        Failed tests are detected in the test command's output using
+        `failure_patterns`.
+        """
+        return bool(self.get('fail-fast', False))
+
+    @property
+    def parser(self):
+        """The parser which `init` uses to find mutations.
+
+        This is either "parso" (the default) or "tokenize", for the faster
+        analysis of `cosmic_ray.tokenized`.
+        """
+        return self.get('parser', 'parso')
+
+    @property
+    def lazy_diffs(self):
+        """Whether to leave out the diffs of mutants from their results.
+
+        The diffs are rendered from the mutants' splices when a report asks
+        for them (see `cosmic_ray.mutating.result_diff`).
+        """
+        return bool(self.get('lazy-diffs', False))
+
+    @property
+    def failure_patterns(self):
+        """Regular expressions identifying failed tests in the output of the test command.
+
+        Each must have a named group "test" which captures the ID of the
+        failed test. If this is not set, the result is `None`, meaning that
+        the patterns for common test runners should be used.
+        """
+        return self.get('failure-patterns')
+
+    @property
+    def operators_config(self):
+        """The 'operators' section of the config, which selects the operators
+        to apply (see `cosmic_ray.operator_selection`).
+        """
+        return self.sub('operators')
+
+    @property
+    def kill_first_config(self):
+        "The 'kill-first' section of the config."
+        return self.sub('kill-first')
+
     @property
     def timeout(self):
         "The timeout (seconds) for tests."
         return float(self['timeout'])
 
+    def timeout_for(self, module_path):
+        """The timeout (seconds) for tests of mutants of `module_path`.
+
+        If timeouts have been calibrated from a baseline run (see
+        `cosmic_ray.commands.baseline`), the calibrated timeout for the module,
+        or else for the full test suite, is used. Otherwise this is `timeout`.
+        """
+        baseline = self.sub('baseline')
+        timeout = baseline.sub('module-timeouts').get(str(module_path))
+        if timeout is None:
+            timeout = baseline.get('calibrated-timeout')
+        if timeout is None:
+            return self.timeout
+        return float(timeout)
+
     @property
     def execution_engine_name(self):
         "The name of the execution engine to use."
@@ -2,3 +2,11 @@ class CosmicRayTestingException(Exception):
     """Exception that we use for exception replacement.
     """
     pass
+
+
+class PreflightError(Exception):
+    "Raised when the unmutated test suite does not pass in a workspace."
+
+
+class SourceChangedError(Exception):
+    "Raised when the code of a module is not the code its work items were made for."
@@ -43,13 +43,16 @@ import os
 
 from cosmic_ray.cloning import ClonedWorkspace
 from cosmic_ray.execution.execution_engine import ExecutionEngine
-from cosmic_ray.worker import worker
+from cosmic_ray.preflight import PreflightError, preflight
+from cosmic_ray.worker import run_work_item
 
 log = logging.getLogger(__name__)
 
 # Per-subprocess globals
 _workspace = None
 _config = None
+_flaky_tests = frozenset()
+_preflight_error = None
 
 
 @contextlib.contextmanager
@@ -77,18 +80,25 @@ def _initialize_worker(config):
     # Register a finalizer
     multiprocessing.util.Finalize(_workspace, _workspace.cleanup, exitpriority=16)
 
+    # Raising an exception here would just make the pool start a new worker,
+    # so pre-flight failures are reported by the first job instead.
+    global _flaky_tests
+    global _preflight_error
+    with excursion(_workspace.clone_dir):
+        try:
+            _flaky_tests = preflight(config)
+        except PreflightError as exc:
+            _preflight_error = exc
+
 
 def _execute_work_item(work_item):
+    if _preflight_error is not None:
+        raise _preflight_error
+
     log.info('Executing worker in %s, PID=%s', _workspace.clone_dir, os.getpid())
 
     with excursion(_workspace.clone_dir):
-        result = worker(
-            work_item.module_path,
-            _config.python_version,
-            work_item.operator_name,
-            work_item.occurrence,
-            _config.test_command,
-            _config.timeout)
+        result = run_work_item(work_item, _config, _flaky_tests)
 
     return work_item.job_id, result
 
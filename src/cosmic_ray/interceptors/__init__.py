@@ -1,5 +1,129 @@
-# An interceptor is a callable that is called at the end of the "init" command.
-#
-# Interceptors are passed the initialized WorkDB, and they are able to do
-# things like mark certain mutations as skipped (i.e. so that they are never
-# performed).
+"""Interceptors decide which mutations of a session don't need to be tested.
+
+An interceptor is a subclass of `Interceptor`. During the "init" command each
+enabled interceptor is passed the candidate work items of a module before they
+are added to the WorkDB. It returns the results of those it wants to skip, e.g.
+to mark them as SKIPPED, and the work items are added together with their
+results. An interceptor can also exclude whole regions of a module, whose
+mutations are then not added to the WorkDB at all.
+
+For backwards compatibility an interceptor can also be a callable which is
+called at the end of the "init" command with the initialized WorkDB and its
+config. It is then able to do things like mark certain mutations as skipped
+(i.e. so that they are never performed).
+"""
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from cosmic_ray.source_index import source_digest, source_index
+from cosmic_ray.work_item import WorkerOutcome, WorkResult
+
+
+class Interceptor(ABC):
+    """Base class for interceptors which decide on batches of work items.
+
+    Args:
+        config: The config of the interceptor, i.e. the `[cosmic-ray.<name>]`
+            section of the session config.
+        session_config: The config of the session.
+    """
+
+    def __init__(self, config, session_config):
+        self.config = config
+        self.session_config = session_config
+
+    @abstractmethod
+    def intercept(self, module_path, source, work_items, index):
+        """Decide which of the work items of a module to skip.
+
+        Args:
+            module_path: The pathlib.Path of the module.
+            source: The code of the module.
+            work_items: A list of the module's WorkItems which no earlier
+                interceptor has decided on.
+            index: The `cosmic_ray.source_index.SourceIndex` of the module.
+
+        Returns: An iterable of `(job-id, WorkResult)` tuples for the work
+            items which shouldn't be tested. A tuple can also have a third
+            element, the job-id of an earlier work item of the module which
+            the skipped work item duplicates.
+        """
+
+    def excluded_regions(self, module_path, source, index):  # pylint: disable=unused-argument,no-self-use
+        """Find the regions of a module which must not be mutated.
+
+        Work items which are completely inside these regions are dropped
+        before they're passed to `intercept` or added to the WorkDB.
+
+        Args:
+            module_path: The pathlib.Path of the module.
+            source: The code of the module.
+            index: The `cosmic_ray.source_index.SourceIndex` of the module.
+
+        Returns: An `IntervalIndex` of `((line, col), (line, col))` regions,
+            or `None` if the interceptor excludes no regions.
+        """
+        return None
+
+
+def is_batch_interceptor(interceptor):
+    "Whether an interceptor plugin is an `Interceptor` class."
+    return isinstance(interceptor, type) and issubclass(interceptor, Interceptor)
+
+
+def in_regions(regions, work_item):
+    "Whether a WorkItem is completely inside one of the regions of an `IntervalIndex`."
+    return regions.contains(work_item.start_pos, work_item.end_pos)
+
+
+def split_decisions(decisions):
+    """Split the decisions returned by `Interceptor.intercept`.
+
+    Returns: A tuple of a dict mapping job-ids to WorkResults and a list of
+        `(job-id, duplicate-of-job-id)` tuples.
+    """
+    results = {}
+    duplicates = []
+    for job_id, result, *duplicate_of in decisions:
+        results[job_id] = result
+        if duplicate_of:
+            duplicates.append((job_id, duplicate_of[0]))
+    return results, duplicates
+
+
+def intercept_work_db(interceptor, work_db):
+    """Apply an `Interceptor` to the pending work items of a WorkDB.
+
+    The results of all modules are written to `work_db` at once. The
+    interceptor is passed the `SourceIndex` which "init" stored for each
+    module.
+    """
+    items_by_module = defaultdict(list)
+    for item in work_db.pending_work_items:
+        items_by_module[item.module_path].append(item)
+
+    decisions = []
+    for module_path, items in items_by_module.items():
+        with module_path.open(mode='rt', encoding='utf-8') as handle:
+            source = handle.read()
+
+        index = work_db.get_source_index(module_path)
+        if index is None or index.digest != source_digest(source):
+            # The module has changed since init.
+            index = source_index(source)
+
+        # The work items of excluded regions already exist, so they're skipped.
+        regions = interceptor.excluded_regions(module_path, source, index)
+        if regions is not None:
+            excluded = [item for item in items if in_regions(regions, item)]
+            decisions.extend(
+                (item.job_id, WorkResult(output='Excluded region', worker_outcome=WorkerOutcome.SKIPPED))
+                for item in excluded)
+            items = [item for item in items if not in_regions(regions, item)]
+
+        decisions.extend(interceptor.intercept(module_path, source, items, index))
+
+    results, duplicates = split_decisions(decisions)
+    work_db.set_results(results.items())
+    work_db.add_duplicates(duplicates)
@@ -0,0 +1,202 @@
+"""An interceptor which uses the coverage of the test suite to skip the
+mutations which no test executes.
+
+A mutation of code which the tests never execute can't be killed, so running
+the tests for it is a waste of time. This interceptor reads the data of a
+coverage.py run of the test suite and marks these mutations as skipped, or as
+survived, without running them.
+
+The interceptor is configured in the `[cosmic-ray.coverage]` section of the
+config:
+
+    [cosmic-ray.coverage]
+    data-file = ".coverage"
+    outcome = "skipped"
+    baseline-command = "coverage run -m pytest"
+
+`data-file` is either a coverage.py data file, which requires the `coverage`
+package, or a JSON report written by `coverage json`. `outcome` is either
+"skipped" or "survived". If `baseline-command` is set, the "baseline" command
+runs it once in its cloned workspace, with `COVERAGE_FILE` set to the data
+file, and then applies the interceptor to the pending work items of the
+session.
+
+A mutation is considered unexecuted if none of the lines of the statements it
+is in were executed. Modules which aren't in the coverage data are left alone.
+"""
+import ast
+import json
+import logging
+from collections import defaultdict
+from pathlib import Path
+
+from cosmic_ray.config import ConfigValueError
+from cosmic_ray.interceptors import Interceptor, intercept_work_db
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+log = logging.getLogger()
+
+OUTPUT = 'Not executed by the tests'
+
+_OUTCOMES = ('skipped', 'survived')
+
+
+class CoverageInterceptor(Interceptor):
+    """Mark the work items whose code was never executed by the tests as
+    skipped or survived.
+    """
+
+    def __init__(self, config, session_config):
+        super().__init__(config, session_config)
+        self._outcome = config.get('outcome', 'skipped')
+        if self._outcome not in _OUTCOMES:
+            raise ConfigValueError('coverage.outcome must be one of {}, not {!r}'.format(_OUTCOMES, self._outcome))
+
+        self._executed = None
+        data_file = data_file_path(config)
+        if data_file.exists():
+            self._executed = ExecutedLines(read_executed_lines(data_file))
+        else:
+            log.info('No coverage data in %s, all mutations will be tested', data_file)
+
+    def intercept(self, module_path, source, work_items, index):
+        if self._executed is None:
+            return
+
+        executed = self._executed.lines(module_path)
+        if executed is None:
+            log.info('%s is not in the coverage data, all its mutations will be tested', module_path)
+            return
+
+        reachable = reachable_lines(source, executed)
+        if reachable is None:
+            return
+
+        for item in work_items:
+            lines = range(item.start_pos[0], item.end_pos[0] + 1)
+            if not any(line in reachable for line in lines):
+                yield item.job_id, self._result()
+
+    def _result(self):
+        if self._outcome == 'survived':
+            return WorkResult(output=OUTPUT,
+                              test_outcome=TestOutcome.SURVIVED,
+                              worker_outcome=WorkerOutcome.NORMAL)
+        return WorkResult(output=OUTPUT, worker_outcome=WorkerOutcome.SKIPPED)
+
+
+class ExecutedLines:
+    """The lines executed in each file of some coverage data.
+
+    Coverage data records absolute paths, which don't match the paths of the
+    modules if the tests were run in a cloned workspace. A module is matched
+    to a measured file by its resolved path, or else by the measured file
+    whose path ends with the module's relative path.
+
+    Args:
+        executed: A dict mapping the paths of the measured files to
+            iterables of their executed line numbers.
+    """
+
+    def __init__(self, executed):
+        self._executed = {str(Path(path)): set(lines) for path, lines in executed.items()}
+        # The measured files by the name of the file.
+        self._by_name = defaultdict(list)
+        for path in self._executed:
+            self._by_name[Path(path).name].append(path)
+
+    def lines(self, module_path):
+        """The set of executed lines of a module, or `None` if it wasn't
+        measured.
+        """
+        module_path = Path(module_path)
+        resolved = str(module_path.resolve())
+        if resolved in self._executed:
+            return self._executed[resolved]
+        if module_path.is_absolute():
+            return None
+
+        parts = module_path.parts
+        matches = [path for path in self._by_name.get(module_path.name, ())
+                   if Path(path).parts[-len(parts):] == parts]
+        if len(matches) != 1:
+            # Rather test the mutations than guess which file is the module.
+            return None
+        return self._executed[matches[0]]
+
+
+def data_file_path(config):
+    "The absolute path of the coverage data file of a `[cosmic-ray.coverage]` config."
+    return Path(config.get('data-file', '.coverage')).resolve()
+
+
+def read_executed_lines(data_file):
+    """Read the executed lines of each measured file from coverage data.
+
+    Args:
+        data_file: The pathlib.Path of a coverage.py data file or of a JSON
+            report written by `coverage json`.
+
+    Returns: A dict mapping the paths of the measured files to lists of their
+        executed line numbers.
+    """
+    if data_file.suffix == '.json':
+        with data_file.open(mode='rt', encoding='utf-8') as handle:
+            report = json.load(handle)
+        return {path: data['executed_lines'] for path, data in report['files'].items()}
+
+    import coverage  # pylint: disable=import-outside-toplevel
+
+    data = coverage.CoverageData(basename=str(data_file))
+    data.read()
+    return {path: data.lines(path) or () for path in data.measured_files()}
+
+
+def reachable_lines(source, executed):
+    """Find the lines of a module whose statements were executed.
+
+    Python doesn't report the execution of each line of a statement which
+    spans several lines, so a line is considered executed if any line of its
+    statement was. For compound statements like `if` and `def` only the
+    header, e.g. the condition or the decorators and arguments, counts as the
+    statement.
+
+    Args:
+        source: The code of the module.
+        executed: The set of executed line numbers of the module.
+
+    Returns: A set of line numbers, or `None` if the module can't be parsed.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    reachable = set(executed)
+    for first, last in _statement_spans(tree):
+        span = range(first, last + 1)
+        if any(line in executed for line in span):
+            reachable.update(span)
+    return reachable
+
+
+def _statement_spans(tree):
+    "The `(first-line, last-line)` of each statement or its header."
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.stmt, ast.ExceptHandler)):
+            continue
+
+        first = min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', ())])
+        body = getattr(node, 'body', None)
+        if isinstance(body, list) and body:
+            last = max(first, body[0].lineno - 1)
+        else:
+            last = getattr(node, 'end_lineno', node.lineno)
+        yield first, last
+
+
+def intercept(work_db, config):
+    """Mark the pending work items whose code was never executed by the tests
+    as skipped or survived.
+    """
+    intercept_work_db(CoverageInterceptor(config, work_db.get_config()), work_db)
@@ -0,0 +1,137 @@
+"""An interceptor that skips mutants whose outcome is already known because
+they compile to the same bytecode as the original code or as another mutant.
+
+Each mutant is compiled and its code objects are hashed, ignoring line numbers
+and other details which don't affect behavior. A mutant with the same hash as
+the unmutated module is *equivalent*: no test can kill it. A mutant with the
+same hash as another mutant of the module is a *duplicate*: it will have the
+same outcome as that mutant. Both are marked as SKIPPED, and duplicates are
+recorded in the WorkDB with the job they duplicate. The "exec" command gives
+each duplicate the result of that job once it has been tested.
+
+Mutants which don't compile at all are recorded as INCOMPETENT, so they are
+never sent to a worker.
+"""
+import hashlib
+import logging
+import types
+
+import parso
+
+from cosmic_ray.interceptors import Interceptor, intercept_work_db
+from cosmic_ray.mutating import mutate_ast, splice
+from cosmic_ray.plugins import get_operator
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+log = logging.getLogger()
+
+
+class EquivalentMutantsInterceptor(Interceptor):
+    """Mark equivalent and duplicate mutants as SKIPPED, and mutants which
+    don't compile as INCOMPETENT.
+    """
+
+    def intercept(self, module_path, source, work_items, index):
+        python_version = self.session_config.python_version
+
+        try:
+            original = code_hash(source, module_path)
+        except (SyntaxError, ValueError):
+            log.warning('Unable to compile %s. Its mutants are not checked for equivalence.', module_path)
+            return
+
+        module_ast = None
+        # Maps the hashes of mutants to the job-ids of their first occurrence.
+        seen = {}
+        for item in work_items:
+            if item.splice is not None:
+                mutated_code = splice(source, *item.splice)
+            else:
+                # The module is only parsed if a mutant has no splice.
+                if module_ast is None:
+                    module_ast = parso.parse(source, version=python_version)
+                operator = get_operator(item.operator_name)(python_version)
+                _, mutated_code = mutate_ast(
+                    module_ast, operator, item.occurrence, item.start_pos, item.end_pos)
+                if mutated_code is None:
+                    continue
+
+            try:
+                digest = code_hash(mutated_code, module_path)
+            except (SyntaxError, ValueError) as exc:
+                log.info('incompetent mutant %s %s %s', item.job_id, item.operator_name, item.occurrence)
+                yield (item.job_id, WorkResult(
+                    output='{}: {}'.format(type(exc).__name__, exc),
+                    test_outcome=TestOutcome.INCOMPETENT,
+                    worker_outcome=WorkerOutcome.NORMAL))
+                continue
+
+            if digest == original:
+                log.info('equivalent mutant %s %s %s', item.job_id, item.operator_name, item.occurrence)
+                yield (item.job_id, WorkResult(
+                    output='Equivalent mutant: compiles to the same code as the original',
+                    worker_outcome=WorkerOutcome.SKIPPED))
+            elif digest in seen:
+                log.info('duplicate mutant %s of %s', item.job_id, seen[digest])
+                yield (item.job_id, WorkResult(
+                    output='Duplicate mutant: compiles to the same code as {}'.format(seen[digest]),
+                    worker_outcome=WorkerOutcome.SKIPPED), seen[digest])
+            else:
+                seen[digest] = item.job_id
+
+
+def intercept(work_db, config):
+    """Mark equivalent and duplicate mutants in `work_db` as SKIPPED, and
+    mutants which don't compile as INCOMPETENT.
+    """
+    intercept_work_db(EquivalentMutantsInterceptor(config, work_db.get_config()), work_db)
+
+
+def code_hash(source, filename='<unknown>'):
+    """Compile `source` and hash the resulting code objects.
+
+    Returns: A hex digest which is the same for any two sources that compile
+        to the same code, regardless of line numbers.
+
+    Raises:
+        SyntaxError: If `source` can not be compiled.
+        ValueError: If `source` contains null bytes.
+    """
+    code = compile(source, str(filename), 'exec', dont_inherit=True)
+    digest = hashlib.sha1()
+    _update_hash(digest, code)
+    return digest.hexdigest()
+
+
+def _update_hash(digest, code):
+    "Add the parts of `code` which affect its behavior to `digest`."
+    digest.update(code.co_code)
+    digest.update(repr((
+        code.co_name,
+        code.co_argcount,
+        code.co_kwonlyargcount,
+        code.co_flags,
+        code.co_names,
+        code.co_varnames,
+        code.co_freevars,
+        code.co_cellvars,
+    )).encode('utf-8'))
+    digest.update(getattr(code, 'co_exceptiontable', b''))
+
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_hash(digest, const)
+        else:
+            digest.update(_const_repr(const).encode('utf-8'))
+
+
+def _const_repr(const):
+    """A representation of a constant which distinguishes constants of
+    different types, e.g. `1`, `1.0` and `True`.
+    """
+    if isinstance(const, tuple):
+        return 'tuple({})'.format(', '.join(_const_repr(item) for item in const))
+    if isinstance(const, frozenset):
+        # The iteration order of frozensets can vary between processes.
+        return 'frozenset({})'.format(', '.join(sorted(_const_repr(item) for item in const)))
+    return '{}({!r})'.format(type(const).__name__, const)
@@ -4,21 +4,25 @@ import re
 import logging
 
 from cosmic_ray.config import ConfigDict
+from cosmic_ray.interceptors import Interceptor
 from cosmic_ray.work_db import WorkDB
 from cosmic_ray.work_item import WorkerOutcome, WorkResult
 
 log = logging.getLogger()
 
 
-def intercept(work_db: WorkDB, config: ConfigDict):
+class OperatorsFilterInterceptor(Interceptor):
     """Mark as skipped all work item with filtered operator
     """
 
-    exclude_operators = config.get('exclude-operators')
-    re_exclude_operators = re.compile('|'.join('(:?%s)' % e for e in exclude_operators))
+    def __init__(self, config, session_config):
+        super().__init__(config, session_config)
+        exclude_operators = config.get('exclude-operators')
+        self._re_exclude_operators = re.compile('|'.join('(:?%s)' % e for e in exclude_operators))
 
-    for item in work_db.pending_work_items:
-        if re_exclude_operators.match(item.operator_name):
+    def intercept(self, module_path, source, work_items, index):
+        for item in work_items:
+            if self._re_exclude_operators.match(item.operator_name):
                 log.info(
                     "operator skipping %s %s %s %s %s %s",
                     item.job_id,
@@ -29,10 +33,18 @@ def intercept(work_db: WorkDB, config: ConfigDict):
                     item.end_pos,
                 )
 
-                work_db.set_result(
-                    item.job_id,
-                    WorkResult(
-                        output="Filtered operator",
-                        worker_outcome=WorkerOutcome.SKIPPED,
-                    ),
-                )
+                yield (item.job_id,
+                       WorkResult(
+                           output="Filtered operator",
+                           worker_outcome=WorkerOutcome.SKIPPED,
+                       ))
+
+
+def intercept(work_db: WorkDB, config: ConfigDict):
+    """Mark as skipped all work item with filtered operator
+    """
+    # The decisions only depend on the operator names, so this needs nothing
+    # of the WorkDB but its pending work items.
+    interceptor = OperatorsFilterInterceptor(config, None)
+    for job_id, result in interceptor.intercept(None, '', work_db.pending_work_items, None):
+        work_db.set_result(job_id, result)
@@ -1,46 +1,137 @@
 """An interceptor that uses metadata: no mutate to determine when specific mutations
 should be skipped.
+
+A "# pragma: no mutate" comment skips the mutations which end on its line. On
+the line of a `def` or `class` statement it excludes the whole statement,
+including its body. The lines from a "# pragma: no mutate: start" comment to a
+"# pragma: no mutate: end" comment are excluded as well. The mutations of
+excluded regions are never added to the session.
 """
+import io
 import re
-from functools import lru_cache
 import logging
+import tokenize
 
+from cosmic_ray.interceptors import Interceptor, intercept_work_db
+from cosmic_ray.intervals import IntervalIndex
 from cosmic_ray.work_item import WorkerOutcome, WorkResult
 
 log = logging.getLogger()
 
+_RE_IS_MUTATE = re.compile(r'.*#.*pragma:.*no mutate.*')
+_RE_BLOCK_MARKER = re.compile(r'#.*pragma:.*no mutate:\s*(start|end)\b')
+
+_SCOPE_KEYWORDS = {'def', 'class'}
+
 
-def intercept(work_db):
+class PragmaNoMutateInterceptor(Interceptor):
     """Mark lines with "# pragma: no mutate" as SKIPPED
 
-    For all work_item in db, if the LAST line of the working zone is marked
+    For all work_item in a module, if the LAST line of the working zone is marked
      with "# pragma: no mutate", This work_item will be skipped.
     """
 
-    @lru_cache()
-    def file_contents(file_path):
-        "A simple cache of file contents."
-        with file_path.open(mode="rt") as handle:
-            return handle.readlines()
+    def excluded_regions(self, module_path, source, index):
+        try:
+            regions = excluded_regions(source)
+        except (tokenize.TokenError, SyntaxError) as exc:
+            log.warning('Unable to find the no-mutate blocks of %s: %s', module_path, exc)
+            return None
 
-    re_is_mutate = re.compile(r'.*#.*pragma:.*no mutate.*')
+        if not regions:
+            return None
+        return IntervalIndex(((start, 0), (end + 1, 0)) for start, end in regions)
 
-    for item in work_db.work_items:
-        lines = file_contents(item.module_path)
-        try:
-            # item.{start,end}_pos[0] seems to be 1-based.
-            line_number = item.end_pos[0] - 1
+    def intercept(self, module_path, source, work_items, index):
+        comments = index.comments
+        for item in work_items:
+            # item.{start,end}_pos[0] is 1-based.
+            line_number = item.end_pos[0]
             if item.end_pos[1] == 0:
                 # The working zone ends at begin of line,
                 # consider the previous line.
                 line_number -= 1
-            line = lines[line_number]
-            if re_is_mutate.match(line):
-                work_db.set_result(item.job_id,
-                                   WorkResult(output=None,
-                                              test_outcome=None,
-                                              diff=None,
-                                              worker_outcome=WorkerOutcome.SKIPPED))
-        except Exception as ex:
-            raise Exception("module_path: %s, start_pos: %s, end_pos: %s, len(lines): %s" %
-                            (item.module_path, item.start_pos, item.end_pos, len(lines))) from ex
+
+            comment = comments.get(line_number)
+            if comment is not None and _RE_IS_MUTATE.match(comment):
+                yield (item.job_id,
+                       WorkResult(output=None,
+                                  test_outcome=None,
+                                  diff=None,
+                                  worker_outcome=WorkerOutcome.SKIPPED))
+
+
+def excluded_regions(source):
+    """Find the regions of a module which are excluded by block and scope
+    pragmas.
+
+    Returns: A list of `(first-line, last-line)` tuples of one-based line
+        numbers.
+
+    Raises:
+        tokenize.TokenError, SyntaxError: If `source` can't be tokenized.
+    """
+    regions = []
+    # The lines of the start markers which haven't been ended yet.
+    starts = []
+    # The first lines and body depths of the excluded scopes we're in.
+    scopes = []
+    depth = 0
+    # The first line of the current logical line, and whether it starts a
+    # scope, or `None` while that depends on the token after an `async`.
+    statement = None
+    # The first line of an excluded scope whose body hasn't started yet.
+    excluded_scope = None
+    pending_scope = None
+    last_line = 0
+
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type == tokenize.COMMENT:
+            marker = _RE_BLOCK_MARKER.match(token.string)
+            if marker is not None:
+                if marker.group(1) == 'start':
+                    starts.append(token.start[0])
+                elif starts:
+                    regions.append((starts.pop(), token.start[0]))
+            elif statement is not None and statement[1] and _RE_IS_MUTATE.match(token.string):
+                excluded_scope = statement[0]
+        elif token.type == tokenize.NL:
+            pass
+        elif token.type == tokenize.NEWLINE:
+            last_line = token.start[0]
+            pending_scope, excluded_scope = excluded_scope, None
+            statement = None
+        elif token.type == tokenize.INDENT:
+            depth += 1
+            if pending_scope is not None:
+                scopes.append((pending_scope, depth))
+                pending_scope = None
+        else:
+            if pending_scope is not None:
+                # The body is on the line of the statement.
+                regions.append((pending_scope, last_line))
+                pending_scope = None
+
+            if token.type == tokenize.DEDENT:
+                depth -= 1
+                while scopes and scopes[-1][1] > depth:
+                    regions.append((scopes.pop()[0], last_line))
+            elif statement is None:
+                is_scope = None if token.string == 'async' else token.string in _SCOPE_KEYWORDS
+                statement = (token.start[0], is_scope)
+            elif statement[1] is None:
+                # Only `async def` starts a scope, not `async for` or `async with`.
+                statement = (statement[0], token.string == 'def')
+
+    # Unended start markers exclude the rest of the module.
+    regions.extend((start, last_line) for start in starts)
+    return regions
+
+
+def intercept(work_db, config=None):
+    """Mark lines with "# pragma: no mutate" as SKIPPED
+
+    For all pending work_item in db, if the LAST line of the working zone is
+    marked with "# pragma: no mutate", This work_item will be skipped.
+    """
+    intercept_work_db(PragmaNoMutateInterceptor(config, work_db.get_config()), work_db)
@@ -0,0 +1,153 @@
+"""An interceptor which excludes code matching structural patterns from
+mutation.
+
+Some code is rarely worth mutating: the imports under `if TYPE_CHECKING:`,
+`__repr__` and `__str__` methods, logging calls, `assert` statements and
+`raise NotImplementedError` stubs. This interceptor finds them in the parso
+tree of each module, which it shares with the "init" command, and the
+mutations inside them are never added to the session.
+
+The patterns are configured in the `[cosmic-ray.skip-patterns]` section of the
+config:
+
+    [cosmic-ray.skip-patterns]
+    type-checking = true
+    functions = ["__repr__", "__str__"]
+    calls = ["log.*", "logger.*", "logging.*", "*.log.*", "*.logger.*", "warnings.warn"]
+    assert = true
+    not-implemented = true
+
+`functions` and `calls` are lists of shell-style wildcards (see `fnmatch`),
+which are matched against the names of functions and the dotted names of the
+functions being called. Unset keys have the defaults shown above.
+"""
+import fnmatch
+import logging
+
+from cosmic_ray.ast import get_cached_ast, node_index
+from cosmic_ray.interceptors import Interceptor
+from cosmic_ray.intervals import IntervalIndex
+
+log = logging.getLogger()
+
+DEFAULT_FUNCTIONS = ('__repr__', '__str__')
+DEFAULT_CALLS = ('log.*', 'logger.*', 'logging.*', '*.log.*', '*.logger.*', 'warnings.warn')
+
+_TYPE_CHECKING_TESTS = {'TYPE_CHECKING', 'typing.TYPE_CHECKING'}
+
+
+class SkipPatternsInterceptor(Interceptor):
+    """Exclude the code which matches the configured structural patterns from
+    mutation.
+    """
+
+    def __init__(self, config, session_config):
+        super().__init__(config, session_config)
+        self._type_checking = config.get('type-checking', True)
+        self._functions = tuple(config.get('functions', DEFAULT_FUNCTIONS))
+        self._calls = tuple(config.get('calls', DEFAULT_CALLS))
+        self._assert = config.get('assert', True)
+        self._not_implemented = config.get('not-implemented', True)
+
+    def excluded_regions(self, module_path, source, index):
+        module_ast = get_cached_ast(module_path, self.session_config.python_version, source=source)
+        regions = list(self.find_regions(module_ast))
+        if not regions:
+            return None
+        return IntervalIndex(regions)
+
+    def intercept(self, module_path, source, work_items, index):
+        return ()
+
+    def find_regions(self, module_ast):
+        """Find the regions of a parse tree which match the patterns.
+
+        Returns: An iterable of `((line, col), (line, col))` regions.
+        """
+        index = node_index(module_ast)
+
+        if self._type_checking:
+            for node in index.nodes('if_stmt'):
+                if node.children[1].get_code().strip() in _TYPE_CHECKING_TESTS:
+                    # Only the `if` branch, not any `elif` or `else` branches.
+                    yield node.start_pos, node.children[3].end_pos
+
+        for node in index.nodes('funcdef'):
+            if _matches(node.name.value, self._functions) or (self._not_implemented and _is_stub(node)):
+                yield node.start_pos, node.end_pos
+
+        if self._calls:
+            for node in index.nodes('atom_expr'):
+                name = _callee_name(node)
+                if name is not None and _matches(name, self._calls):
+                    yield node.start_pos, node.end_pos
+
+        if self._assert:
+            for node in index.nodes('assert_stmt'):
+                yield node.start_pos, node.end_pos
+
+        if self._not_implemented:
+            for node in index.nodes('raise_stmt'):
+                if _raises_not_implemented(node):
+                    yield node.start_pos, node.end_pos
+
+
+def _matches(name, patterns):
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def _callee_name(node):
+    """The dotted name of the function called by an `atom_expr` node like
+    `logging.info(...)`, or `None` if it isn't a call of a dotted name.
+    """
+    *trailers, call = node.children[1:]
+    if call.type != 'trailer' or call.children[0].value != '(':
+        return None
+
+    names = [node.children[0]]
+    for trailer in trailers:
+        if trailer.type != 'trailer' or trailer.children[0].value != '.':
+            return None
+        names.append(trailer.children[1])
+
+    if any(name.type != 'name' for name in names):
+        return None
+    return '.'.join(name.value for name in names)
+
+
+def _raises_not_implemented(node):
+    "Whether a `raise_stmt` node raises `NotImplementedError`."
+    if len(node.children) < 2:
+        return False
+    exception = node.children[1]
+    if exception.type == 'atom_expr':
+        # NotImplementedError(...)
+        exception = exception.children[0]
+    return exception.type == 'name' and exception.value == 'NotImplementedError'
+
+
+def _is_stub(node):
+    """Whether a `funcdef` node is a stub which raises `NotImplementedError`,
+    i.e. its body only consists of docstrings, `pass` and the `raise`.
+    """
+    statements = list(_body_statements(node.children[-1]))
+    raises = [statement for statement in statements
+              if statement.type == 'raise_stmt' and _raises_not_implemented(statement)]
+    others = [statement for statement in statements
+              if statement not in raises and statement.type != 'string' and statement.get_code().strip() != 'pass']
+    return bool(raises) and not others
+
+
+def _body_statements(suite):
+    "The small statements of the body of a compound statement."
+    simple_statements = suite.children if suite.type == 'suite' else [suite]
+    for simple_statement in simple_statements:
+        if simple_statement.type == 'newline':
+            continue
+        if simple_statement.type != 'simple_stmt':
+            # A compound statement.
+            yield simple_statement
+            continue
+        for statement in simple_statement.children:
+            if statement.type not in ('newline', 'operator'):
+                yield statement
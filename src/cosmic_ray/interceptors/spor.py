@@ -1,47 +1,48 @@
 """An interceptor that uses spor metadata to determine when specific mutations
 should be skipped.
 """
-from functools import lru_cache
+from collections import defaultdict
 import logging
 
 from spor.repository import open_repository
 
+from cosmic_ray.interceptors import Interceptor
+from cosmic_ray.intervals import IntervalIndex
+from cosmic_ray.source_index import source_index
 from cosmic_ray.work_item import WorkerOutcome, WorkResult
 
 log = logging.getLogger()
 
 
-def intercept(work_db, config):
-    """Look for WorkItems in `work_db` that should not be mutated due to spor metadata.
+class SporInterceptor(Interceptor):
+    """Look for WorkItems that should not be mutated due to spor metadata.
 
     For each WorkItem, find anchors for the item's file/line/columns. If an
-    anchor exists with metadata containing `{mutate: False}` then the WorkItem
-    is marked as SKIPPED.
-    """
-
-    @lru_cache()
-    def file_contents(file_path):
-        "A simple cache of file contents."
-        with file_path.open(mode="rt") as handle:
-            return handle.readlines()
+    anchor exists with metadata containing `{mutate: False}` and the WorkItem
+    is *completely* inside the anchor's topic, then the WorkItem is marked as
+    SKIPPED. A WorkItem which merely starts inside an anchor, or which starts
+    after it, is not skipped.
 
-    for item in work_db.pending_work_items:
-        try:
-            repo = open_repository(item.module_path)
-        except ValueError:
-            log.info("No spor repository for %s", item.module_path)
-            continue
-
-        for _, anchor in repo.items():
-            if anchor.file_path != item.module_path.absolute():
-                continue
-
-            metadata = anchor.metadata
+    Each spor repository is opened and read once, and its anchors are indexed
+    by file.
+    """
 
-            lines = file_contents(item.module_path)
-            if _item_in_context(
-                    lines, item,
-                    anchor.context) and not metadata.get("mutate", True):
+    def __init__(self, config, session_config):
+        super().__init__(config, session_config)
+        # Maps the directories of the modules seen so far to the roots of
+        # their repositories, or to `None` if they have none.
+        self._repo_roots = {}
+        # Maps the roots of the repositories read so far to the indices of
+        # their anchors by file path.
+        self._repo_anchors = {}
+
+    def intercept(self, module_path, source, work_items, index):
+        anchors = self._anchors(module_path)
+        if anchors is None:
+            return
+
+        for item in work_items:
+            if anchors.contains(*_item_interval(index, item)):
                 log.info(
                     "spor skipping %s %s %s %s %s %s",
                     item.job_id,
@@ -52,54 +53,82 @@ def intercept(work_db, config):
                     item.end_pos,
                 )
 
-                work_db.set_result(
-                    item.job_id,
-                    WorkResult(
-                        output="Filtered by spor",
-                        test_outcome=None,
-                        diff=None,
-                        worker_outcome=WorkerOutcome.SKIPPED,
-                    ),
-                )
-
-
-def _line_and_col_to_offset(lines, line, col):
-    """Figure out the offset into a file for a particular line and col.
+                yield (item.job_id,
+                       WorkResult(
+                           output="Filtered by spor",
+                           test_outcome=None,
+                           diff=None,
+                           worker_outcome=WorkerOutcome.SKIPPED,
+                       ))
+
+    def _anchors(self, module_path):
+        """The `_AnchorIndex` of the anchors with `{mutate: False}` in a module,
+        or `None` if there are none.
+        """
+        directory = module_path.absolute().parent
+        if directory not in self._repo_roots:
+            try:
+                repo = open_repository(directory)
+            except ValueError:
+                repo = None
+            else:
+                self._read_anchors(repo)
+            self._repo_roots[directory] = None if repo is None else repo.root
+
+        root = self._repo_roots[directory]
+        if root is None:
+            log.info("No spor repository for %s", module_path)
+            return None
+
+        return self._repo_anchors[root].get(module_path.absolute())
+
+    def _read_anchors(self, repo):
+        "Index the anchors with `{mutate: False}` of a repository, unless it has been read already."
+        if repo.root in self._repo_anchors:
+            return
+
+        contexts = defaultdict(list)
+        for _, anchor in repo.items():
+            if not anchor.metadata.get("mutate", True):
+                contexts[anchor.file_path].append(anchor.context)
+        self._repo_anchors[repo.root] = {
+            file_path: _AnchorIndex(file_contexts)
+            for file_path, file_contexts in contexts.items()
+        }
 
-    This can return offsets that don't actually exist in the file. If you
-    specify a line that exists and a col that is past the end of that line, this
-    will return a "fake" offset. This is to account for the fact that a
-    WorkItem's end_pos is one-past the end of a mutation, and hence potentially
-    one-past the end of a file.
 
-    Args:
-        lines: A sequence of the lines in a file.
-        line: A one-based index indicating the line in the file.
-        col: A zero-based index indicating the column on `line`.
+def intercept(work_db, config):
+    """Look for WorkItems in `work_db` that should not be mutated due to spor metadata.
 
-    Raises: ValueError: If the specified line found in the file.
+    For each WorkItem, find anchors for the item's file/line/columns. If an
+    anchor exists with metadata containing `{mutate: False}` then the WorkItem
+    is marked as SKIPPED.
     """
+    items_by_module = defaultdict(list)
+    for item in work_db.pending_work_items:
+        items_by_module[item.module_path].append(item)
 
-    offset = 0
-    for index, contents in enumerate(lines, 1):
-        if index == line:
-            return offset + col
+    interceptor = SporInterceptor(config, None)
+    for module_path, items in items_by_module.items():
+        with module_path.open(mode="rt", encoding="utf-8") as handle:
+            source = handle.read()
+        for job_id, result in interceptor.intercept(module_path, source, items, source_index(source)):
+            work_db.set_result(job_id, result)
 
-        offset += len(contents)
 
-    raise ValueError("Offset {}:{} not found".format(line, col))
+class _AnchorIndex(IntervalIndex):
+    """The regions of a file covered by anchors.
 
+    Args:
+        contexts: The `spor.anchor.Context`s of the anchors.
+    """
 
-def _item_in_context(lines, item, context):
-    """Determines if a WorkItem falls within an anchor.
+    def __init__(self, contexts):
+        super().__init__((context.offset, context.offset + len(context.topic))
+                         for context in contexts)
 
-    This only returns True if a WorkItems start-/stop-pos range is *completely*
-    within an anchor, not just if it overalaps.
-    """
-    start_offset = _line_and_col_to_offset(lines, item.start_pos[0],
-                                           item.start_pos[1])
-    stop_offset = _line_and_col_to_offset(lines, item.end_pos[0],
-                                          item.end_pos[1])
-    width = stop_offset - start_offset
 
-    return start_offset >= context.offset and width <= len(context.topic)
+def _item_interval(index, item):
+    "The start and stop offsets of a WorkItem, given the `SourceIndex` of its file."
+    return (index.offset(*item.start_pos),
+            index.offset(*item.end_pos))
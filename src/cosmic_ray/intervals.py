@@ -0,0 +1,30 @@
+"Support for checking if regions of a file are inside any of a set of intervals."
+
+import bisect
+import itertools
+
+
+class IntervalIndex:
+    """A set of intervals, indexed so that it takes `O(log(intervals))` to
+    check if a region is inside any of them.
+
+    The bounds can be any comparable values, e.g. offsets or `(line, column)`
+    positions.
+
+    Args:
+        intervals: An iterable of `(start, stop)` tuples.
+    """
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self._starts = [start for start, _ in intervals]
+        # The largest stop of the intervals up to each one.
+        self._max_stops = list(itertools.accumulate((stop for _, stop in intervals), max))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def contains(self, start, stop):
+        "Whether the region from `start` to `stop` is completely within an interval."
+        index = bisect.bisect_right(self._starts, start)
+        return index > 0 and self._max_stops[index - 1] >= stop
@@ -29,6 +29,16 @@ def filter_paths(paths, excluded_paths):
 
     Returns: An iterable of paths Python modules (i.e. *py files).
     """
-    excluded = set(Path(f) for excluded_path in excluded_paths
-                   for f in glob.glob(excluded_path, recursive=True))
-    return set(paths) - excluded
+    return set(paths) - glob_paths(excluded_paths)
+
+
+def glob_paths(patterns):
+    """Find the paths matching any of a list of globs.
+
+    Args:
+        patterns: List of globs, in `glob.glob` syntax.
+
+    Returns: A set of pathlib.Paths.
+    """
+    return set(Path(f) for pattern in patterns
+               for f in glob.glob(pattern, recursive=True))
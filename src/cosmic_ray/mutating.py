@@ -1,8 +1,18 @@
 """Support for making mutations to source code.
 """
+from collections import OrderedDict
 from contextlib import contextmanager
+import copy
+import difflib
+import logging
+import re
 
-from cosmic_ray.ast import get_ast, Visitor
+from cosmic_ray.ast import get_cached_ast, node_index, operator_sites, Visitor
+from cosmic_ray.plugins import get_operator
+from cosmic_ray.source_index import source_digest
+from cosmic_ray.work_item import WorkerOutcome, WorkResult
+
+log = logging.getLogger(__name__)
 
 
 @contextmanager
@@ -30,6 +40,30 @@ def use_mutation(module_path, operator, occurrence):
             handle.flush()
 
 
+@contextmanager
+def use_mutated_code(module_path, original_code, mutated_code):
+    """A context manager that writes already-mutated code to a file for the
+    duration of a with-block.
+
+    After the with-block `original_code` is written back to the file.
+
+    Args:
+        module_path: The path to the module to mutate.
+        original_code: The unmutated code of the module.
+        mutated_code: The mutated code of the module.
+    """
+    with module_path.open(mode='wt', encoding='utf-8') as handle:
+        handle.write(mutated_code)
+        handle.flush()
+
+    try:
+        yield
+    finally:
+        with module_path.open(mode='wt', encoding='utf-8') as handle:
+            handle.write(original_code)
+            handle.flush()
+
+
 def apply_mutation(module_path, operator, occurrence):
     """Apply a specific mutation to a file on disk.
 
@@ -41,31 +75,410 @@ def apply_mutation(module_path, operator, occurrence):
     Returns: A `(unmutated-code, mutated-code)` tuple to the with-block. If there was
         no mutation performed, the `mutated-code` is `None`.
     """
-    module_ast = get_ast(module_path, python_version=operator.python_version)
+    module_ast = get_cached_ast(module_path, python_version=operator.python_version)
+    original_code, mutated_code = mutate_ast(module_ast, operator, occurrence)
+
+    if mutated_code is not None:
+        with module_path.open(mode='wt', encoding='utf-8') as handle:
+            handle.write(mutated_code)
+            handle.flush()
+
+    return original_code, mutated_code
+
+
+def mutate_ast(module_ast, operator, occurrence, start_pos=None, end_pos=None):
+    """Apply a specific mutation to a parse tree in memory.
+
+    `module_ast` is unchanged afterwards, so it can be used for any number of
+    mutations.
+
+    If the position of the mutation is given, the node to mutate is looked up
+    by its position rather than by walking the entire tree. The occurrences
+    are only counted if the operator makes several mutations at the position.
+    If there's no such mutation at the position, e.g. because the work item
+    was made for different code, no mutation is performed.
+
+    Args:
+        module_ast: The parso parse tree of the module to mutate.
+        operator: The `operator` instance to use.
+        occurrence: The occurrence of the operator to apply.
+        start_pos: The optional `(line, column)` start of the mutation.
+        end_pos: The optional `(line, column)` end of the mutation.
+
+    Returns: A `(unmutated-code, mutated-code)` tuple. If there was no mutation
+        performed, the `mutated-code` is `None`.
+    """
     original_code = module_ast.get_code()
+
+    if start_pos is not None and end_pos is not None:
+        target = _find_target(module_ast, operator, occurrence, tuple(start_pos), tuple(end_pos))
+        if target is None:
+            log.warning('Occurrence %s of %s is not at %s-%s',
+                        occurrence, type(operator).__name__, tuple(start_pos), tuple(end_pos))
+            return original_code, None
+        return original_code, _mutate_node(module_ast, operator, *target)
+
     visitor = MutationVisitor(occurrence, operator)
     mutated_ast = visitor.walk(module_ast)
 
     mutated_code = None
     if visitor.mutation_applied:
         mutated_code = mutated_ast.get_code()
-        with module_path.open(mode='wt', encoding='utf-8') as handle:
-            handle.write(mutated_code)
-            handle.flush()
+        visitor.undo()
 
     return original_code, mutated_code
 
 
+def iter_mutants(module_path, operator_names, python_version):
+    """Generate all of the mutants of a module.
+
+    The module is parsed once, and each mutant is made by splicing the text of
+    the module (see `mutation_splice`). Nothing is written to disk.
+
+    Args:
+        module_path: The path to the module to mutate.
+        operator_names: The names of the operator plugins to use.
+        python_version: The version of Python to use when parsing the module.
+
+    Yields: `((operator-name, occurrence), mutated-code)` tuples. The keys are
+        the same as the operator names and occurrences of the `WorkItem`s made
+        by `init` for the module.
+    """
+    module_ast = get_cached_ast(module_path, python_version=python_version)
+    code = module_ast.get_code()
+    offsets = line_offsets(code)
+
+    for operator_name in operator_names:
+        operator = get_operator(operator_name)(python_version)
+        for occurrence, (node, index) in enumerate(_occurrences(operator, module_ast)):
+            mutated_code = splice(code, *mutation_splice(node, operator, index, offsets))
+            yield (operator_name, occurrence), mutated_code
+
+
+# For each recently used tree and operator, the `(node, index)` of every
+# occurrence of the operator.
+_OCCURRENCES = OrderedDict()
+_OCCURRENCES_SIZE = 64
+
+
+def _find_target(module_ast, operator, occurrence, start_pos, end_pos):
+    """Find the node to mutate from the position of the mutation.
+
+    Only the leaf at `start_pos` and its ancestors are considered, so this is
+    O(depth). If more than one of their mutations is at the position, as with
+    the several mutations NumberReplacer makes of a number, the occurrences of
+    the operator in the tree are counted once and remembered, and the
+    `occurrence`-th one must be among them.
+
+    Returns: A `(node, index)` tuple, or `None` if there's no such mutation at
+        the position.
+    """
+    try:
+        leaf = module_ast.get_leaf_for_position(start_pos)
+    except ValueError:
+        return None
+
+    leaves = [leaf]
+    if leaf is not None and leaf.end_pos == start_pos:
+        # Positions at the end of a leaf are also at the start of the next one.
+        leaves.append(leaf.get_next_leaf())
+
+    matches = []
+    seen = set()
+    for node in leaves:
+        while node is not None and id(node) not in seen:
+            seen.add(id(node))
+            matches.extend(
+                (node, index)
+                for index, position in enumerate(operator.mutation_positions(node))
+                if position == (start_pos, end_pos))
+            node = node.parent
+
+    if len(matches) < 2:
+        return matches[0] if matches else None
+
+    key = (id(module_ast), type(operator))
+    cached = _OCCURRENCES.get(key)
+    if cached is None or cached[0] is not module_ast:
+        cached = (module_ast, _occurrences(operator, module_ast))
+        _OCCURRENCES[key] = cached
+        while len(_OCCURRENCES) > _OCCURRENCES_SIZE:
+            _OCCURRENCES.popitem(last=False)
+    _OCCURRENCES.move_to_end(key)
+
+    occurrences = cached[1]
+    if 0 <= occurrence < len(occurrences) and occurrences[occurrence] in matches:
+        return occurrences[occurrence]
+    return None
+
+
+def _mutate_node(module_ast, operator, node, index):
+    """Render the code of `module_ast` with `node` mutated.
+
+    The mutation is applied to a copy of `node` which is swapped into the
+    tree only while the code is rendered.
+
+    Returns: The mutated code.
+    """
+    mutant = operator.mutate(_copy_tree(node), index)
+    if node.parent is None:
+        return '' if mutant is None else mutant.get_code()
+
+    children = node.parent.children
+    position = next(idx for idx, child in enumerate(children) if child is node)
+    if mutant is None:
+        del children[position]
+    else:
+        children[position] = mutant
+    try:
+        return module_ast.get_code()
+    finally:
+        if mutant is None:
+            children.insert(position, node)
+        else:
+            children[position] = node
+
+
+def line_offsets(code):
+    """Find the offsets in `code` of the start of each line.
+
+    Lines are counted the way parso counts them, so `line_offsets(code)[line -
+    1] + column` is the offset of the parso position `(line, column)`.
+    """
+    from parso.utils import split_lines  # pylint: disable=import-outside-toplevel
+
+    offsets = []
+    offset = 0
+    for line in split_lines(code, keepends=True):
+        offsets.append(offset)
+        offset += len(line)
+
+    # parso doesn't count a byte order mark in the columns of the first line.
+    if code.startswith('\ufeff'):
+        offsets[0] = 1
+
+    return offsets
+
+
+def mutation_splice(node, operator, index, offsets):
+    """Describe a mutation as a change to the text of a module.
+
+    Args:
+        node: The node to mutate.
+        operator: The `operator` instance to use.
+        index: The index of the mutation among the mutations `operator` makes
+            to `node`.
+        offsets: The `line_offsets` of the code of the module.
+
+    Returns: A `(start-offset, end-offset, replacement)` tuple. The mutated
+        code is the code of the module with the characters from `start-offset`
+        up to `end-offset` replaced by `replacement`.
+    """
+    def _offset(position):
+        line, column = position
+        return offsets[line - 1] + column
+
+    start = _offset(node.get_start_pos_of_prefix())
+    end = _offset(node.end_pos)
+    mutant = operator.mutate(_copy_tree(node), index)
+    replacement = '' if mutant is None else mutant.get_code()
+    return minimal_splice(node.get_code(), start, end, replacement)
+
+
+def minimal_splice(original, start_offset, end_offset, replacement):
+    """Shrink a splice to the part of the text which actually changes.
+
+    Args:
+        original: The text from `start_offset` up to `end_offset`.
+        start_offset: The offset of the start of the replaced text.
+        end_offset: The offset of the end of the replaced text.
+        replacement: The text which replaces it.
+
+    Returns: A `(start-offset, end-offset, replacement)` tuple.
+    """
+    prefix = 0
+    limit = min(len(original), len(replacement))
+    while prefix < limit and original[prefix] == replacement[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and original[-suffix - 1] == replacement[-suffix - 1]:
+        suffix += 1
+
+    return start_offset + prefix, end_offset - suffix, replacement[prefix:len(replacement) - suffix]
+
+
+def splice(code, start_offset, end_offset, replacement):
+    """Apply a mutation described by `mutation_splice` to `code`.
+
+    Returns: The mutated code.
+    """
+    return code[:start_offset] + replacement + code[end_offset:]
+
+
+def compile_error(code, module_path):
+    """Check whether `code` compiles.
+
+    Args:
+        code: The source code to check.
+        module_path: The path of the module the code is for. This is used in
+            error messages.
+
+    Returns: A description of the error if `code` doesn't compile, otherwise
+        `None`.
+    """
+    try:
+        compile(code, str(module_path), 'exec', dont_inherit=True)
+    except (SyntaxError, ValueError) as exc:
+        return '{}: {}'.format(type(exc).__name__, exc)
+    return None
+
+
+def make_diff(original_code, mutated_code, module_path):
+    """Make a unified diff of a mutation.
+
+    Returns: The diff as a string.
+    """
+    module_diff = ["--- mutation diff ---"]
+    for line in difflib.unified_diff(
+            original_code.split('\n'),
+            mutated_code.split('\n'),
+            fromfile="a" + str(module_path),
+            tofile="b" + str(module_path),
+            lineterm=""):
+        module_diff.append(line)
+    return '\n'.join(module_diff)
+
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)((?:,\d+)?) \+(\d+)((?:,\d+)?) @@$')
+
+
+def splice_diff(code, start_offset, end_offset, replacement, module_path, context=3):
+    """Make a unified diff of a mutation described by a splice.
+
+    Only the lines around the splice are compared, so this is much cheaper
+    than `make_diff` for large modules. The format is the same as for
+    `make_diff`.
+
+    Args:
+        code: The unmutated code of the module.
+        start_offset: The offset of the start of the text replaced by the mutation.
+        end_offset: The offset of the end of the text replaced by the mutation.
+        replacement: The text which replaces it.
+        module_path: The path of the module.
+        context: The number of lines of context around the mutation.
+
+    Returns: The diff as a string.
+    """
+    # The lines changed by the splice, plus the context lines around them.
+    window_start = code.rfind('\n', 0, start_offset) + 1
+    window_end = code.find('\n', end_offset)
+    window_end = len(code) if window_end == -1 else window_end
+    for _ in range(context):
+        if window_start > 0:
+            window_start = code.rfind('\n', 0, window_start - 1) + 1
+        if window_end < len(code):
+            window_end = code.find('\n', window_end + 1)
+            window_end = len(code) if window_end == -1 else window_end
+
+    lines_before = code.count('\n', 0, window_start)
+    module_diff = ["--- mutation diff ---"]
+    for line in difflib.unified_diff(
+            code[window_start:window_end].split('\n'),
+            (code[window_start:start_offset] + replacement + code[end_offset:window_end]).split('\n'),
+            fromfile="a" + str(module_path),
+            tofile="b" + str(module_path),
+            n=context,
+            lineterm=""):
+        match = _HUNK_HEADER.match(line)
+        if match is not None:
+            line = '@@ -{}{} +{}{} @@'.format(
+                int(match.group(1)) + lines_before, match.group(2),
+                int(match.group(3)) + lines_before, match.group(4))
+        module_diff.append(line)
+    return '\n'.join(module_diff)
+
+
+def result_diff(work_item, result, sources=None, source_digests=None):
+    """Get the diff of the mutant of a work item.
+
+    Workers don't make diffs for mutants with splices if lazy diffs are
+    enabled. Their diffs are rendered here, from the current code of the
+    module.
+
+    Args:
+        work_item: A `WorkItem`.
+        result: The `WorkResult` of `work_item`.
+        sources: An optional dict in which the code of modules is cached.
+        source_digests: An optional dict mapping module paths (as strings) to
+            the digests of their code when the session was initialized (see
+            `WorkDB.source_digests`). Diffs aren't rendered for modules which
+            have changed since.
+
+    Returns: The diff as a string, or `None` if there is no diff.
+    """
+    if result.diff is not None or work_item.splice is None or \
+            result.worker_outcome != WorkerOutcome.NORMAL:
+        return result.diff
+
+    if sources is None:
+        sources = {}
+    module_path = work_item.module_path
+    if module_path not in sources:
+        sources[module_path] = _read_source(module_path, source_digests)
+    if sources[module_path] is None:
+        return None
+
+    return splice_diff(sources[module_path], *work_item.splice, module_path)
+
+
+def _read_source(module_path, source_digests):
+    "Read the code of a module, or `None` if it's missing or has changed."
+    try:
+        with module_path.open(mode='rt', encoding='utf-8') as handle:
+            source = handle.read()
+    except OSError:
+        return None
+
+    digest = (source_digests or {}).get(str(module_path))
+    if digest is not None and digest != source_digest(source):
+        log.warning('%s has changed since the session was initialized. Its diffs are not shown.', module_path)
+        return None
+    return source
+
+
+def render_diffs(completed_work_items, source_digests=None):
+    """Fill in the diffs which workers left out of results because lazy diffs
+    are enabled.
+
+    Args:
+        completed_work_items: An iterable of `(WorkItem, WorkResult)` tuples.
+        source_digests: The optional digests of the code of the modules, as
+            for `result_diff`.
+
+    Returns: An iterable of `(WorkItem, WorkResult)` tuples, with the diffs
+        of the results rendered by `result_diff`.
+    """
+    sources = {}
+    for work_item, result in completed_work_items:
+        diff = result_diff(work_item, result, sources, source_digests)
+        if diff is not result.diff:
+            result = WorkResult(
+                worker_outcome=result.worker_outcome,
+                output=result.output,
+                test_outcome=result.test_outcome,
+                diff=diff)
+        yield work_item, result
+
+
 class MutationVisitor(Visitor):
     """Visitor that mutates a module with the specific occurrence of an operator.
 
-    This will perform at most one mutation in a walk of an AST. If this performs
-    a mutation as part of the walk, it will store the mutated node in the
-    `mutant` attribute. If the walk does not result in any mutation, `mutant`
-    will be `None`.
-
-    Note that `mutant` is just the specifically mutated node. It will generally
-    be a part of the larger AST which is returned from `walk()`.
+    This will perform at most one mutation in a walk of an AST. The operator is
+    applied to a copy of the node being mutated, and the copy takes the node's
+    place in the tree returned by `walk()`. The original node is left
+    untouched, so `undo()` can put it back, restoring the tree without having
+    to parse the module again.
     """
 
     def __init__(self, occurrence, operator):
@@ -73,17 +486,89 @@ class MutationVisitor(Visitor):
         self._occurrence = occurrence
         self._count = 0
         self._mutation_applied = False
+        self._undo = None
 
     @property
     def mutation_applied(self):
         "Whether this visitor has applied a mutation."
         return self._mutation_applied
 
+    def walk(self, node):
+        """Walk a parse tree, mutating the occurrence of the operator.
+
+        If the operator implements `find_sites`, only the nodes it finds are
+        visited.
+        """
+        sites = self.operator.find_sites(node)
+        if sites is None:
+            return super().walk(node)
+
+        for site in node_index(node).sorted(sites):
+            mutant = self.visit(site)
+            if self._mutation_applied:
+                if site is node:
+                    return mutant
+                _, position, deleted = self._undo
+                if deleted:
+                    del site.parent.children[position]
+                else:
+                    site.parent.children[position] = mutant
+                break
+
+        return node
+
     def visit(self, node):
         for index, _ in enumerate(self.operator.mutation_positions(node)):
             if self._count == self._occurrence:
                 self._mutation_applied = True
-                node = self.operator.mutate(node, index)
+                original = node
+                node = self.operator.mutate(_copy_tree(node), index)
+                if original.parent is not None:
+                    position = next(
+                        idx for idx, child in enumerate(original.parent.children) if child is original)
+                    self._undo = (original, position, node is None)
             self._count += 1
 
         return node
+
+    def undo(self):
+        """Put the node replaced by the mutation back in the tree.
+
+        This must be called after `walk()`. It does nothing if there was no
+        mutation or if the root of the tree was mutated.
+        """
+        if self._undo is None:
+            return
+
+        original, position, deleted = self._undo
+        if deleted:
+            # The walk removed the deleted node from its parent's children.
+            original.parent.children.insert(position, original)
+        else:
+            original.parent.children[position] = original
+        self._undo = None
+
+
+def _occurrences(operator, module_ast):
+    "The `(node, index)` of every occurrence of an operator in a tree."
+    return [(node, index)
+            for node in operator_sites(operator, module_ast)
+            for index, _ in enumerate(operator.mutation_positions(node))]
+
+
+def _copy_tree(node):
+    """Copy a parse tree.
+
+    The copy of `node` has the same parent as `node`, but it is not one of the
+    parent's children.
+    """
+    import parso.tree  # pylint: disable=import-outside-toplevel
+
+    def _copy(node, parent):
+        clone = copy.copy(node)
+        clone.parent = parent
+        if isinstance(node, parso.tree.BaseNode):
+            clone.children = [_copy(child, clone) for child in node.children]
+        return clone
+
+    return _copy(node, node.parent)
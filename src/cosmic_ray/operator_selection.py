@@ -0,0 +1,146 @@
+"""Selection of the mutation operators which `init` applies to each module.
+
+By default every available operator is applied to every module. Studies of
+*selective mutation* have found that a small subset of the operators yields
+almost the same mutation score as the full set, with a fraction of the
+mutants. The operators are selected like this::
+
+    [cosmic-ray.operators]
+    preset = "selective"
+    include = ["core/ExceptionReplacer"]
+    exclude = ["core/ReplaceComparisonOperator_Is.*"]
+
+The `preset` is one of `PRESETS`. `include` and `exclude` are lists of regular
+expressions, like `exclude-operators` of the `operators-filter` interceptor,
+which add operators to and remove them from the preset. If `include` is given
+without a `preset`, only the included operators are used.
+
+Different modules can use different operators:
+
+    [[cosmic-ray.operators.scopes]]
+    paths = ["pkg/legacy/**/*.py"]
+    preset = "minimal"
+
+The first scope whose `paths` globs match a module applies to it. Its
+`preset`, `include` and `exclude` replace those of the `[cosmic-ray.operators]`
+section, and any of them which it leaves out are taken from that section.
+
+Unlike the `operators-filter` interceptor, this is applied before the work
+items are created, so operators which aren't selected aren't even run.
+"""
+
+import re
+
+from cosmic_ray.config import ConfigValueError
+from cosmic_ray.modules import glob_paths
+
+_ARITHMETIC = '(Add|Sub|Mul|Div|FloorDiv|Mod|Pow)'
+_BITWISE = '(BitAnd|BitOr|BitXor)'
+_SHIFT = '(LShift|RShift)'
+
+# The presets, as regular expressions which must match the entire name of an
+# operator. `None` selects every operator.
+PRESETS = {
+    'full': None,
+
+    # The classic sufficient set: arithmetic, logical and relational
+    # operators are only replaced by operators of the same kind, plus unary
+    # operator insertion and deletion and constant replacement.
+    'selective': (
+        r'core/ReplaceBinaryOperator_{0}_{0}'.format(_ARITHMETIC),
+        r'core/ReplaceBinaryOperator_{0}_{0}'.format(_BITWISE),
+        r'core/ReplaceBinaryOperator_{0}_{0}'.format(_SHIFT),
+        r'core/ReplaceComparisonOperator_.*',
+        r'core/ReplaceAndWithOr',
+        r'core/ReplaceOrWithAnd',
+        r'core/ReplaceUnaryOperator_.*',
+        r'core/AddNot',
+        r'core/NumberReplacer',
+        r'core/ReplaceTrueWithFalse',
+        r'core/ReplaceFalseWithTrue',
+        r'core/ReplaceBreakWithContinue',
+        r'core/ReplaceContinueWithBreak',
+        r'core/ZeroIterationForLoop',
+    ),
+
+    # One mutant per operator: the closest arithmetic operator, boundary
+    # shifts and negations of comparisons, swapped logical operators and
+    # deleted unary operators.
+    'minimal': (
+        r'core/ReplaceBinaryOperator_(Add_Sub|Sub_Add|Mul_Div|Div_Mul|FloorDiv_Div|Mod_FloorDiv|Pow_Mul)',
+        r'core/ReplaceComparisonOperator_(Lt_LtE|LtE_Lt|Gt_GtE|GtE_Gt|Eq_NotEq|NotEq_Eq|Is_IsNot|IsNot_Is)',
+        r'core/ReplaceAndWithOr',
+        r'core/ReplaceOrWithAnd',
+        r'core/ReplaceUnaryOperator_Delete_.*',
+        r'core/AddNot',
+        r'core/ZeroIterationForLoop',
+    ),
+}
+
+
+class OperatorSelection:
+    """The operators selected for the modules of a session.
+
+    Args:
+        config: The `[cosmic-ray.operators]` section of the config.
+        operator_names: The names of all available operators.
+
+    Raises:
+        ConfigValueError: If a preset or a regular expression is invalid.
+    """
+
+    def __init__(self, config, operator_names):
+        self._operator_names = tuple(operator_names)
+        self._default = self._select(config)
+        self._scopes = []
+        for scope in config.get('scopes', ()):
+            settings = dict(config)
+            settings.update(scope)
+            self._scopes.append((glob_paths(scope.get('paths', ())), self._select(settings)))
+
+    def operators_for(self, module_path):
+        """The names of the operators to apply to the module at `module_path`,
+        in the order of `operator_names`.
+        """
+        for paths, selected in self._scopes:
+            if module_path in paths:
+                return selected
+        return self._default
+
+    def _select(self, settings):
+        include = _compile(settings.get('include', ()))
+        exclude = _compile(settings.get('exclude', ()))
+        in_preset = _preset(settings.get('preset', 'full' if include is None else None))
+
+        def selected(name):
+            if exclude is not None and exclude.match(name):
+                return False
+            return in_preset(name) or (include is not None and include.match(name) is not None)
+
+        return tuple(name for name in self._operator_names if selected(name))
+
+
+def _preset(name):
+    "A predicate for the names of the operators in a preset."
+    if name is None:
+        return lambda operator_name: False
+
+    try:
+        patterns = PRESETS[name]
+    except KeyError:
+        raise ConfigValueError('Unknown operator preset: {}'.format(name))
+
+    if patterns is None:
+        return lambda operator_name: True
+    regex = re.compile('|'.join('(?:{})'.format(pattern) for pattern in patterns))
+    return lambda operator_name: regex.fullmatch(operator_name) is not None
+
+
+def _compile(patterns):
+    "Combine regular expressions into one, or `None` if there are none."
+    if not patterns:
+        return None
+    try:
+        return re.compile('|'.join('(?:{})'.format(pattern) for pattern in patterns))
+    except re.error as exc:
+        raise ConfigValueError('Invalid operator pattern: {}'.format(exc)) from exc
@@ -1,12 +1,16 @@
 """Implementation of the binary-operator-replacement operator.
 """
 
+import ast
 from enum import Enum
+import functools
 import itertools
+import tokenize
 
 import parso
 
-from .operator import Operator
+from ..ast import node_index
+from .operator import Operator, OperatorFamily
 from .util import extend_name
 
 
@@ -26,12 +30,16 @@ class BinaryOperators(Enum):
     BitXor = '^'
 
 
+@functools.lru_cache(maxsize=None)
 def _create_replace_binary_operator(from_op, to_op):
     @extend_name('_{}_{}'.format(from_op.name, to_op.name))
     class ReplaceBinaryOperator(Operator):
         "An operator that replaces binary {} with binary {}.".format(
             from_op.name, to_op.name)
 
+        def find_sites(self, module_tree):
+            return node_index(module_tree).nodes('operator')
+
         def mutation_positions(self, node):
             if _is_binary_operator(node):
                 if node.value == from_op.value:
@@ -44,6 +52,13 @@ def _create_replace_binary_operator(from_op, to_op):
             node.value = to_op.value
             return node
 
+        def token_mutations(self, module):
+            sites, unknown = _binary_operator_tokens(module)
+            if from_op.value in unknown:
+                return None
+            return [module.token_mutation(index, to_op.value)
+                    for index in sites.get(from_op.value, ())]
+
         @classmethod
         def examples(cls):
             return (
@@ -76,17 +91,104 @@ def _is_binary_operator(node):
     return False
 
 
-# Build all of the binary replacement operators
-_MUTATION_OPERATORS = tuple(
-    _create_replace_binary_operator(from_op, to_op)
-    for from_op, to_op
-    in itertools.permutations(BinaryOperators, 2))
-
-# Inject operators into module namespace
-for op_cls in _MUTATION_OPERATORS:
-    globals()[op_cls.__name__] = op_cls
+_OPERATOR_VALUES = frozenset(op.value for op in BinaryOperators)
+
+
+def _binary_operator_tokens(module):
+    """Find the tokens of a `TokenizedModule` which `_is_binary_operator`
+    accepts.
+
+    Returns: A `(sites, unknown)` tuple. `sites` maps the values of operators
+        to the indices of their tokens which are binary operators. `unknown`
+        is the set of values of operators which have tokens that can't be
+        classified without parso.
+    """
+    result = module.cache.get(__name__)
+    if result is not None:
+        return result
+
+    binary = set()
+    for node in module.nodes(ast.BinOp):
+        _, last = module.span(node.left)
+        binary.add(last + 1)
+
+    # Operators which are part of unary operations, star-expressions,
+    # arguments and parameters.
+    other = set()
+    for node in module.nodes(ast.UnaryOp, ast.Starred):
+        other.add(module.token_at(module.start(node)))
+    for node in module.nodes(ast.Call):
+        other.update(module.span(keyword.value)[0] - 1
+                     for keyword in node.keywords if keyword.arg is None)
+    for node in module.nodes(ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda):
+        other.update(module.token_at(module.start(arg)) - 1
+                     for arg in (node.args.vararg, node.args.kwarg) if arg is not None)
+
+    sites = {}
+    unknown = set()
+    for index, (token_type, string, _, _) in enumerate(module.tokens):
+        if token_type != tokenize.OP or string not in _OPERATOR_VALUES or index in other:
+            continue
+        # parso treats the star of a star-import as a binary operator.
+        if index in binary or (string == '*' and module.is_name(index - 1, 'import')):
+            sites.setdefault(string, []).append(index)
+        else:
+            unknown.add(string)
+
+    result = (sites, unknown)
+    module.cache[__name__] = result
+    return result
+
+
+# The names of the operators which replace one binary operator with another,
+# mapped to the operators they replace and replace them with.
+_MEMBERS = {
+    'ReplaceBinaryOperator_{}_{}'.format(from_op.name, to_op.name): (from_op, to_op)
+    for from_op, to_op in itertools.permutations(BinaryOperators, 2)
+}
+
+# The names of the operators which replace each binary operator.
+_REPLACEMENTS = {
+    from_op.value: [name for name, (member_from, _) in _MEMBERS.items() if member_from is from_op]
+    for from_op in BinaryOperators
+}
+
+
+class BinaryOperatorReplacement(OperatorFamily):
+    "The family of operators which replace one binary operator with another."
+
+    @classmethod
+    def member_names(cls):
+        return tuple(_MEMBERS)
+
+    @classmethod
+    def member_class(cls, name):
+        return _create_replace_binary_operator(*_MEMBERS[name])
+
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('operator')
+
+    def mutation_positions(self, node):
+        if _is_binary_operator(node):
+            for name in _REPLACEMENTS.get(node.value, ()):
+                yield (name, node.start_pos, node.end_pos)
+
+    def token_mutations(self, module):
+        sites, unknown = _binary_operator_tokens(module)
+        mutations = {}
+        for name, (from_op, to_op) in _MEMBERS.items():
+            if from_op.value in unknown:
+                mutations[name] = None
+            else:
+                mutations[name] = [module.token_mutation(index, to_op.value)
+                                   for index in sites.get(from_op.value, ())]
+        return mutations
+
+
+# Inject the operators into the module namespace.
+globals().update({name: BinaryOperatorReplacement.member_class(name) for name in _MEMBERS})
 
 
 def operators():
     "Iterable of all binary operator replacement mutation operators."
-    return _MUTATION_OPERATORS
+    return tuple(map(BinaryOperatorReplacement.member_class, _MEMBERS))
@@ -1,7 +1,10 @@
 "Implementation of the boolean replacement operators."
 
+import ast
+
 import parso.python.tree
 
+from ..ast import node_index
 from .keyword_replacer import KeywordReplacementOperator
 from .operator import Operator
 
@@ -53,6 +56,9 @@ class AddNot(Operator):
     NODE_TYPES = (parso.python.tree.IfStmt, parso.python.tree.WhileStmt,
                   parso.python.tree.AssertStmt)
 
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('if_stmt', 'while_stmt', 'assert_stmt', 'test')
+
     def mutation_positions(self, node):
         if isinstance(node, self.NODE_TYPES):
             expr = node.children[1]
@@ -81,6 +87,24 @@ class AddNot(Operator):
 
         return node
 
+    def token_mutations(self, module):
+        mutations = []
+        for node in module.nodes(ast.If, ast.While, ast.Assert, ast.IfExp):
+            first, last = module.span(node.test)
+            keyword = 'while' if isinstance(node, ast.While) else 'assert' if isinstance(node, ast.Assert) else 'if'
+            if not module.is_name(first - 1, keyword):
+                # Only the condition of the `if` of an if-statement is mutated, not those of `elif`s.
+                if isinstance(node, ast.If) and module.is_name(first - 1, 'elif'):
+                    continue
+                return None
+
+            # Like `mutate`, this inserts `not` before the prefix of the expression.
+            start = module.prefix_start(first)
+            code = module.code[start:module.offset(module.tokens[last][3])]
+            mutations.append(module.mutation(
+                module.start(node), module.end(node), first, last, ' not' + code, prefix=True))
+        return mutations
+
     @classmethod
     def examples(cls):
         return (
@@ -1,13 +1,15 @@
 """This module contains mutation operators which replace one
 comparison operator with another.
 """
+import ast
 from enum import Enum
+import functools
 import itertools
 
 import parso.python.tree
 
-from ..ast import is_none, is_number
-from .operator import Operator
+from ..ast import is_none, is_number, node_index
+from .operator import Operator, OperatorFamily
 from .util import extend_name
 
 
@@ -23,11 +25,15 @@ class ComparisonOperators(Enum):
     IsNot = 'is not'
 
 
+@functools.lru_cache(maxsize=None)
 def _create_operator(from_op, to_op):
     @extend_name('_{}_{}'.format(from_op.name, to_op.name))
     class ReplaceComparisonOperator(Operator):
         "An operator that replaces {} with {}".format(from_op.name, to_op.name)
 
+        def find_sites(self, module_tree):
+            return node_index(module_tree).nodes('comparison')
+
         def mutation_positions(self, node):
             if node.type == 'comparison':
                 # Every other child starting at 1 is a comparison operator of some sort
@@ -42,6 +48,15 @@ def _create_operator(from_op, to_op):
             node.children[op_idx * 2 + 1] = mutated_comparison_op
             return node
 
+        def token_mutations(self, module):
+            mutations = []
+            for owner_start, owner_end, first, last, text, rhs_is_none, rhs_is_number in \
+                    _comparison_tokens(module):
+                if text == from_op.value and _allowed_rhs(to_op, from_op, rhs_is_none, rhs_is_number):
+                    mutations.append(module.mutation(
+                        owner_start, owner_end, first, last, ' ' + to_op.value, prefix=True))
+            return mutations
+
         @staticmethod
         def _mutation_points(node):
             for op_idx, comparison_op in enumerate(node.children[1::2]):
@@ -59,22 +74,6 @@ def _create_operator(from_op, to_op):
     return ReplaceComparisonOperator
 
 
-# Build all of the binary replacement operators
-_OPERATORS = tuple(
-    _create_operator(from_op, to_op)
-    for from_op, to_op
-    in itertools.permutations(ComparisonOperators, 2))
-
-# Inject the operators into the module namespace
-for op_cls in _OPERATORS:
-    globals()[op_cls.__name__] = op_cls
-
-
-def operators():
-    "Iterable of all binary operator replacement mutation operators."
-    return iter(_OPERATORS)
-
-
 # This determines the allowed from-to mutations when the RHS is None.
 _RHS_IS_NONE_OPS = {
     ComparisonOperators.Eq: [ComparisonOperators.IsNot],
@@ -96,10 +95,110 @@ _RHS_IS_INTEGER_OPS = set([
 
 def _allowed(to_op, from_op, rhs):
     "Determine if a mutation from `from_op` to `to_op` is allowed given a particular `rhs` node."
-    if is_none(rhs):
+    return _allowed_rhs(to_op, from_op, is_none(rhs), is_number(rhs))
+
+
+def _allowed_rhs(to_op, from_op, rhs_is_none, rhs_is_number):
+    "Determine if a mutation from `from_op` to `to_op` is allowed given the kind of the `rhs`."
+    if rhs_is_none:
         return to_op in _RHS_IS_NONE_OPS.get(from_op, ())
 
-    if is_number(rhs):
+    if rhs_is_number:
         return to_op in _RHS_IS_INTEGER_OPS
 
     return True
+
+
+def _comparison_tokens(module):
+    """Find the comparison operators of a `TokenizedModule`.
+
+    Returns: A list of `(node-start, node-end, first, last, text, rhs-is-none,
+        rhs-is-number)` tuples. The operator's tokens are `first` to `last`,
+        and `text` is its code as `_mutation_points` sees it. The positions
+        are those of the comparison containing the operator.
+    """
+    result = module.cache.get(__name__)
+    if result is not None:
+        return result
+
+    result = []
+    for node in module.nodes(ast.Compare):
+        operands = [module.span(operand) for operand in [node.left] + node.comparators]
+        owner_start = module.tokens[operands[0][0]][2]
+        owner_end = module.tokens[operands[-1][1]][3]
+        for (_, prev_last), (rhs_first, _), rhs, operator in zip(
+                operands, operands[1:], node.comparators, node.ops):
+            first = prev_last + 1
+            last = first + 1 if isinstance(operator, (ast.IsNot, ast.NotIn)) else first
+
+            # parso includes the prefix of the operator in its code.
+            text = module.code[module.prefix_start(first):module.offset(module.tokens[last][3])].strip()
+
+            # parso only sees literals which aren't in parentheses.
+            rhs_is_none = rhs_is_number = False
+            if isinstance(rhs, ast.Constant) and rhs_first == module.token_at(module.start(rhs)):
+                rhs_is_none = rhs.value is None
+                rhs_is_number = type(rhs.value) in (int, float, complex)
+            result.append((owner_start, owner_end, first, last, text, rhs_is_none, rhs_is_number))
+
+    module.cache[__name__] = result
+    return result
+
+
+# The names of the operators which replace one comparison operator with
+# another, mapped to the operators they replace and replace them with.
+_MEMBERS = {
+    'ReplaceComparisonOperator_{}_{}'.format(from_op.name, to_op.name): (from_op, to_op)
+    for from_op, to_op in itertools.permutations(ComparisonOperators, 2)
+}
+
+# The members which replace each comparison operator, as `(name, to-op)`
+# tuples.
+_REPLACEMENTS = {
+    from_op.value: [(name, to_op) for name, (member_from, to_op) in _MEMBERS.items()
+                    if member_from is from_op]
+    for from_op in ComparisonOperators
+}
+
+
+class ComparisonOperatorReplacement(OperatorFamily):
+    "The family of operators which replace one comparison operator with another."
+
+    @classmethod
+    def member_names(cls):
+        return tuple(_MEMBERS)
+
+    @classmethod
+    def member_class(cls, name):
+        return _create_operator(*_MEMBERS[name])
+
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('comparison')
+
+    def mutation_positions(self, node):
+        if node.type == 'comparison':
+            for op_idx, comparison_op in enumerate(node.children[1::2]):
+                from_value = comparison_op.get_code().strip()
+                rhs = node.children[(op_idx + 1) * 2]
+                for name, to_op in _REPLACEMENTS.get(from_value, ()):
+                    if _allowed(to_op, ComparisonOperators(from_value), rhs):
+                        yield (name, comparison_op.start_pos, comparison_op.end_pos)
+
+    def token_mutations(self, module):
+        mutations = {name: [] for name in _MEMBERS}
+        for owner_start, owner_end, first, last, text, rhs_is_none, rhs_is_number in \
+                _comparison_tokens(module):
+            for name, to_op in _REPLACEMENTS.get(text, ()):
+                if _allowed_rhs(to_op, ComparisonOperators(text), rhs_is_none, rhs_is_number):
+                    mutations[name].append(module.mutation(
+                        owner_start, owner_end, first, last, ' ' + to_op.value, prefix=True))
+        return mutations
+
+
+# Inject the operators into the module namespace.
+globals().update({name: ComparisonOperatorReplacement.member_class(name) for name in _MEMBERS})
+
+
+def operators():
+    "Iterable of all comparison operator replacement mutation operators."
+    return map(ComparisonOperatorReplacement.member_class, _MEMBERS)
@@ -1,7 +1,10 @@
 "Implementation of the exception-replacement operator."
 
+import ast
+
 from parso.python.tree import Name, PythonNode
 
+from ..ast import node_index
 from .operator import Operator
 
 from cosmic_ray.exceptions import CosmicRayTestingException
@@ -10,6 +13,9 @@ from cosmic_ray.exceptions import CosmicRayTestingException
 class ExceptionReplacer(Operator):
     """An operator that modifies exception handlers."""
 
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('except_clause')
+
     def mutation_positions(self, node):
         if isinstance(node, PythonNode):
             if node.type == 'except_clause':
@@ -25,6 +31,36 @@ class ExceptionReplacer(Operator):
         name_nodes[index].value = CosmicRayTestingException.__name__
         return node
 
+    def token_mutations(self, module):
+        if hasattr(ast, 'TryStar') and module.nodes(ast.TryStar):
+            return None
+
+        mutations = []
+        for handler in module.nodes(ast.ExceptHandler):
+            if handler.type is None:
+                continue
+
+            # Only plain names, on their own or in a tuple, are found the same way as by parso.
+            first, last = module.span(handler.type)
+            if isinstance(handler.type, ast.Name) and first == last:
+                names = [handler.type]
+            elif isinstance(handler.type, ast.Tuple) and module.is_op(first, '(') and \
+                    first == module.token_at(module.start(handler.type)) and \
+                    all(isinstance(name, ast.Name) for name in handler.type.elts):
+                names = handler.type.elts
+            else:
+                return None
+
+            indices = [module.span(name) for name in names]
+            if any(name_first != name_last for name_first, name_last in indices):
+                return None
+
+            mutations.extend(
+                module.mutation(module.start(handler), module.end(handler), index, index,
+                                CosmicRayTestingException.__name__)
+                for index, _ in indices)
+        return mutations
+
     @staticmethod
     def _name_nodes(node):
         if isinstance(node.children[1], Name):
@@ -1,7 +1,10 @@
 "Common implementation for operators that replace keywords."
 
+import tokenize
+
 from parso.python.tree import Keyword
 
+from ..ast import node_index
 from .operator import Operator
 
 # pylint: disable=E1101
@@ -11,6 +14,9 @@ class KeywordReplacementOperator(Operator):
     """A base class for operators that replace one keyword with another
     """
 
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('keyword')
+
     def mutation_positions(self, node):
         if isinstance(node, Keyword):
             if node.value.strip() == self.from_keyword:
@@ -23,6 +29,11 @@ class KeywordReplacementOperator(Operator):
         node.value = self.to_keyword
         return node
 
+    def token_mutations(self, module):
+        return [module.token_mutation(index, self.to_keyword)
+                for index, (token_type, string, _, _) in enumerate(module.tokens)
+                if token_type == tokenize.NAME and string == self.from_keyword]
+
     @classmethod
     def examples(cls):
         return (
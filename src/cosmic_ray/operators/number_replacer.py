@@ -1,9 +1,11 @@
 """Implementation of the NumberReplacer operator.
 """
 
+import tokenize
+
 import parso
 
-from ..ast import is_number
+from ..ast import is_number, node_index
 from .operator import Operator
 
 # List of offsets that we apply to numbers in the AST. Each index into the list
@@ -17,6 +19,9 @@ OFFSETS = [
 class NumberReplacer(Operator):
     """An operator that modifies numeric constants."""
 
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('number')
+
     def mutation_positions(self, node):
         if is_number(node):
             for _ in OFFSETS:
@@ -31,6 +36,16 @@ class NumberReplacer(Operator):
         val = eval(node.value) + OFFSETS[index]  # pylint: disable=W0123
         return parso.python.tree.Number(' ' + str(val), node.start_pos)
 
+    def token_mutations(self, module):
+        mutations = []
+        for index, (token_type, string, start, end) in enumerate(module.tokens):
+            if token_type == tokenize.NUMBER:
+                for offset in OFFSETS:
+                    # The mutated number replaces the prefix of the original, like in `mutate`.
+                    val = eval(string) + offset  # pylint: disable=W0123
+                    mutations.append(module.mutation(start, end, index, index, ' ' + str(val), prefix=True))
+        return mutations
+
     @classmethod
     def examples(cls):
         return (
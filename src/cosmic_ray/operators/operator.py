@@ -43,6 +43,43 @@ class Operator(ABC):
         some reason.
         """
 
+    def find_sites(self, module_tree):  # pylint: disable=no-self-use,unused-argument
+        """The nodes of a module which this operator might mutate.
+
+        By default `mutation_positions` is called for every node of a module.
+        Operators which only mutate a few kinds of nodes can implement this
+        to find those nodes in one go, e.g. with the shared index of
+        `cosmic_ray.ast.node_index` or with parso's own lookups like
+        `iter_funcdefs`. `mutation_positions` is then only called for them.
+
+        Args:
+            module_tree: The parso parse tree of the module.
+
+        Returns: An iterable of nodes of `module_tree`, in any order, which
+            must include every node for which `mutation_positions` produces
+            positions. `None` means that every node has to be looked at,
+            which is the default.
+        """
+        return None
+
+    def token_mutations(self, module):  # pylint: disable=no-self-use,unused-argument
+        """All of the mutations this operator can make to a module, found
+        without parsing the module with parso.
+
+        Operators which can describe their mutations as splices of the text
+        of a module implement this so that `init` can use the faster
+        tokenize-based analysis of `cosmic_ray.tokenized`. The mutations must
+        be exactly those which `mutation_positions` and `mutate` make.
+
+        Args:
+            module: A `cosmic_ray.tokenized.TokenizedModule`.
+
+        Returns: An iterable of `cosmic_ray.tokenized.TokenMutation`s, in any
+            order, or `None` if the operator can't find its mutations in
+            `module` this way. By default this returns `None`.
+        """
+        return None
+
     @classmethod
     @abstractmethod
     def examples(cls):
@@ -61,3 +98,80 @@ class Operator(ABC):
 
         Returns: An iterable of example tuples.
         """
+
+
+class OperatorFamily(ABC):
+    """A group of operators which mutate the same sites in different ways,
+    e.g. all of the operators which replace one binary operator with another.
+
+    Instead of each member scanning a module for the sites it can mutate, the
+    family finds every site once and reports the mutations of all of its
+    members there. The members are still ordinary operators with their own
+    names, so work items, workers and `exclude-operators` patterns refer to
+    them exactly as before. Operator providers make families known through a
+    `families()` method.
+
+    Args:
+        python_version: The version of Python to use when interpreting the code in `module_path`.
+            A string of the form "MAJOR.MINOR", e.g. "3.6" for Python 3.6.x.
+    """
+
+    def __init__(self, python_version):
+        self._python_version = python_version
+        self._members = {}
+
+    @property
+    def python_version(self):
+        "Python major.minor version as a string."
+        return self._python_version
+
+    @classmethod
+    @abstractmethod
+    def member_names(cls):
+        """The names of the operators in the family, without the name of
+        their provider.
+
+        Returns: An iterable of names.
+        """
+
+    @classmethod
+    @abstractmethod
+    def member_class(cls, name):
+        "The operator class of the member called `name`."
+
+    def member(self, name):
+        "An instance of the member called `name`."
+        if name not in self._members:
+            self._members[name] = self.member_class(name)(self.python_version)
+        return self._members[name]
+
+    @abstractmethod
+    def mutation_positions(self, node):
+        """All mutations which the members of the family can make to `node`.
+
+        For each member, the positions must be those which the member's
+        `mutation_positions` produces, in the same order.
+
+        Returns: An iterable of `(member-name, (start-line, start-col),
+            (stop-line, stop-col))` tuples.
+        """
+
+    def find_sites(self, module_tree):  # pylint: disable=no-self-use,unused-argument
+        """The nodes of a module which the members of the family might
+        mutate, as for `Operator.find_sites`.
+        """
+        return None
+
+    def token_mutations(self, module):
+        """The mutations which the members of the family can make to a
+        module, found without parsing the module with parso.
+
+        By default each member's `Operator.token_mutations` is used.
+
+        Args:
+            module: A `cosmic_ray.tokenized.TokenizedModule`.
+
+        Returns: A dict which maps the name of each member to its mutations,
+            or to `None` if they have to be found with parso.
+        """
+        return {name: self.member(name).token_mutations(module) for name in self.member_names()}
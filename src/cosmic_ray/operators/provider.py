@@ -8,11 +8,23 @@ from . import (binary_operator_replacement, boolean_replacer, break_continue,
                number_replacer, remove_decorator, unary_operator_replacement,
                zero_iteration_for_loop)
 
+_FAMILIES = (
+    binary_operator_replacement.BinaryOperatorReplacement,
+    comparison_operator_replacement.ComparisonOperatorReplacement,
+    unary_operator_replacement.UnaryOperatorReplacement,
+)
+
+# The family of each operator which belongs to one. Their classes are only
+# created when they're needed.
+_FAMILY_MEMBERS = {
+    name: family
+    for family in _FAMILIES
+    for name in family.member_names()
+}
+
 _OPERATORS = {
     op.__name__: op
-    for op in itertools.chain(binary_operator_replacement.operators(
-    ), comparison_operator_replacement.operators(
-    ), unary_operator_replacement.operators(), (
+    for op in (
         boolean_replacer.AddNot, boolean_replacer.ReplaceTrueWithFalse,
         boolean_replacer.ReplaceFalseWithTrue,
         boolean_replacer.ReplaceAndWithOr, boolean_replacer.ReplaceOrWithAnd,
@@ -21,7 +33,7 @@ _OPERATORS = {
         exception_replacer.ExceptionReplacer,
         number_replacer.NumberReplacer,
         remove_decorator.RemoveDecorator,
-        zero_iteration_for_loop.ZeroIterationForLoop))
+        zero_iteration_for_loop.ZeroIterationForLoop)
 }
 
 
@@ -29,7 +41,14 @@ class OperatorProvider:
     """Provider for all of the core Cosmic Ray operators."""
 
     def __iter__(self):
-        return iter(_OPERATORS)
+        return itertools.chain(_FAMILY_MEMBERS, _OPERATORS)
 
     def __getitem__(self, name):
+        family = _FAMILY_MEMBERS.get(name)
+        if family is not None:
+            return family.member_class(name)
         return _OPERATORS[name]
+
+    def families(self):  # pylint: disable=no-self-use
+        "The `OperatorFamily` classes of the provider."
+        return _FAMILIES
@@ -1,13 +1,20 @@
 "Implementation of the remove-decorator operator."
 
+import ast
+import tokenize
+
 from parso.python.tree import Decorator
 
+from ..ast import node_index
 from .operator import Operator
 
 
 class RemoveDecorator(Operator):
     """An operator that removes decorators."""
 
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('decorator')
+
     def mutation_positions(self, node):
         if isinstance(node, Decorator):
             yield (node.start_pos, node.end_pos)
@@ -16,6 +23,20 @@ class RemoveDecorator(Operator):
         assert isinstance(node, Decorator)
         assert index == 0
 
+    def token_mutations(self, module):
+        mutations = []
+        for node in module.nodes(ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef):
+            for decorator in node.decorator_list:
+                first, last = module.span(decorator)
+                at_sign, newline = first - 1, last + 1
+                if not module.is_op(at_sign, '@') or module.tokens[newline][0] != tokenize.NEWLINE:
+                    return None
+
+                # The decorator is removed with its prefix, from the end of the previous line.
+                mutations.append(module.mutation(
+                    module.tokens[at_sign][2], module.tokens[newline][3], at_sign, newline, '', prefix=True))
+        return mutations
+
     @classmethod
     def examples(cls):
         return (
@@ -1,11 +1,14 @@
 """Implementation of the unary-operator-replacement operator.
 """
 
+import ast
 from enum import Enum
+import functools
 from itertools import permutations
 
 from parso.python.tree import Keyword, Operator, PythonNode
 
+from ..ast import node_index
 from . import operator
 from .util import extend_name
 
@@ -19,17 +22,22 @@ class UnaryOperators(Enum):
     Nothing = None
 
 
-def _create_replace_unary_operators(from_op, to_op):
+def _suffix(from_op, to_op):
     if to_op.value is None:
-        suffix = '_Delete_{}'.format(from_op.name)
-    else:
-        suffix = '_{}_{}'.format(from_op.name, to_op.name)
+        return '_Delete_{}'.format(from_op.name)
+    return '_{}_{}'.format(from_op.name, to_op.name)
+
 
-    @extend_name(suffix)
+@functools.lru_cache(maxsize=None)
+def _create_replace_unary_operators(from_op, to_op):
+    @extend_name(_suffix(from_op, to_op))
     class ReplaceUnaryOperator(operator.Operator):
         "An operator that replaces unary {} with unary {}.".format(
             from_op.name, to_op.name)
 
+        def find_sites(self, module_tree):
+            return node_index(module_tree).nodes('factor', 'not_test')
+
         def mutation_positions(self, node):
             if _is_unary_operator(node):
                 op = node.children[0]
@@ -49,6 +57,15 @@ def _create_replace_unary_operators(from_op, to_op):
                 node.children[0].value = to_op.value
             return node
 
+        def token_mutations(self, module):
+            mutations = []
+            for node in module.nodes(ast.UnaryOp):
+                index = module.token_at(module.start(node))
+                if module.tokens[index][1] == from_op.value.strip():
+                    mutations.append(module.mutation(
+                        module.start(node), module.end(node), index, index, to_op.value or ''))
+            return mutations
+
         @classmethod
         def examples(cls):
             from_code = '{}1'.format(from_op.value)
@@ -99,15 +116,56 @@ def _prohibited(from_op, to_op):
     return False
 
 
-_MUTATION_OPERATORS = tuple(
-    _create_replace_unary_operators(from_op, to_op)
+# The names of the operators which replace one unary operator with another,
+# mapped to the operators they replace and replace them with.
+_MEMBERS = {
+    'ReplaceUnaryOperator' + _suffix(from_op, to_op): (from_op, to_op)
     for (from_op, to_op) in permutations(UnaryOperators, 2)
-    if from_op.value is not None if not _prohibited(from_op, to_op))
+    if from_op.value is not None if not _prohibited(from_op, to_op)
+}
+
+# The members which replace each unary operator, as `(name, to-op)` tuples.
+_REPLACEMENTS = {
+    from_op.value.strip(): [(name, to_op) for name, (member_from, to_op) in _MEMBERS.items()
+                            if member_from is from_op]
+    for from_op in UnaryOperators if from_op.value is not None
+}
+
+
+class UnaryOperatorReplacement(operator.OperatorFamily):
+    "The family of operators which replace one unary operator with another."
+
+    @classmethod
+    def member_names(cls):
+        return tuple(_MEMBERS)
+
+    @classmethod
+    def member_class(cls, name):
+        return _create_replace_unary_operators(*_MEMBERS[name])
+
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('factor', 'not_test')
+
+    def mutation_positions(self, node):
+        if _is_unary_operator(node):
+            op = node.children[0]
+            for name, _ in _REPLACEMENTS.get(op.value.strip(), ()):
+                yield (name, op.start_pos, op.end_pos)
+
+    def token_mutations(self, module):
+        mutations = {name: [] for name in _MEMBERS}
+        for node in module.nodes(ast.UnaryOp):
+            index = module.token_at(module.start(node))
+            for name, to_op in _REPLACEMENTS.get(module.tokens[index][1], ()):
+                mutations[name].append(module.mutation(
+                    module.start(node), module.end(node), index, index, to_op.value or ''))
+        return mutations
+
 
-for op_cls in _MUTATION_OPERATORS:
-    globals()[op_cls.__name__] = op_cls
+# Inject the operators into the module namespace.
+globals().update({name: UnaryOperatorReplacement.member_class(name) for name in _MEMBERS})
 
 
 def operators():
     "Iterable of unary operator mutation operators."
-    return _MUTATION_OPERATORS
+    return tuple(map(UnaryOperatorReplacement.member_class, _MEMBERS))
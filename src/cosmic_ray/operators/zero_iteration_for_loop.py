@@ -1,14 +1,20 @@
 "Implementation of the zero-iteration-loop operator."
 
+import ast
+
 import parso
 from parso.python.tree import ForStmt
 
+from ..ast import node_index
 from .operator import Operator
 
 
 class ZeroIterationForLoop(Operator):
     """An operator that modified for-loops to have zero iterations."""
 
+    def find_sites(self, module_tree):
+        return node_index(module_tree).nodes('for_stmt')
+
     def mutation_positions(self, node):
         if isinstance(node, ForStmt):
             expr = node.children[3]
@@ -23,6 +29,21 @@ class ZeroIterationForLoop(Operator):
         node.children[3] = empty_list
         return node
 
+    def token_mutations(self, module):
+        mutations = []
+        for node in module.nodes(ast.For, ast.AsyncFor):
+            first, last = module.span(node.iter)
+            if not module.is_name(first - 1, 'in') or not module.is_op(last + 1, ':'):
+                return None
+
+            # parso's for-statement starts after the `async` of an async loop.
+            start = module.token_at(module.start(node))
+            if module.is_name(start, 'async'):
+                start += 1
+            mutations.append(module.mutation(
+                module.tokens[start][2], module.end(node), first, last, ' []', prefix=True))
+        return mutations
+
     @classmethod
     def examples(cls):
         return (
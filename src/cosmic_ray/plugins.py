@@ -1,27 +1,189 @@
 """Query and retrieve the various plugins in Cosmic Ray.
+
+Plugins are found through their entry points. Scanning the installed
+distributions for entry points is slow compared to the short-lived `cosmic-ray
+worker` processes, so the entry points of Cosmic Ray's plugin groups are
+indexed once and the index is cached on disk, in one file per interpreter. The
+index is rebuilt whenever `sys.path` or the contents of its directories change. Plugins are only
+imported when they are used.
 """
 
+import collections.abc
+import functools
+import hashlib
+import importlib
+import json
 import logging
-
-from stevedore import driver, ExtensionManager
+import os
+import sys
 
 log = logging.getLogger()
 
+_GROUPS = (
+    'cosmic_ray.operator_providers',
+    'cosmic_ray.interceptors',
+    'cosmic_ray.execution_engines',
+)
+
 
-def _log_extension_loading_failure(_mgr, ep, err):
+def _log_extension_loading_failure(group, name, err):
     # We have to log at the `error` level here as opposed to, say, `info`
     # because logging isn't configure when we reach here. We need this infor to
     # print with the default logging settings.
-    log.error('Operator provider load failure: extension-point="%s", err="%s"',
-              ep, err)
+    log.error('Plugin load failure: group="%s", name="%s", err="%s"',
+              group, name, err)
+
+
+def _cache_path():
+    "The path of the cached index for the current interpreter."
+    cache_dir = os.environ.get('COSMIC_RAY_CACHE_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+        'cosmic-ray')
+    digest = hashlib.sha1(sys.executable.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, 'plugins-{}.json'.format(digest))
+
+
+def _fingerprint():
+    "A digest of the `sys.path` entries and their modification times."
+    digest = hashlib.sha1()
+    for entry in sys.path:
+        try:
+            mtime = os.stat(entry or '.').st_mtime_ns
+        except OSError:
+            mtime = None
+        digest.update(repr((entry, mtime)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _scan_entry_points():
+    "Find the entry points of the plugin groups in the installed distributions."
+    # pylint: disable=import-outside-toplevel
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Python < 3.8
+        import importlib_metadata as metadata
+
+    entry_points = metadata.entry_points()
+    index = {}
+    for group in _GROUPS:
+        if hasattr(entry_points, 'select'):
+            group_entry_points = entry_points.select(group=group)
+        else:
+            group_entry_points = entry_points.get(group, ())
+        index[group] = {}
+        for entry_point in group_entry_points:
+            index[group].setdefault(entry_point.name, entry_point.value)
+    return index
+
+
+# The index of the current process, and whether it has been rebuilt.
+_INDEX = {}
+
+
+def _entry_point_index(refresh=False):
+    """The entry points of the plugin groups, as a dict mapping each group to a
+    dict of the `module:attribute` references of its plugins by name.
+
+    Args:
+        refresh: Whether to rebuild the index rather than use the cached one.
+            It is rebuilt at most once per process.
+    """
+    if refresh and not _INDEX.get('refreshed'):
+        _INDEX['refreshed'] = True
+        _INDEX['index'] = _build_index()
+    elif 'index' not in _INDEX:
+        _INDEX['index'] = _read_index()
+    return _INDEX['index']
+
+
+def _read_index():
+    "Read the cached index, or build it if there's none for the current `sys.path`."
+    try:
+        with open(_cache_path(), mode='rt', encoding='utf-8') as handle:
+            cached = json.load(handle)
+    except (OSError, ValueError):
+        return _build_index()
+
+    if not isinstance(cached, dict) or cached.get('fingerprint') != _fingerprint():
+        return _build_index()
+    return cached['index']
+
+
+def _build_index():
+    "Scan the entry points and store them in the cache."
+    index = _scan_entry_points()
+    path = _cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, mode='wt', encoding='utf-8') as handle:
+            json.dump({'fingerprint': _fingerprint(), 'index': index}, handle)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        log.info('Unable to cache the plugin index in %s: %s', path, exc)
+    return index
+
 
+def _names(group):
+    return tuple(_entry_point_index().get(group, {}))
 
-OPERATOR_PROVIDERS = {
-    extension.name: extension.plugin()
-    for extension in ExtensionManager(
-        'cosmic_ray.operator_providers',
-        on_load_failure_callback=_log_extension_loading_failure)
-}
+
+def _load(group, name):
+    """Import the plugin called `name` of an entry-point group.
+
+    Raises:
+        KeyError: If there is no such plugin.
+    """
+    reference = _entry_point_index().get(group, {}).get(name)
+    if reference is None:
+        # The cached index may be out of date.
+        return _resolve(_entry_point_index(refresh=True)[group][name])
+
+    try:
+        return _resolve(reference)
+    except (ImportError, AttributeError):
+        # The cached index may refer to a plugin which has since moved.
+        fresh_reference = _entry_point_index(refresh=True)[group][name]
+        if fresh_reference == reference:
+            raise
+        return _resolve(fresh_reference)
+
+
+def _resolve(reference):
+    "Import the object of a `module:attribute` entry-point reference."
+    module_name, _, attributes = reference.partition(':')
+    plugin = importlib.import_module(module_name.strip())
+    for attribute in filter(None, attributes.strip().split('.')):
+        plugin = getattr(plugin, attribute)
+    return plugin
+
+
+@functools.lru_cache(maxsize=None)
+def _operator_providers():
+    providers = {}
+    for name in _names('cosmic_ray.operator_providers'):
+        try:
+            providers[name] = _load('cosmic_ray.operator_providers', name)()
+        except Exception as exc:  # pylint: disable=broad-except
+            _log_extension_loading_failure('cosmic_ray.operator_providers', name, exc)
+    return providers
+
+
+class _OperatorProviders(collections.abc.Mapping):
+    "The operator providers by name, loaded when they're first used."
+
+    def __getitem__(self, name):
+        return _operator_providers()[name]
+
+    def __iter__(self):
+        return iter(_operator_providers())
+
+    def __len__(self):
+        return len(_operator_providers())
+
+
+OPERATOR_PROVIDERS = _OperatorProviders()
 
 
 def get_operator(name):
@@ -36,7 +198,7 @@ def get_operator(name):
     provider_name = name[:sep]
     operator_name = name[sep + 1:]
 
-    provider = OPERATOR_PROVIDERS[provider_name]
+    provider = _operator_providers()[provider_name]
     return provider[operator_name]
 
 
@@ -46,22 +208,36 @@ def operator_names():
     Returns: A sequence of operator names.
     """
     return tuple('{}/{}'.format(provider_name, operator_name)
-                 for provider_name, provider in OPERATOR_PROVIDERS.items()
+                 for provider_name, provider in _operator_providers().items()
                  for operator_name in provider)
 
 
+def operator_families():
+    """Get the operator families of all providers.
+
+    Providers can group their operators into `OperatorFamily`s with a
+    `families()` method, which returns the family classes.
+
+    Returns: A sequence of `(family-class, members)` tuples, where `members`
+        maps the names of the family's members to their full operator names.
+    """
+    return tuple(
+        (family, {name: '{}/{}'.format(provider_name, name) for name in family.member_names()})
+        for provider_name, provider in _operator_providers().items()
+        for family in getattr(provider, 'families', tuple)())
+
+
 def get_interceptor(name):
     """Get an interceptor by name.
 
     Attrs:
         name: The name of the plugin containing the interceptor.
 
-    Returns: A callable object which must accept a single `WorkDB` argument.
+    Returns: The `Interceptor` subclass of the plugin, or, for plugins written
+        against the older API, a callable which accepts a `WorkDB` and a
+        `ConfigDict`.
     """
-    return ExtensionManager(
-        'cosmic_ray.interceptors',
-        on_load_failure_callback=_log_extension_loading_failure,
-    )[name].plugin
+    return _load('cosmic_ray.interceptors', name)
 
 
 def interceptor_names():
@@ -69,22 +245,12 @@ def interceptor_names():
 
     Returns: A sequence of interceptor plugin names.
     """
-    return ExtensionManager(
-        'cosmic_ray.interceptors',
-        on_load_failure_callback=_log_extension_loading_failure,
-    ).names()
+    return _names('cosmic_ray.interceptors')
 
 
 def get_execution_engine(name):
     """Get the execution engine by name."""
-    manager = driver.DriverManager(
-        namespace='cosmic_ray.execution_engines',
-        name=name,
-        invoke_on_load=True,
-        on_load_failure_callback=_log_extension_loading_failure,
-    )
-
-    return manager.driver
+    return _load('cosmic_ray.execution_engines', name)()
 
 
 def execution_engine_names():
@@ -92,7 +258,4 @@ def execution_engine_names():
 
     Returns: A sequence of execution-engine names.
     """
-    return ExtensionManager(
-        'cosmic_ray.execution_engines',
-        on_load_failure_callback=_log_extension_loading_failure,
-    ).names()
+    return _names('cosmic_ray.execution_engines')
@@ -0,0 +1,82 @@
+"""Pre-flight checks of the unmutated test suite in a workspace.
+
+If the test suite fails on unmutated code in a workspace, every mutant tested
+there will appear to be killed. The pre-flight check runs the test suite a few
+times, in parallel, right after a workspace is set up so that such problems are
+reported before any mutation testing is done.
+
+The check is configured like this::
+
+    [cosmic-ray.preflight]
+    enabled = true
+    runs = 3
+    allow-flaky = false
+
+Tests which fail in some runs but not in others are *flaky*. By default flaky
+tests abort the run just like consistently failing tests. With `allow-flaky`,
+the flaky tests are instead recorded, and their failures are not counted when
+deciding whether a mutant was killed.
+"""
+
+import logging
+
+from cosmic_ray.exceptions import PreflightError
+from cosmic_ray.testing import FAILURE_PATTERNS, find_failed_tests, run_tests_concurrently
+from cosmic_ray.work_item import TestOutcome
+
+log = logging.getLogger(__name__)
+
+
+def preflight(config):
+    """Run the pre-flight check for the workspace in the current directory.
+
+    This does nothing unless `preflight.enabled` is set in `config`.
+
+    Args:
+        config: The session `ConfigDict`.
+
+    Returns: A frozenset of the IDs of the flaky tests found.
+
+    Raises:
+        PreflightError: If the test suite does not reliably pass.
+    """
+    preflight_config = config.sub('preflight')
+    if not preflight_config.get('enabled', False):
+        return frozenset()
+
+    runs = int(preflight_config.get('runs', 3))
+    command = config.test_command_for(None)
+    timeout = config.get('timeout')
+
+    log.info('Running pre-flight check %s times: %s', runs, command)
+    results = run_tests_concurrently(command, runs, None if timeout is None else float(timeout))
+
+    failed_runs = [output for outcome, output in results if outcome != TestOutcome.SURVIVED]
+    if not failed_runs:
+        return frozenset()
+
+    patterns = config.failure_patterns or FAILURE_PATTERNS
+    failures = [set(find_failed_tests(output, patterns)) for output in failed_runs]
+    always_failing = set.intersection(*failures) if len(failed_runs) == runs else set()
+    flaky = frozenset(set.union(*failures) - always_failing)
+
+    if any(not failed for failed in failures) or always_failing or \
+            not preflight_config.get('allow-flaky', False):
+        raise PreflightError(_diagnostic(command, runs, failed_runs, always_failing, flaky))
+
+    log.warning('Flaky tests will not count as killing mutants: %s', ', '.join(sorted(flaky)))
+    return flaky
+
+
+def _diagnostic(command, runs, failed_runs, always_failing, flaky):
+    "Describe a failed pre-flight check."
+    lines = [
+        'The test suite failed on unmutated code in {} of {} pre-flight runs.'.format(len(failed_runs), runs),
+        'command: {}'.format(command),
+    ]
+    if always_failing:
+        lines.append('failing tests: {}'.format(', '.join(sorted(always_failing))))
+    if flaky:
+        lines.append('flaky tests: {}'.format(', '.join(sorted(flaky))))
+    lines.extend(('output of the first failed run:', failed_runs[0]))
+    return '\n'.join(lines)
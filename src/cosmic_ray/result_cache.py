@@ -0,0 +1,311 @@
+"""A cache of the results of mutants which is shared between sessions.
+
+Mutants which are byte-for-byte identical, e.g. in a re-initialized session,
+on another branch or on the machine of another developer, have the same
+outcome if they are tested with the same tests. The "exec" command looks up
+the pending work items of a session in the cache before dispatching them, and
+stores the results of the work items it runs.
+
+The cache is a directory, which is configured like this::
+
+    [cosmic-ray.result-cache]
+    dir = "~/.cache/cosmic-ray/results"
+    max-size = 256
+    suite-files = ["tests/**/*.py", "requirements*.txt", "setup.py", "setup.cfg", "pyproject.toml"]
+
+Each result is stored in a file named by a digest of the code of the mutated
+module, the module's path, the test command, the code of the modules which the
+module's tests import, and a digest of the test suite. The modules which the
+tests import are found with the import graph of test selection (see
+`cosmic_ray.test_selection`). Without test selection, the code of all the
+modules of the session is used instead. The digest of the test suite covers
+the contents of the files matching the `suite-files` glob patterns, the
+settings which affect the outcome of a test run (`fail-fast`,
+`failure-patterns`, `kill-first` and `preflight`), the version of Python and
+the installed distributions. Changes to other files don't invalidate the cache
+unless they are matched by `suite-files`.
+
+Results are written to temporary files which are atomically renamed, so any
+number of processes can share the cache. Reading a result updates the
+modification time of its file, and when the cache grows beyond `max-size`
+megabytes the least recently used results are removed.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import uuid
+from pathlib import Path
+
+from cosmic_ray.mutating import splice_diff
+from cosmic_ray.source_index import source_digest
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 256
+DEFAULT_SUITE_FILES = (
+    'tests/**/*.py', 'test/**/*.py',
+    'requirements*.txt', 'setup.py', 'setup.cfg', 'pyproject.toml', 'tox.ini',
+)
+
+
+class ResultCache:
+    """A directory of cached `WorkResult`s, keyed by hex digests.
+
+    Args:
+        path: The pathlib.Path of the cache directory. It's created when the
+            first result is stored.
+        max_size: The maximum size of the cache in bytes.
+    """
+
+    def __init__(self, path, max_size):
+        self._path = path
+        self._max_size = max_size
+
+    @property
+    def path(self):
+        "The path of the cache directory."
+        return self._path
+
+    def get(self, key):
+        "Get the cached `WorkResult` for a key, or `None` if it isn't cached."
+        entry = self._entry_path(key)
+        try:
+            with entry.open(mode='rt', encoding='utf-8') as handle:
+                data = json.load(handle)
+            # The modification times are used to evict the least recently used results.
+            os.utime(str(entry))
+        except (OSError, ValueError):
+            return None
+
+        test_outcome = data['test_outcome']
+        return WorkResult(
+            worker_outcome=WorkerOutcome(data['worker_outcome']),
+            output=data['output'],
+            test_outcome=None if test_outcome is None else TestOutcome(test_outcome),
+            diff=data['diff'])
+
+    def put(self, key, result):
+        "Store the `WorkResult` for a key."
+        entry = self._entry_path(key)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry.with_name('{}.{}.tmp'.format(entry.name, uuid.uuid4().hex))
+            with tmp_path.open(mode='wt', encoding='utf-8') as handle:
+                json.dump(result.as_dict(), handle)
+            os.replace(str(tmp_path), str(entry))
+        except OSError as exc:
+            log.warning('Unable to cache a result in %s: %s', self._path, exc)
+
+    def evict(self):
+        """Remove the least recently used results until the cache is no
+        larger than its maximum size.
+
+        Returns: The number of results which were removed.
+        """
+        entries = []
+        for entry in self._path.glob('*/*.json'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        removed = 0
+        for _, entry_size, entry in sorted(entries, key=lambda entry: entry[0]):
+            if size <= self._max_size:
+                break
+            try:
+                entry.unlink()
+                removed += 1
+            except OSError:
+                # Another process removed it.
+                pass
+            size -= entry_size
+        return removed
+
+    def _entry_path(self, key):
+        return self._path / key[:2] / '{}.json'.format(key)
+
+
+def result_cache(config):
+    """Get the `ResultCache` configured for a session.
+
+    Args:
+        config: The session `ConfigDict`.
+
+    Returns: A `ResultCache`, or `None` if the cache isn't configured.
+    """
+    cache_config = config.sub('result-cache')
+    if 'dir' not in cache_config:
+        return None
+
+    path = Path(os.path.expanduser(cache_config['dir']))
+    max_size = float(cache_config.get('max-size', DEFAULT_MAX_SIZE)) * 1024 * 1024
+    return ResultCache(path, max_size)
+
+
+def suite_digest(config):
+    """A hex digest of the test suite and the settings it's run with.
+
+    This covers the contents of the files matching the `result-cache.suite-files`
+    patterns, the settings which affect the outcomes of test runs, the version
+    of Python and the installed distributions.
+
+    Args:
+        config: The session `ConfigDict`.
+    """
+    # pylint: disable=import-outside-toplevel
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Python < 3.8
+        import importlib_metadata as metadata
+
+    patterns = config.sub('result-cache').get('suite-files', DEFAULT_SUITE_FILES)
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern, recursive=True)})
+
+    digest = hashlib.sha1(sys.version.encode('utf-8'))
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        with open(path, mode='rb') as handle:
+            digest.update(repr((Path(path).as_posix(), hashlib.sha1(handle.read()).hexdigest())).encode('utf-8'))
+
+    # Failing fast, the failure patterns and flaky tests decide which test runs kill mutants.
+    settings = {
+        'fail-fast': config.fail_fast,
+        'failure-patterns': config.failure_patterns,
+        'kill-first': config.kill_first_config,
+        'preflight': config.sub('preflight'),
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+
+    distributions = sorted(
+        '{}=={}'.format(dist.metadata['Name'], dist.version)
+        for dist in metadata.distributions())
+    digest.update('\n'.join(distributions).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def work_item_keys(work_items, config, source_digests, imported_modules=None):
+    """Compute the cache keys of work items.
+
+    Only work items with splices have keys, and only if their module hasn't
+    changed since the session was initialized.
+
+    Args:
+        work_items: An iterable of `WorkItem`s.
+        config: The session `ConfigDict`.
+        source_digests: A dict mapping module paths to the digests of the
+            code they were initialized with (see `WorkDB.source_digests`).
+        imported_modules: A dict mapping module paths to the paths of the
+            modules which their tests import (see
+            `cosmic_ray.test_selection.imported_modules`). The keys of the
+            work items of other modules depend on the code of all modules.
+
+    Returns: A dict mapping job-ids to keys.
+    """
+    suite = suite_digest(config)
+    sources = {}
+    dependencies = {}
+    keys = {}
+    for item in work_items:
+        if item.splice is None:
+            continue
+
+        source = _read_source(item.module_path, source_digests, sources)
+        if source is None:
+            continue
+
+        start, end, replacement = item.splice
+        mutated = hashlib.sha1()
+        for part in (source[:start], replacement, source[end:]):
+            mutated.update(part.encode('utf-8'))
+
+        imports = _dependencies_digest(str(item.module_path), source_digests, imported_modules, dependencies)
+
+        key = hashlib.sha1()
+        for part in (suite, imports, config.test_command_for(item.module_path),
+                     item.module_path.as_posix(), mutated.hexdigest()):
+            key.update(part.encode('utf-8'))
+            key.update(b'\0')
+        keys[item.job_id] = key.hexdigest()
+    return keys
+
+
+def _dependencies_digest(module_path, source_digests, imported_modules, digests):
+    "A digest of the code of the other modules which the tests of a module import."
+    if module_path not in digests:
+        if imported_modules is not None and module_path in imported_modules:
+            paths = set(imported_modules[module_path])
+        else:
+            paths = set(source_digests)
+        paths.discard(module_path)
+        digest = hashlib.sha1(repr(sorted((path, source_digests.get(path)) for path in paths)).encode('utf-8'))
+        digests[module_path] = digest.hexdigest()
+    return digests[module_path]
+
+
+def _read_source(module_path, source_digests, sources):
+    "Read the code of a module, or `None` if it has changed since init."
+    if module_path not in sources:
+        try:
+            with module_path.open(mode='rt', encoding='utf-8') as handle:
+                source = handle.read()
+        except OSError:
+            source = None
+
+        expected = source_digests.get(str(module_path))
+        if source is not None and expected is not None and source_digest(source) != expected:
+            log.warning('%s has changed since init, its results are not cached', module_path)
+            source = None
+        sources[module_path] = source
+    return sources[module_path]
+
+
+def cacheable(result):
+    """Whether a `WorkResult` is a test outcome which can be reused.
+
+    Timeouts depend on the load of the machine, so they aren't reused.
+    """
+    return (result.worker_outcome == WorkerOutcome.NORMAL
+            and not (result.test_outcome == TestOutcome.KILLED and result.output == 'timeout'))
+
+
+def lookup(cache, work_items, keys, config):
+    """Look up the results of work items in a cache.
+
+    Args:
+        cache: A `ResultCache`.
+        work_items: An iterable of `WorkItem`s.
+        keys: The cache keys of the work items (see `work_item_keys`).
+        config: The session `ConfigDict`.
+
+    Returns: A dict mapping job-ids to the cached `WorkResult`s.
+    """
+    results = {}
+    sources = {}
+    for item in work_items:
+        key = keys.get(item.job_id)
+        if key is None:
+            continue
+
+        result = cache.get(key)
+        if result is None:
+            continue
+
+        if result.diff is None and not config.lazy_diffs:
+            source = _read_source(item.module_path, {}, sources)
+            result = WorkResult(
+                worker_outcome=result.worker_outcome,
+                output=result.output,
+                test_outcome=result.test_outcome,
+                diff=splice_diff(source, *item.splice, item.module_path))
+        results[item.job_id] = result
+    return results
@@ -0,0 +1,428 @@
+"""Mutant schemata: all of the mutants of a module in a single instrumented module.
+
+Normally a worker rewrites a module on disk for every mutant, and the test
+process has to recompile it. With schemata, each module is instead instrumented
+once, before any tests run. Every statement which contains mutants is replaced
+by a switch on the active mutant::
+
+    if __cosmic_ray_mutant__ == '<job-id>':
+        <the statement with the job's mutation applied>
+    else:
+        <the original statement>
+
+`__cosmic_ray_mutant__` is read from the environment variable named by
+`ACTIVE_MUTANT_VAR` when the module is imported. The instrumented modules are
+written to a directory next to the session, and the config only records where
+they are. Each worker installs an instrumented module into its workspace the
+first time it gets a job for the module, and each job only has to set the
+environment variable when it runs the tests.
+
+Schemata are enabled like this::
+
+    [cosmic-ray.schemata]
+    enabled = true
+    dir = "session.sqlite.schemata"
+
+`dir` defaults to the path of the session with ".schemata" appended. Workers
+on other machines need to be able to read it.
+
+Modules which can't be instrumented are mutated by rewriting them as usual.
+"""
+
+import bisect
+import hashlib
+import io
+import logging
+import os
+import py_compile
+import shutil
+import tokenize
+from collections import defaultdict
+from pathlib import Path
+
+from cosmic_ray.ast import get_ast
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.mutating import compile_error, make_diff, mutate_ast, splice, splice_diff
+from cosmic_ray.plugins import get_operator
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+log = logging.getLogger(__name__)
+
+# The environment variable which holds the job-id of the active mutant.
+ACTIVE_MUTANT_VAR = 'COSMIC_RAY_ACTIVE_MUTANT'
+
+_SWITCH = '__cosmic_ray_mutant__'
+
+_SWITCH_DEFINITION = "{} = __import__('os').environ.get({!r})\n".format(_SWITCH, ACTIVE_MUTANT_VAR)
+
+
+# The `(workspace, module-path)`s of the schemata installed by this process.
+_INSTALLED = set()
+
+
+class SchemaError(Exception):
+    "Raised when a module can't be instrumented."
+
+
+def configure_schemata(work_db, config):
+    """Build the schemata for the pending work of a session.
+
+    This does nothing unless `schemata.enabled` is set in `config`. The
+    instrumented modules are written to the schemata directory, and their
+    paths are stored in `config`. Mutants which don't compile are recorded in
+    `work_db` as incompetent since they can't be part of a schema.
+
+    Args:
+        work_db: The session `WorkDB`.
+        config: The session `ConfigDict`. This is modified in place.
+
+    Returns: A dict mapping the job-ids of the mutants in the schemata to the
+        diffs of the mutants. Workers don't produce diffs for these mutants.
+        The diff is `None` if it's to be rendered on demand.
+    """
+    if not config.sub('schemata').get('enabled', False):
+        return {}
+
+    items_by_module = defaultdict(list)
+    for item in work_db.pending_work_items:
+        items_by_module[item.module_path].append(item)
+
+    directory = Path(config.sub('schemata').get('dir', '{}.schemata'.format(work_db.name))).resolve()
+    # The schemata of earlier runs are out of date.
+    shutil.rmtree(str(directory), ignore_errors=True)
+    directory.mkdir(parents=True)
+
+    modules = {}
+    diffs = {}
+    incompetent = []
+    num_mutants = 0
+    for module_path, items in items_by_module.items():
+        try:
+            schema = build_schema(module_path, items, config.python_version)
+        except SchemaError as exc:
+            log.warning('Unable to instrument %s: %s', module_path, exc)
+            continue
+
+        # With lazy diffs, the diffs of mutants with splices are rendered on demand.
+        if config.lazy_diffs:
+            for item in items:
+                if item.splice is not None:
+                    schema.diffs[item.job_id] = None
+
+        schema_path = directory / '{}.py'.format(hashlib.sha1(str(module_path).encode('utf-8')).hexdigest())
+        with schema_path.open(mode='wt', encoding='utf-8') as handle:
+            handle.write(schema.code)
+        modules[str(module_path)] = str(schema_path)
+        diffs.update(schema.diffs)
+        num_mutants += len(schema.diffs) - len(schema.incompetent)
+        incompetent.extend(
+            (job_id, WorkResult(
+                output=error,
+                diff=schema.diffs[job_id],
+                test_outcome=TestOutcome.INCOMPETENT,
+                worker_outcome=WorkerOutcome.NORMAL))
+            for job_id, error in schema.incompetent.items())
+
+    log.info('Instrumented %s modules with %s mutants', len(modules), num_mutants)
+    work_db.set_results(incompetent)
+    config['schemata']['modules'] = ConfigDict(modules)
+    return diffs
+
+
+def install_schema(config, module_path):
+    """Install the instrumented version of a module into the workspace in the
+    current directory, unless this process has already done so.
+
+    The module is compiled once here so that test runs can use the cached
+    bytecode.
+
+    Args:
+        config: The session `ConfigDict`.
+        module_path: The path of the module. It must be instrumented
+            according to `config` (see `schema_module`).
+    """
+    key = (os.getcwd(), str(module_path))
+    if key in _INSTALLED:
+        return
+
+    shutil.copyfile(config.sub('schemata', 'modules')[str(module_path)], str(module_path))
+    py_compile.compile(str(module_path))
+    _INSTALLED.add(key)
+
+
+def schema_module(config, module_path):
+    "Whether the module at `module_path` is instrumented according to `config`."
+    return str(module_path) in config.sub('schemata', 'modules')
+
+
+class Schema:
+    """An instrumented module.
+
+    Attributes:
+        code: The instrumented code.
+        diffs: A dict mapping job-ids to the diffs of their mutants.
+        incompetent: A dict mapping the job-ids of mutants which don't compile,
+            and which are not in the schema, to the compiler's error messages.
+    """
+
+    def __init__(self, code, diffs, incompetent):
+        self.code = code
+        self.diffs = diffs
+        self.incompetent = incompetent
+
+
+def build_schema(module_path, work_items, python_version):
+    """Instrument a module with the mutants of `work_items`.
+
+    Args:
+        module_path: The path of the module.
+        work_items: The `WorkItem`s of the mutants of the module.
+        python_version: The version of Python to use when parsing the module.
+
+    Returns: A `Schema`.
+
+    Raises:
+        SchemaError: If any mutant can't be placed in the schema, or the
+            instrumented module doesn't compile.
+    """
+    module_ast = get_ast(module_path, python_version=python_version)
+    original_code = module_ast.get_code()
+    if compile_error(original_code, module_path) is not None:
+        raise SchemaError('the module does not compile')
+
+    lines = _Lines(original_code)
+    statements = {}
+    diffs = {}
+    incompetent = {}
+    for item in work_items:
+        if item.splice is not None:
+            mutated_code = splice(original_code, *item.splice)
+            diffs[item.job_id] = splice_diff(original_code, *item.splice, module_path)
+        else:
+            operator = get_operator(item.operator_name)(python_version)
+            _, mutated_code = mutate_ast(
+                module_ast, operator, item.occurrence, item.start_pos, item.end_pos)
+            if mutated_code is None:
+                raise SchemaError('no mutation for {}'.format(item.job_id))
+            diffs[item.job_id] = make_diff(original_code, mutated_code, module_path)
+
+        error = compile_error(mutated_code, module_path)
+        if error is not None:
+            incompetent[item.job_id] = error
+            continue
+
+        mutated_lines = _Lines(mutated_code)
+        statement = _mutated_statement(module_ast, lines, mutated_lines)
+        if statement is None:
+            raise SchemaError('unable to find the statement mutated by {}'.format(item.job_id))
+
+        first, last = _line_range(statement)
+        count = last - first + 1 + len(mutated_lines) - len(lines)
+        statements.setdefault((first, last), (statement.start_pos[0], []))[1].append(
+            (item.job_id, mutated_lines.slice(first, first + count - 1)))
+
+    code = _render(module_ast, lines, statements)
+    if compile_error(code, module_path) is not None:
+        raise SchemaError('the instrumented module does not compile')
+
+    return Schema(code, diffs, incompetent)
+
+
+def _mutated_statement(module_ast, lines, mutated_lines):
+    """Find the innermost block-level statement of `module_ast` which contains
+    all of the differences between the original and mutated code.
+
+    Args:
+        module_ast: The parse tree of the original code.
+        lines: The `_Lines` of the original code.
+        mutated_lines: The `_Lines` of the mutated code.
+
+    Returns: The parso node of the statement, or `None` if there is none.
+    """
+    start = _common_prefix(lines.texts, mutated_lines.texts)
+    end = len(lines.code) - _common_prefix(
+        lines.code[::-1][:len(lines.code) - start],
+        mutated_lines.code[::-1][:len(mutated_lines.code) - start])
+
+    position = lines.position(start)
+    node = module_ast.get_leaf_for_position(position, include_prefixes=True)
+    if node is not None and node.end_pos <= position:
+        # The position is at the end of a line, so it's in the prefix of the
+        # next leaf.
+        node = node.get_next_leaf()
+    while node is not None:
+        if _is_block_level(node) and \
+                lines.offset(node.get_start_pos_of_prefix()) <= start and end <= lines.offset(node.end_pos):
+            return node
+        node = node.parent
+    return None
+
+
+def _common_prefix(first, second):
+    """The length of the common prefix of two strings, or the total length of
+    the common prefix of two lists of strings.
+    """
+    length = 0
+    for first_item, second_item in zip(first, second):
+        if first_item != second_item:
+            if isinstance(first_item, str) and len(first_item) > 1:
+                length += _common_prefix(first_item, second_item)
+            break
+        length += len(first_item)
+    return length
+
+
+def _is_block_level(node):
+    "Whether `node` is a statement directly in a block of statements."
+    return node.parent is not None and node.parent.type in ('file_input', 'suite') \
+        and node.type != 'endmarker'
+
+
+def _line_range(statement):
+    """The first and last (1-based) lines of a block-level statement.
+
+    The lines include any blank lines and comments before the statement.
+    """
+    line, col = statement.end_pos
+    return statement.get_start_pos_of_prefix()[0], line - 1 if col == 0 else line
+
+
+def _render(module_ast, lines, statements):
+    """Render the instrumented module.
+
+    Args:
+        module_ast: The parse tree of the module.
+        lines: The `_Lines` of the module.
+        statements: A dict mapping the line ranges of mutated statements to
+            `(line, mutants)` tuples, where `line` is the line on which the
+            statement starts and `mutants` is a list of `(job-id,
+            mutated-lines)` tuples.
+
+    Returns: The instrumented code.
+    """
+    unit = '\t' if any(text.startswith('\t') for text, _ in lines.lines) else '    '
+
+    def _indent(rendered):
+        return [(unit + text if indentable and text.strip() else text, indentable)
+                for text, indentable in rendered]
+
+    def _render_range(first, last, statement=None):
+        rendered = []
+        line = first
+        while line <= last:
+            inner = [(start, stop) for start, stop in statements
+                     if start == line and stop <= last and (start, stop) != statement]
+            if inner:
+                # The outermost of the statements starting on this line.
+                stop = max(stop for _, stop in inner)
+                rendered.extend(_render_statement(line, stop))
+                line = stop + 1
+            else:
+                rendered.append(lines.lines[line - 1])
+                line += 1
+        return rendered
+
+    def _render_statement(first, last):
+        original = _render_range(first, last, (first, last))
+
+        line, mutants = statements[(first, last)]
+        text = lines.lines[line - 1][0]
+        indentation = text[:len(text) - len(text.lstrip())]
+        rendered = []
+        keyword = 'if'
+        for job_id, mutated in mutants:
+            rendered.append(('{}{} {} == {!r}:\n'.format(indentation, keyword, _SWITCH, job_id), True))
+            rendered.extend(_indent(mutated))
+            keyword = 'elif'
+        rendered.append(('{}else:\n'.format(indentation), True))
+        rendered.extend(_indent(original))
+        return rendered
+
+    rendered = _render_range(1, len(lines))
+
+    # The switch is defined after any docstring and __future__ imports.
+    insert_at = len(lines)
+    for node in module_ast.children:
+        if node.type == 'endmarker':
+            break
+        first_child = node.children[0] if node.type == 'simple_stmt' else node
+        if first_child.type == 'string' or (
+                first_child.type == 'import_from' and
+                [name.value for name in first_child.get_from_names()] == ['__future__']):
+            continue
+        insert_at = node.get_start_pos_of_prefix()[0] - 1
+        break
+
+    if any(first <= insert_at for first, _ in statements):
+        raise SchemaError('a docstring or __future__ import is mutated')
+
+    # Lines before the first statement are never replaced, so they are at the
+    # same index in `rendered`.
+    return ''.join(text for text, _ in rendered[:insert_at]) + _SWITCH_DEFINITION + \
+        ''.join(text for text, _ in rendered[insert_at:])
+
+
+class _Lines:
+    """The lines of some code, each with a flag saying whether it can be
+    indented without changing the code's meaning, i.e. whether it doesn't
+    start inside a string.
+
+    Each line ends with a newline.
+    """
+
+    def __init__(self, code):
+        self.code = code
+        self.texts = [line + '\n' for line in code.split('\n')]
+        self.texts[-1] = self.texts[-1][:-1]
+        if not self.texts[-1]:
+            self.texts.pop()
+        self._offsets = [0]
+        for text in self.texts:
+            self._offsets.append(self._offsets[-1] + len(text))
+
+        in_strings = _lines_in_strings(code)
+        self.lines = [
+            (text if text.endswith('\n') else text + '\n', index not in in_strings)
+            for index, text in enumerate(self.texts, 1)
+        ]
+
+    def __len__(self):
+        return len(self.lines)
+
+    def slice(self, first, last):
+        "Get the lines from `first` to `last` (1-based and inclusive)."
+        return self.lines[first - 1:last]
+
+    def offset(self, position):
+        "Convert a `(line, column)` position to an offset."
+        line, col = position
+        return self._offsets[min(line, len(self._offsets)) - 1] + col
+
+    def position(self, offset):
+        "Convert an offset to a `(line, column)` position."
+        line = min(bisect.bisect_right(self._offsets, offset), len(self._offsets) - 1) or 1
+        return line, offset - self._offsets[line - 1]
+
+
+def _lines_in_strings(code):
+    """Find the lines of `code` which start inside a string.
+
+    Returns: A set of 1-based line numbers.
+
+    Raises:
+        SchemaError: If `code` can't be tokenized.
+    """
+    lines = set()
+    fstring_starts = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.STRING:
+                lines.update(range(token.start[0] + 1, token.end[0] + 1))
+            # Since Python 3.12, f-strings are split into several tokens.
+            elif tokenize.tok_name[token.type] == 'FSTRING_START':
+                fstring_starts.append(token.start[0])
+            elif tokenize.tok_name[token.type] == 'FSTRING_END':
+                lines.update(range(fstring_starts.pop() + 1, token.end[0] + 1))
+    except (tokenize.TokenError, SyntaxError) as exc:
+        raise SchemaError('unable to tokenize: {}'.format(exc)) from exc
+    return lines
@@ -0,0 +1,170 @@
+"""An index of the code of a module.
+
+The index is built once per module by the "init" command, which passes it to
+the interceptors and stores it in the session. Workers, which have no access
+to the session, index the code they mutate themselves.
+"""
+
+import ast
+import bisect
+import functools
+import hashlib
+import io
+import itertools
+import json
+import tokenize
+
+
+class SourceIndex:
+    """The line offsets, comments and function and class scopes of the code
+    of a module, and a digest of the code.
+
+    Use `source_index` to index some code.
+
+    Args:
+        digest: The hex digest of the code (see `source_digest`).
+        line_lengths: The length of each line of the code, including its
+            line ending.
+        comments: A dict mapping line numbers to the text of the comment on
+            each line.
+        scopes: A list of `(first-line, last-line, kind, qualified-name)`
+            tuples, one for each `def` and `class` statement, in the order of
+            their first lines. `kind` is either "def" or "class".
+    """
+
+    def __init__(self, digest, line_lengths, comments, scopes):
+        self._digest = digest
+        self._line_lengths = list(line_lengths)
+        self._line_offsets = [0] + list(itertools.accumulate(self._line_lengths))
+        self._comments = comments
+        self._scopes = [tuple(scope) for scope in scopes]
+        self._scope_starts = [scope[0] for scope in self._scopes]
+
+    @property
+    def digest(self):
+        "The hex digest of the code."
+        return self._digest
+
+    @property
+    def num_lines(self):
+        "The number of lines of the code."
+        return len(self._line_lengths)
+
+    @property
+    def comments(self):
+        "A dict mapping line numbers to the text of the comment on each line."
+        return self._comments
+
+    @property
+    def scopes(self):
+        "The `(first-line, last-line, kind, qualified-name)` tuples of the scopes."
+        return self._scopes
+
+    def offset(self, line, col):
+        """The offset into the code of a one-based line and zero-based col.
+
+        The col can be past the end of the line, e.g. for the end of a
+        mutation.
+
+        Raises:
+            ValueError: If there is no such line.
+        """
+        if not 1 <= line <= self.num_lines:
+            raise ValueError("Offset {}:{} not found".format(line, col))
+
+        return self._line_offsets[line - 1] + col
+
+    def comment(self, line):
+        "The text of the comment on a line, or `None` if it has none."
+        return self._comments.get(line)
+
+    def enclosing_scopes(self, line):
+        """The `(first-line, last-line, kind, qualified-name)` tuples of the
+        scopes containing a line, from the outermost to the innermost.
+        """
+        candidates = self._scopes[:bisect.bisect_right(self._scope_starts, line)]
+        return [scope for scope in candidates if scope[1] >= line]
+
+    def scope_at(self, line):
+        """The qualified name (e.g. "Class.method") of the innermost function
+        or class containing a line, or `None` if it's at module level.
+        """
+        scopes = self.enclosing_scopes(line)
+        return scopes[-1][3] if scopes else None
+
+    def function_at(self, line):
+        """The qualified name of the innermost function containing a line, or
+        `None` if it's not in a function.
+        """
+        functions = [scope for scope in self.enclosing_scopes(line) if scope[2] == 'def']
+        return functions[-1][3] if functions else None
+
+    def to_json(self):
+        "Serialize the index to a compact JSON string."
+        return json.dumps(
+            {
+                'digest': self._digest,
+                'lines': self._line_lengths,
+                'comments': sorted(self._comments.items()),
+                'scopes': self._scopes,
+            },
+            separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text):
+        "Deserialize an index which was serialized with `to_json`."
+        data = json.loads(text)
+        return cls(data['digest'], data['lines'], dict(data['comments']), data['scopes'])
+
+
+def source_digest(source):
+    "The hex digest of the code of a module."
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+@functools.lru_cache(maxsize=16)
+def source_index(source):
+    """Build the `SourceIndex` of the code of a module.
+
+    The indices of the most recently indexed modules are cached, so that
+    everything which indexes a module in the same process shares one index.
+
+    Code which can't be tokenized or parsed is indexed as far as possible.
+    """
+    return SourceIndex(
+        source_digest(source),
+        (len(line) for line in io.StringIO(source).readlines()),
+        _comments(source),
+        _scopes(source))
+
+
+def _comments(source):
+    comments = {}
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type == tokenize.COMMENT:
+                comments[token.start[0]] = token.string
+    except (tokenize.TokenError, SyntaxError):
+        pass
+    return comments
+
+
+def _scopes(source):
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    scopes = []
+    # The nodes to visit, with the qualified names of their enclosing scopes.
+    stack = [(tree, ())]
+    while stack:
+        node, names = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names = names + (node.name,)
+            kind = 'class' if isinstance(node, ast.ClassDef) else 'def'
+            scopes.append((node.lineno, getattr(node, 'end_lineno', node.lineno), kind, '.'.join(names)))
+        stack.extend((child, names) for child in reversed(list(ast.iter_child_nodes(node))))
+
+    scopes.sort(key=lambda scope: scope[0])
+    return scopes
@@ -0,0 +1,305 @@
+"""Selection of the tests to run for mutants of a module.
+
+Rather than running the entire test suite for every mutant, Cosmic Ray can
+restrict a test run to the tests which can possibly exercise the mutated
+module. The "import-graph" method does this statically: it parses the modules
+under test and the test modules, builds a graph of their imports, and selects
+for each module the test files which transitively import it.
+
+Test selection is configured like this::
+
+    [cosmic-ray.test-selection]
+    method = "import-graph"
+    test-paths = ["tests"]
+    test-file-pattern = "test*.py"
+    source-roots = ["."]
+
+The selected test files are plugged into the test command in place of the
+`{tests}` placeholder, e.g. `test-command = "python -m pytest {tests}"`.
+
+The imports of each file are cached in the session, keyed by the hash of the
+file's contents, so only files which have changed are re-parsed.
+"""
+
+import ast
+import fnmatch
+import hashlib
+import logging
+from collections import defaultdict
+from pathlib import Path
+
+from cosmic_ray.config import ConfigDict, ConfigValueError
+from cosmic_ray.modules import find_modules
+
+log = logging.getLogger(__name__)
+
+IMPORT_GRAPH = 'import-graph'
+
+
+def configure_test_selection(work_db, config):
+    """Store the tests selected for each module of a session in `config`.
+
+    This does nothing unless a test-selection method is configured. The
+    selection is used by `ConfigDict.test_command_for` to build the test
+    command for each module.
+
+    Args:
+        work_db: The session `WorkDB`.
+        config: The session `ConfigDict`. This is modified in place.
+    """
+    if 'method' not in config.sub('test-selection'):
+        return
+
+    log.info("Selecting tests")
+    selected = select_tests(work_db.module_paths, work_db, config)
+    config.setdefault('test-selection', ConfigDict())['selected'] = ConfigDict(selected)
+
+
+def select_tests(module_paths, work_db, config):
+    """Select the test files to run for each module in `module_paths`.
+
+    Args:
+        module_paths: An iterable of `pathlib.Path`s of the modules being mutated.
+        work_db: The `WorkDB` in which parsed imports are cached.
+        config: The session `ConfigDict`.
+
+    Returns: A dict mapping each module path (as a string) to a sorted list of
+        test file paths. Modules for which no test file could be found are
+        omitted; they are tested with the full test command.
+
+    Raises:
+        ConfigValueError: If the test-selection method is unknown, or if the
+            test command has no `{tests}` placeholder for the selected tests.
+    """
+    sel_config = config.sub('test-selection')
+    method = sel_config.get('method', IMPORT_GRAPH)
+    if method != IMPORT_GRAPH:
+        raise ConfigValueError('Unknown test-selection method: {}'.format(method))
+    if '{tests}' not in config.test_command:
+        raise ConfigValueError(
+            'Test selection is enabled, but the test-command has no {{tests}} placeholder: {}'.format(
+                config.test_command))
+
+    module_paths = set(Path(path) for path in module_paths)
+    graph, test_files = _import_graph(module_paths, work_db, sel_config)
+
+    selection = {}
+    for module_path in module_paths:
+        tests = sorted(str(path) for path in graph.importers(module_path) if path in test_files)
+        if tests:
+            selection[str(module_path)] = tests
+        else:
+            log.info('No tests import %s. It will be tested with the full test command.', module_path)
+
+    return selection
+
+
+def imported_modules(module_paths, work_db, config):
+    """Find the modules in `module_paths` which the selected tests of each of
+    them import.
+
+    The outcome of a mutant can only depend on the code of these modules,
+    besides that of the mutated module.
+
+    Args:
+        module_paths: An iterable of the paths of the modules being mutated.
+        work_db: The `WorkDB` in which parsed imports are cached.
+        config: The session `ConfigDict`, with the selected tests (see
+            `configure_test_selection`).
+
+    Returns: A dict mapping module paths (as strings) to sets of the paths (as
+        strings) of the modules which their selected tests import, directly or
+        indirectly. Modules without selected tests are omitted.
+    """
+    selected = config.sub('test-selection', 'selected')
+    if not selected:
+        return {}
+
+    module_paths = set(Path(path) for path in module_paths)
+    graph, _ = _import_graph(module_paths, work_db, config.sub('test-selection'))
+
+    imported = {}
+    for module_path, tests in selected.items():
+        imports = set()
+        for test in tests:
+            imports.update(graph.imports(Path(test)))
+        imported[module_path] = set(str(path) for path in imports & module_paths)
+        imported[module_path].discard(module_path)
+    return imported
+
+
+def _import_graph(module_paths, work_db, sel_config):
+    """Build the `ImportGraph` of the modules being mutated and the test modules.
+
+    Returns: A tuple of the graph and the set of paths of the test files.
+    """
+    test_paths = sel_config.get('test-paths', ['tests'])
+    pattern = sel_config.get('test-file-pattern', 'test*.py')
+    roots = [Path(root) for root in sel_config.get('source-roots', ['.'])]
+
+    test_modules = set(
+        path
+        for test_path in test_paths
+        for path in find_modules(Path(test_path)))
+    test_files = set(path for path in test_modules if fnmatch.fnmatch(path.name, pattern))
+
+    return ImportGraph(set(module_paths) | test_modules, roots, work_db), test_files
+
+
+class ImportGraph:
+    """A static graph of the imports between a set of Python files.
+
+    Args:
+        paths: An iterable of `pathlib.Path`s of the files in the graph.
+        roots: The directories relative to which module names are determined.
+        work_db: The `WorkDB` in which parsed imports are cached.
+    """
+
+    def __init__(self, paths, roots, work_db):
+        paths = set(paths)
+        names = {path: _module_name(path, roots) for path in paths}
+        self._paths_by_name = {name: path for path, name in names.items() if name is not None}
+
+        imports = _load_imports(paths, names, work_db)
+
+        self._importers = defaultdict(set)
+        self._imports = defaultdict(set)
+        for path, imported_names in imports.items():
+            for name in imported_names:
+                imported = self._paths_by_name.get(name)
+                if imported is not None and imported != path:
+                    self._importers[imported].add(path)
+                    self._imports[path].add(imported)
+
+    def importers(self, path):
+        """All files which transitively import `path`.
+
+        Returns: A set of `pathlib.Path`s. This does not include `path` itself.
+        """
+        return _reachable(self._importers, Path(path))
+
+    def imports(self, path):
+        """All files which `path` transitively imports.
+
+        Returns: A set of `pathlib.Path`s. This does not include `path` itself.
+        """
+        return _reachable(self._imports, Path(path))
+
+
+def _reachable(edges, path):
+    "All paths reachable from `path` through `edges`, excluding `path` itself."
+    seen = set()
+    pending = [path]
+    while pending:
+        for neighbour in edges.get(pending.pop(), ()):
+            if neighbour not in seen:
+                seen.add(neighbour)
+                pending.append(neighbour)
+    seen.discard(path)
+    return seen
+
+
+def _load_imports(paths, names, work_db):
+    """Get the imported module names for each file in `paths`.
+
+    Cached imports are used for files whose hash has not changed. Others are
+    parsed and written back to the cache.
+
+    Returns: A dict mapping paths to sets of absolute module names.
+    """
+    cached = work_db.import_graph
+    imports = {}
+    updates = []
+    for path in paths:
+        with path.open(mode='rb') as handle:
+            source = handle.read()
+        digest = hashlib.sha1(source).hexdigest()
+
+        entry = cached.get(str(path))
+        if entry is not None and entry[0] == digest:
+            imports[path] = set(entry[1])
+            continue
+
+        imports[path] = _parse_imports(source, path, names[path])
+        updates.append((str(path), digest, sorted(imports[path])))
+
+    if updates:
+        log.info('Parsed imports of %s files', len(updates))
+        work_db.update_import_graph(updates)
+
+    return imports
+
+
+def _module_name(path, roots):
+    """Determine the dotted module name of the file at `path`.
+
+    Returns: The module name, or `None` if `path` is not under any of `roots`.
+    """
+    for root in roots:
+        try:
+            rel = path.resolve().relative_to(root.resolve())
+        except ValueError:
+            continue
+
+        parts = list(rel.with_suffix('').parts)
+        if parts and parts[-1] == '__init__':
+            parts.pop()
+        if parts:
+            return '.'.join(parts)
+
+    return None
+
+
+def _parse_imports(source, path, name):
+    """Find all of the modules imported by `source`.
+
+    Since the graph is static, this finds every import in the file, including
+    those in functions and conditional blocks. For each imported module, the
+    packages containing it are included as well since they are imported
+    implicitly.
+
+    Returns: A set of absolute module names.
+    """
+    try:
+        tree = ast.parse(source, filename=str(path))
+    except (SyntaxError, ValueError):
+        log.warning('Unable to parse %s. Its imports are ignored for test selection.', path)
+        return set()
+
+    package = name
+    if name is not None and path.name != '__init__.py':
+        package = name.rpartition('.')[0]
+
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = _resolve_relative(node.module, node.level, package)
+            if base is None:
+                continue
+            imported.add(base)
+            # `from package import name` may import a submodule.
+            imported.update('{}.{}'.format(base, alias.name) for alias in node.names if alias.name != '*')
+
+    return set(
+        '.'.join(parts[:count])
+        for parts in (imported_name.split('.') for imported_name in imported)
+        for count in range(1, len(parts) + 1))
+
+
+def _resolve_relative(module, level, package):
+    "Get the absolute name for a (possibly relative) import-from."
+    if level == 0:
+        return module
+
+    if package is None:
+        return None
+
+    parts = package.split('.') if package else []
+    if level - 1 > len(parts):
+        return None
+    parts = parts[:len(parts) - (level - 1)]
+    if module:
+        parts.append(module)
+    return '.'.join(parts) or None
@@ -2,8 +2,11 @@
 
 import asyncio
 import os
+import re
+import signal
 import sys
 import traceback
+from collections import Counter, defaultdict
 
 from cosmic_ray.work_item import TestOutcome
 
@@ -15,25 +18,55 @@ from cosmic_ray.work_item import TestOutcome
 # work on all platforms.
 
 
-async def _run_tests(command, timeout):
+# Patterns which identify a failed test in the verbose output of common test
+# runners. Each has a "test" group which captures the ID of the test.
+FAILURE_PATTERNS = (
+    # pytest -v: "tests/test_foo.py::test_bar FAILED"
+    r'^(?P<test>\S+::\S+) (?:FAILED|ERROR)\b',
+    # unittest -v: "test_bar (tests.test_foo.Tests) ... FAIL"
+    r'^(?P<method>\w+) \((?P<test>[\w.]+)\)(?:\n.*)? \.\.\. (?:FAIL|ERROR)$',
+)
+
+# Patterns which match the final summary of common test runners, and the
+# names of the counts in them which are failed tests.
+_SUMMARY_PATTERNS = (
+    # pytest: "==== 1 failed, 2 passed in 0.05s ===="
+    (r'^=*\s*(?P<counts>\d+ \w+(?:, \d+ \w+)*) in \d', r'(?P<count>\d+) (?P<name>\w+)',
+     {'failed', 'error', 'errors'}),
+    # unittest: "FAILED (failures=1, errors=2)"
+    (r'^FAILED \((?P<counts>[^)]*)\)$', r'(?P<name>[\w ]+)=(?P<count>\d+)',
+     {'failures', 'errors', 'unexpected successes'}),
+)
+
+
+async def _run_tests(command, timeout, failure_patterns, ignored_tests=(), extra_env=None):
     # We want to avoid writing pyc files in case our changes happen too fast for Python to
     # notice them. If the timestamps between two changes are too small, Python won't recompile
     # the source.
     env = dict(os.environ)
     env['PYTHONDONTWRITEBYTECODE'] = '1'
+    env.update(extra_env or {})
 
     try:
         proc = await asyncio.create_subprocess_shell(
             command,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.STDOUT,
-            env=env)
+            env=env,
+            start_new_session=True)
     except Exception:  # pylint: disable=W0703
         return (TestOutcome.INCOMPETENT, traceback.format_exc())
 
     try:
-        outs, errs = await asyncio.wait_for(proc.communicate(), timeout)
+        outs, failed = await asyncio.wait_for(
+            _read_output(proc, failure_patterns, ignored_tests), timeout)
+
+        if failed:
+            # Fail-fast: one failing test is enough to kill the mutant.
+            _terminate(proc)
+            return (TestOutcome.KILLED, outs.decode('utf-8', 'replace'))
 
+        await proc.wait()
         assert proc.returncode is not None
 
         if proc.returncode == 0:
@@ -42,18 +75,109 @@ async def _run_tests(command, timeout):
             return (TestOutcome.KILLED, outs.decode('utf-8'))
 
     except asyncio.TimeoutError:
-        proc.terminate()
+        _terminate(proc)
         return (TestOutcome.KILLED, 'timeout')
-        
+
     except Exception:  # pylint: disable=W0703
-        proc.terminate()
+        _terminate(proc)
         return (TestOutcome.INCOMPETENT, traceback.format_exc())
 
     finally:
         await proc.wait()
 
 
-def run_tests(command, timeout=None):
+async def _read_output(proc, failure_patterns, ignored_tests):
+    """Read the output of `proc` until it closes its output or a test fails.
+
+    Returns: A tuple `(output, failed)` where `output` is the bytes read and
+        `failed` indicates whether one of `failure_patterns` matched a line of
+        the output for a test not in `ignored_tests`.
+    """
+    chunks = []
+    partial = b''
+    while True:
+        chunk = await proc.stdout.read(4096)
+        if not chunk:
+            return b''.join(chunks), False
+
+        chunks.append(chunk)
+        if failure_patterns:
+            lines = (partial + chunk).split(b'\n')
+            partial = lines.pop()
+            text = '\n'.join(line.decode('utf-8', 'replace') for line in lines)
+            if find_failed_test(text, failure_patterns, ignored_tests) is not None:
+                return b''.join(chunks), True
+
+
+def _terminate(proc):
+    "Terminate a test process along with any processes it has started."
+    if proc.returncode is not None:
+        return
+
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.terminate()
+
+
+def find_failed_tests(output, failure_patterns=FAILURE_PATTERNS):
+    """Find all of the failed tests reported in the output of a test run.
+
+    Args:
+        output: The output of the test command.
+        failure_patterns: Regular expressions identifying failed tests. Each
+            must have a named group "test" which captures the ID of the test.
+
+    Returns: An iterable of the IDs of the failed tests.
+    """
+    for pattern in failure_patterns:
+        for match in re.finditer(pattern, output, re.MULTILINE):
+            test = match.group('test')
+            method = match.groupdict().get('method')
+            # Before Python 3.11, unittest reports only the class of a test in
+            # parentheses.
+            if method and not test.endswith('.' + method):
+                test = '{}.{}'.format(test, method)
+            yield test
+
+
+def find_failed_test(output, failure_patterns=FAILURE_PATTERNS, ignored_tests=()):
+    """Find the first failed test reported in the output of a test run.
+
+    Args:
+        output: The output of the test command.
+        failure_patterns: Regular expressions identifying failed tests. See
+            `find_failed_tests`.
+        ignored_tests: The IDs of tests whose failures are ignored.
+
+    Returns: The ID of the first failed test, or `None` if no failure is found.
+    """
+    return next(
+        (test for test in find_failed_tests(output, failure_patterns) if test not in ignored_tests),
+        None)
+
+
+def count_failures(output):
+    """Count the failed tests in the final summary of a test run.
+
+    This recognizes the summaries of pytest and unittest.
+
+    Returns: The number of tests which failed or had errors, or `None` if
+        the output has no summary.
+    """
+    count = None
+    for pattern, count_pattern, names in _SUMMARY_PATTERNS:
+        for match in re.finditer(pattern, output, re.MULTILINE):
+            count = sum(int(count_match.group('count'))
+                        for count_match in re.finditer(count_pattern, match.group('counts'))
+                        if count_match.group('name').strip() in names)
+    return count
+
+
+def run_tests(command, timeout=None, failure_patterns=None, ignored_tests=(), extra_env=None):
     """Run test command in a subprocess.
 
     If the command exits with status 0, then we assume that all tests passed. If
@@ -62,18 +186,85 @@ def run_tests(command, timeout=None):
 
     Tests which time out are considered 'killed' as well.
 
+    If `failure_patterns` are provided, the test run is stopped as soon as one
+    of them matches a line of output (i.e. a test has failed), and the tests
+    are considered 'killed'.
+
     Args:
         command (str): The command to execute.
         timeout (number): The maximum number of seconds to allow the tests to run.
+        failure_patterns: An optional sequence of regular expressions used to
+            fail fast. See `find_failed_tests`.
+        ignored_tests: The IDs of tests whose failures don't stop the test run.
+        extra_env: An optional dict of environment variables to set for the command.
 
     Return: A tuple `(TestOutcome, output)` where the `output` is a string
         containing the output of the command.
     """
 
+    result = _event_loop().run_until_complete(
+        _run_tests(command, timeout, failure_patterns, ignored_tests, extra_env))
+    return result
+
+
+def run_tests_concurrently(command, count, timeout=None):
+    """Run `count` instances of a test command concurrently.
+
+    Args:
+        command (str): The command to execute.
+        count (int): The number of instances to run.
+        timeout (number): The maximum number of seconds to allow each instance to run.
+
+    Return: A list of `(TestOutcome, output)` tuples, one for each instance.
+    """
+    async def _run_all():
+        return await asyncio.gather(
+            *(_run_tests(command, timeout, None) for _ in range(count)))
+
+    return _event_loop().run_until_complete(_run_all())
+
+
+def _event_loop():
     if sys.platform == "win32":
         asyncio.set_event_loop_policy(
             asyncio.WindowsProactorEventLoopPolicy())
 
-    result = asyncio.get_event_loop().run_until_complete(
-        _run_tests(command, timeout))
-    return result
+    return asyncio.get_event_loop()
+
+
+class KillHistory:
+    """A record of which tests have killed mutants.
+
+    Kills are recorded per module and per function within a module. Tests which
+    killed mutants in the same function, and then in the same module, are
+    likely to kill other mutants there too, so they are good candidates to run
+    first.
+    """
+
+    def __init__(self):
+        self._kills = defaultdict(Counter)
+
+    def record(self, module_path, function, test):
+        """Record that `test` killed a mutant in `function` of `module_path`.
+
+        Args:
+            module_path: The path of the mutated module.
+            function: The qualified name of the mutated function, or `None`
+                for module-level code.
+            test: The ID of the killing test.
+        """
+        self._kills[(str(module_path), function)][test] += 1
+        if function is not None:
+            self._kills[(str(module_path), None)][test] += 1
+
+    def tests(self, module_path, function, limit):
+        """The tests most likely to kill a mutant in `function` of `module_path`.
+
+        Returns: A list of at most `limit` test IDs, most likely first.
+        """
+        tests = []
+        for key in ((str(module_path), function), (str(module_path), None)):
+            for test, _ in self._kills.get(key, Counter()).most_common():
+                if test not in tests:
+                    tests.append(test)
+        return tests[:limit]
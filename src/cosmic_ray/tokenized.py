@@ -0,0 +1,232 @@
+"""A fast alternative to parso for finding the mutations in a module.
+
+The module is analyzed with the standard library's `tokenize` and `ast`
+modules, which are much faster than parso. Operators opt in by implementing
+`Operator.token_mutations`, which describes each mutation as a splice of the
+module's text. Operators which don't, and modules which can't be analyzed
+this way, are handled with parso as usual.
+"""
+import ast
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+import io
+import sys
+import tokenize
+
+from cosmic_ray.mutating import minimal_splice
+
+# A mutation found by `Operator.token_mutations`.
+#
+# `node_start` and `node_end` are the positions of the parso node which the
+# operator mutates, and they determine the order of the mutations. The
+# mutation is at `start_pos` to `end_pos`, and it replaces the characters
+# from `start-offset` up to `end-offset` of the module with `replacement`,
+# where `splice` is the `(start-offset, end-offset, replacement)` tuple.
+TokenMutation = namedtuple('TokenMutation', 'node_start node_end start_pos end_pos splice')
+
+# Tokens which parso puts in the prefix of the next token.
+_PREFIX_TOKENS = frozenset((tokenize.COMMENT, tokenize.NL, tokenize.INDENT, tokenize.DEDENT))
+
+
+def tokenize_module(code, python_version):
+    """Analyze the code of a module with `tokenize` and `ast`.
+
+    Args:
+        code: The code of the module.
+        python_version: The version of Python of the code.
+
+    Returns: A `TokenizedModule`, or `None` if the module has to be analyzed
+        with parso. This is the case if `python_version` isn't the version
+        running Cosmic Ray, if the code doesn't compile, or if it contains
+        f-strings, whose contents the versions of `tokenize` and parso treat
+        differently.
+    """
+    if python_version != '{}.{}'.format(*sys.version_info[:2]) or sys.version_info < (3, 8):
+        return None
+
+    # parso and tokenize count lines and columns differently for these.
+    if code.startswith('\ufeff') or '\r' in code:
+        return None
+
+    try:
+        tree = ast.parse(code)
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (SyntaxError, ValueError, tokenize.TokenError):
+        return None
+
+    if any(token.type == tokenize.ERRORTOKEN for token in tokens):
+        return None
+    if any(isinstance(node, ast.JoinedStr) for node in ast.walk(tree)):
+        return None
+
+    return TokenizedModule(code, tree, tokens)
+
+
+class TokenizedModule:
+    """The tokens and the standard library AST of a module.
+
+    Positions are `(line, column)` tuples with the same meaning as for parso.
+    Tokens are `(type, string, start-pos, end-pos)` tuples, and they are
+    referred to by their index in `tokens`. Comments, blank lines and
+    indentation are not included in `tokens`: parso puts them in the prefix
+    of the next token.
+    """
+
+    def __init__(self, code, tree, tokens):
+        self.code = code
+        self.tree = tree
+        self._lines = code.split('\n')
+        self._nodes = None
+
+        # Results which several operators need, e.g. all of the operators
+        # which replace binary operators, can be stored here.
+        self.cache = {}
+
+        self.offsets = []
+        offset = 0
+        for line in self._lines:
+            self.offsets.append(offset)
+            offset += len(line) + 1
+
+        self.tokens = []
+        for token in tokens:
+            if token.type in _PREFIX_TOKENS or token.type == tokenize.ENDMARKER:
+                continue
+            end = token.end
+            if token.type == tokenize.NEWLINE and token.string:
+                # parso's newlines end at the start of the next line.
+                end = (token.start[0] + 1, 0)
+            self.tokens.append((token.type, token.string, token.start, end))
+        self._starts = [token[2] for token in self.tokens]
+
+    def nodes(self, *node_types):
+        "All nodes of the AST whose type is one of `node_types`."
+        if self._nodes is None:
+            self._nodes = defaultdict(list)
+            for node in ast.walk(self.tree):
+                self._nodes[type(node)].append(node)
+        return [node for node_type in node_types for node in self._nodes.get(node_type, ())]
+
+    def offset(self, position):
+        "The offset in the code of a position."
+        line, column = position
+        return self.offsets[line - 1] + column
+
+    def start(self, node):
+        "The start position of an AST node."
+        return (node.lineno, self._column(node.lineno, node.col_offset))
+
+    def end(self, node):
+        "The end position of an AST node."
+        return (node.end_lineno, self._column(node.end_lineno, node.end_col_offset))
+
+    def _column(self, line, col_offset):
+        # AST columns are offsets into the UTF-8 encoding of the line.
+        text = self._lines[line - 1]
+        if text.isascii():
+            return col_offset
+        return len(text.encode('utf-8')[:col_offset].decode('utf-8'))
+
+    def token_at(self, position):
+        """The index of the token which starts at `position`.
+
+        Raises:
+            ValueError: If no token starts at `position`.
+        """
+        index = bisect_left(self._starts, position)
+        if index == len(self._starts) or self._starts[index] != position:
+            raise ValueError('no token at {}'.format(position))
+        return index
+
+    def span(self, node):
+        """The indices of the first and last tokens of an AST node, including
+        any parentheses around it.
+
+        Raises:
+            ValueError: If the tokens of the node can't be found.
+        """
+        first = self.token_at(self.start(node))
+        end = self.end(node)
+        last = bisect_left(self._starts, end) - 1
+        if last < first or self.tokens[last][3] != end:
+            raise ValueError('no token ends at {}'.format(end))
+
+        while first > 0 and last + 1 < len(self.tokens) and \
+                self.is_op(first - 1, '(') and self.is_op(last + 1, ')'):
+            first -= 1
+            last += 1
+        return first, last
+
+    def is_op(self, index, string):
+        "Whether the token at `index` is the operator `string`."
+        token = self.tokens[index]
+        return token[0] == tokenize.OP and token[1] == string
+
+    def is_name(self, index, string):
+        "Whether the token at `index` is the name or keyword `string`."
+        token = self.tokens[index]
+        return token[0] == tokenize.NAME and token[1] == string
+
+    def prefix_start(self, index):
+        """The offset of the start of the prefix of the token at `index`, i.e.
+        of the end of the token before it.
+        """
+        if index == 0:
+            return 0
+        return self.offset(self.tokens[index - 1][3])
+
+    def mutation(self, node_start, node_end, first, last, replacement, prefix=False):
+        """Make a `TokenMutation` which replaces the tokens from `first` to
+        `last` (inclusive) with `replacement`.
+
+        If `prefix` is true, the prefix of the first token is replaced as
+        well.
+        """
+        start_pos = self.tokens[first][2]
+        end_pos = self.tokens[last][3]
+        start_offset = self.prefix_start(first) if prefix else self.offset(start_pos)
+        return TokenMutation(
+            node_start, node_end, start_pos, end_pos,
+            (start_offset, self.offset(end_pos), replacement))
+
+    def token_mutation(self, index, replacement):
+        """Make a `TokenMutation` for the mutation of a single token which is
+        the node being mutated.
+        """
+        _, _, start, end = self.tokens[index]
+        return self.mutation(start, end, index, index, replacement)
+
+    def trimmed_splice(self, mutation):
+        """The splice of a `TokenMutation`, shrunk to the text which changes
+        in the same way as `mutating.mutation_splice` would shrink it.
+
+        parso shrinks the change to the whole node being mutated, so text
+        which is only inserted or removed is moved as far towards the end
+        of the node as it can go.
+        """
+        start_offset, end_offset, replacement = minimal_splice(
+            self.code[mutation.splice[0]:mutation.splice[1]], *mutation.splice)
+        limit = self.offset(mutation.node_end)
+        code = self.code
+        if start_offset == end_offset:
+            while replacement and end_offset < limit and code[end_offset] == replacement[0]:
+                replacement = replacement[1:] + replacement[0]
+                start_offset += 1
+                end_offset += 1
+        elif not replacement:
+            while end_offset < limit and code[start_offset] == code[end_offset]:
+                start_offset += 1
+                end_offset += 1
+        return start_offset, end_offset, replacement
+
+
+def sorted_mutations(mutations):
+    """Sort `TokenMutation`s into the order in which a walk of the parso
+    tree would find them.
+
+    Nodes are walked in pre-order, so a node comes before the nodes it
+    contains. The mutations of a single node keep their order.
+    """
+    return sorted(
+        mutations,
+        key=lambda mutation: (mutation.node_start, (-mutation.node_end[0], -mutation.node_end[1])))
@@ -7,6 +7,7 @@ from itertools import chain
 import docopt
 from yattag import Doc
 
+from cosmic_ray.mutating import render_diffs
 from cosmic_ray.work_db import WorkDB, use_db
 from cosmic_ray.work_item import TestOutcome
 from cosmic_ray.tools.survival_rate import survival_rate
@@ -53,7 +54,7 @@ def _generate_html_report(db, only_completed, skip_success):
                     with tag('p', klass='text-dark'):
                         text('Cosmic Ray Report')
 
-            all_items = db.completed_work_items
+            all_items = render_diffs(db.completed_work_items, db.source_digests)
             if not only_completed:
                 incomplete = ((item, None) for item in db.pending_work_items)
                 all_items = chain(all_items, incomplete)
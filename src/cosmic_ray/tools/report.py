@@ -2,6 +2,7 @@
 
 import docopt
 
+from cosmic_ray.mutating import render_diffs
 from cosmic_ray.work_db import use_db, WorkDB
 from cosmic_ray.tools.survival_rate import survival_rate
 
@@ -25,7 +26,10 @@ options:
     show_diff = arguments['--show-diff']
 
     with use_db(arguments['<session-file>'], WorkDB.Mode.open) as db:
-        for work_item, result in db.completed_work_items:
+        completed = db.completed_work_items
+        if show_diff:
+            completed = render_diffs(completed, db.source_digests)
+        for work_item, result in completed:
             print('{} {} {} {}'.format(work_item.job_id, work_item.module_path,
                                        work_item.operator_name,
                                        work_item.occurrence))
@@ -5,6 +5,7 @@ import xml.etree.ElementTree
 
 import docopt
 
+from cosmic_ray.mutating import render_diffs
 from cosmic_ray.work_db import use_db, WorkDB
 from cosmic_ray.work_item import TestOutcome, WorkerOutcome
 
@@ -29,7 +30,7 @@ def _create_xml_report(db):
     skipped = 0
     root_elem = xml.etree.ElementTree.Element('testsuite')
 
-    for work_item, result in db.completed_work_items:
+    for work_item, result in render_diffs(db.completed_work_items, db.source_digests):
         if result.worker_outcome in {
                 WorkerOutcome.EXCEPTION, WorkerOutcome.ABNORMAL
         }:
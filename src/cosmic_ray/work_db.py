@@ -1,11 +1,13 @@
 """Implementation of the WorkDB."""
 
 import contextlib
+import json
 import os
 import sqlite3
 from enum import Enum
 
 from .config import deserialize_config, serialize_config
+from .source_index import SourceIndex
 from .work_item import TestOutcome, WorkerOutcome, WorkItem, WorkResult
 
 
@@ -92,7 +94,7 @@ class WorkDB:
         This includes both WorkItems with and without results.
         """
         cur = self._conn.cursor()
-        rows = cur.execute("SELECT * FROM work_items")
+        rows = cur.execute(_SELECT_WORK_ITEMS)
         for row in rows:
             yield _row_to_work_item(row)
 
@@ -102,6 +104,12 @@ class WorkDB:
         count = self._conn.execute("SELECT COUNT(*) FROM work_items")
         return list(count)[0][0]
 
+    @property
+    def module_paths(self):
+        """The set of paths (as strings) of all modules with work items."""
+        rows = self._conn.execute("SELECT DISTINCT module_path FROM work_items")
+        return set(row['module_path'] for row in rows)
+
     def add_work_item(self, work_item):
         """Add a WorkItems.
 
@@ -112,17 +120,49 @@ class WorkDB:
             self._conn.execute(
                 '''
                 INSERT INTO work_items
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', _work_item_to_row(work_item))
 
+    def add_work_items(self, work_items, results=(), duplicates=()):
+        """Add many WorkItems, and the results and duplicates of some of them,
+        in a single transaction.
+
+        Args:
+          work_items: An iterable of WorkItems.
+          results: An iterable of `(job-id, WorkResult)` tuples.
+          duplicates: An iterable of `(job-id, duplicate-of-job-id)` tuples.
+
+        Raises:
+           KeyError: If a result is for an unknown job-id.
+        """
+        with self._conn:
+            self._conn.executemany(
+                '''
+                INSERT INTO work_items
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (_work_item_to_row(work_item) for work_item in work_items))
+            try:
+                self._conn.executemany(
+                    '''
+                    REPLACE INTO results
+                    VALUES (?, ?, ?, ?, ?)
+                    ''', (_work_result_to_row(job_id, result)
+                          for job_id, result in results))
+            except sqlite3.IntegrityError as exc:
+                raise KeyError('Can not add results for unknown job-ids') from exc
+            self._conn.executemany(
+                'REPLACE INTO duplicates VALUES (?, ?)', duplicates)
+
     def clear(self):
         """Clear all work items from the session.
 
         This removes any associated results as well.
         """
         with self._conn:
+            self._conn.execute('DELETE FROM duplicates')
             self._conn.execute('DELETE FROM results')
             self._conn.execute('DELETE FROM work_items')
+            self._conn.execute('DELETE FROM source_index')
 
     @property
     def results(self):
@@ -161,11 +201,54 @@ class WorkDB:
                 raise KeyError('Can not add result with job-id {}'.format(
                     job_id)) from exc
 
+    def set_results(self, results):
+        """Set the results for many jobs at once.
+
+        This is equivalent to calling `set_result` for each result, but it
+        writes all of the results in a single transaction.
+
+        Args:
+          results: An iterable of `(job-id, WorkResult)` tuples.
+
+        Raises:
+           KeyError: If there is no work-item with a matching job-id.
+        """
+        with self._conn:
+            try:
+                self._conn.executemany(
+                    '''
+                    REPLACE INTO results
+                    VALUES (?, ?, ?, ?, ?)
+                    ''', (_work_result_to_row(job_id, result)
+                          for job_id, result in results))
+            except sqlite3.IntegrityError as exc:
+                raise KeyError('Can not add results for unknown job-ids') from exc
+
+    @property
+    def duplicates(self):
+        """The duplicate mutants of the session.
+
+        Returns: A dict mapping the job-id of each duplicate mutant to the
+            job-id of the mutant it duplicates.
+        """
+        rows = self._conn.execute("SELECT * FROM duplicates")
+        return {row['job_id']: row['duplicate_of'] for row in rows}
+
+    def add_duplicates(self, duplicates):
+        """Record duplicate mutants.
+
+        Args:
+          duplicates: An iterable of `(job-id, duplicate-of-job-id)` tuples.
+        """
+        with self._conn:
+            self._conn.executemany(
+                'REPLACE INTO duplicates VALUES (?, ?)', duplicates)
+
     @property
     def pending_work_items(self):
         "Iterable of all pending work items."
         pending = self._conn.execute(
-            "SELECT * FROM work_items WHERE job_id NOT IN (SELECT job_id FROM results)"
+            _SELECT_WORK_ITEMS + " WHERE work_items.job_id NOT IN (SELECT job_id FROM results)"
         )
         return (_row_to_work_item(p) for p in pending)
 
@@ -173,11 +256,102 @@ class WorkDB:
     def completed_work_items(self):
         "Iterable of `(work-item, result)`s for all completed items."
         completed = self._conn.execute(
-            "SELECT * FROM work_items, results WHERE work_items.job_id == results.job_id"
+            "SELECT work_items.*, source_index.digest AS source_digest, results.* FROM work_items"
+            " JOIN results ON results.job_id == work_items.job_id"
+            " LEFT JOIN source_index ON source_index.module_path == work_items.module_path"
         )
         return ((_row_to_work_item(result), _row_to_work_result(result))
                 for result in completed)
 
+    @property
+    def import_graph(self):
+        """The cached import graph of the session.
+
+        Returns: A dict mapping file paths to `(digest, imports)` tuples, where
+            `digest` is the hash of the file's contents when its imports were
+            parsed and `imports` is a list of imported module names.
+        """
+        rows = self._conn.execute("SELECT * FROM import_graph")
+        return {
+            row['path']: (row['digest'], json.loads(row['imports']))
+            for row in rows
+        }
+
+    def update_import_graph(self, entries):
+        """Add or replace entries in the cached import graph.
+
+        Args:
+          entries: An iterable of `(path, digest, imports)` tuples.
+        """
+        with self._conn:
+            self._conn.executemany(
+                'REPLACE INTO import_graph VALUES (?, ?, ?)',
+                ((path, digest, json.dumps(list(imports)))
+                 for path, digest, imports in entries))
+
+    @property
+    def baseline(self):
+        """The durations of the baseline test runs of the session.
+
+        Returns: A dict mapping module paths to lists of durations (seconds)
+            of the test runs for those modules. The durations of runs of the
+            full test suite are under the key `None`.
+        """
+        baseline = {}
+        for row in self._conn.execute("SELECT * FROM baseline"):
+            baseline.setdefault(row['module_path'], []).append(row['duration'])
+        return baseline
+
+    def set_baseline(self, durations):
+        """Set (replace) the durations of the baseline test runs.
+
+        Args:
+          durations: A dict in the form returned by `baseline`.
+        """
+        with self._conn:
+            self._conn.execute("DELETE FROM baseline")
+            self._conn.executemany(
+                'INSERT INTO baseline VALUES (?, ?)',
+                ((None if module_path is None else str(module_path), duration)
+                 for module_path, module_durations in durations.items()
+                 for duration in module_durations))
+
+    def set_source_index(self, module_path, index):
+        """Set (replace) the `SourceIndex` of a module.
+
+        Args:
+          module_path: The path of the module.
+          index: A `cosmic_ray.source_index.SourceIndex`.
+        """
+        with self._conn:
+            self._conn.execute(
+                'REPLACE INTO source_index VALUES (?, ?, ?)',
+                (str(module_path), index.digest, index.to_json()))
+
+    def get_source_index(self, module_path):
+        """Get the `SourceIndex` of a module, as it was when the session was
+        initialized.
+
+        Returns: A `cosmic_ray.source_index.SourceIndex`, or `None` if the
+            session has no index for the module.
+        """
+        rows = list(self._conn.execute(
+            'SELECT data FROM source_index WHERE module_path = ?', (str(module_path),)))
+        if not rows:
+            return None
+        return SourceIndex.from_json(rows[0]['data'])
+
+    @property
+    def source_digests(self):
+        """The digests of the code of the modules when the session was
+        initialized.
+
+        Returns: A dict mapping module paths (as strings) to the digests of
+            their code (see `cosmic_ray.source_index.source_digest`).
+        """
+        rows = self._conn.execute('SELECT module_path, digest FROM source_index')
+        return {row['module_path']: row['digest'] for row in rows}
+
     # @property
     # def num_pending_work_items(self):
     #     "The number of pending WorkItems in the session."
@@ -199,9 +373,19 @@ class WorkDB:
              start_col int,
              end_line int,
              end_col int,
-             job_id text primary key)
+             job_id text primary key,
+             start_offset int,
+             end_offset int,
+             replacement text)
             ''')
 
+            # Sessions created before work items had splices lack their columns.
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(work_items)')}
+            for column, column_type in (('start_offset', 'int'), ('end_offset', 'int'), ('replacement', 'text')):
+                if column not in columns:
+                    self._conn.execute(
+                        'ALTER TABLE work_items ADD COLUMN {} {}'.format(column, column_type))
+
             self._conn.execute('''
             CREATE TABLE IF NOT EXISTS results
             (worker_outcome text,
@@ -213,23 +397,65 @@ class WorkDB:
             )
             ''')
 
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS duplicates
+            (job_id text primary key,
+             duplicate_of text,
+             FOREIGN KEY(job_id) REFERENCES work_items(job_id),
+             FOREIGN KEY(duplicate_of) REFERENCES work_items(job_id)
+            )
+            ''')
+
             self._conn.execute('''
             CREATE TABLE IF NOT EXISTS config
             (config text)
             ''')
 
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS baseline
+            (module_path text,
+             duration real)
+            ''')
+
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS source_index
+            (module_path text primary key,
+             digest text,
+             data text)
+            ''')
+
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS import_graph
+            (path text primary key,
+             digest text,
+             imports text)
+            ''')
+
+
+# Work items are read with the digest of the code their module had at init.
+_SELECT_WORK_ITEMS = (
+    "SELECT work_items.*, source_index.digest AS source_digest FROM work_items"
+    " LEFT JOIN source_index ON source_index.module_path == work_items.module_path")
+
 
 def _row_to_work_item(row):
+    splice = None
+    if row['start_offset'] is not None:
+        splice = (row['start_offset'], row['end_offset'], row['replacement'])
+
     return WorkItem(
         module_path=row['module_path'],
         operator_name=row['operator'],
         occurrence=row['occurrence'],
         start_pos=(row['start_line'], row['start_col']),
         end_pos=(row['end_line'], row['end_col']),
-        job_id=row['job_id'])
+        job_id=row['job_id'],
+        splice=splice,
+        source_digest=row['source_digest'])
 
 
 def _work_item_to_row(work_item):
+    start_offset, end_offset, replacement = work_item.splice or (None, None, None)
     return (
         str(work_item.module_path),
         work_item.operator_name,
@@ -238,7 +464,10 @@ def _work_item_to_row(work_item):
         work_item.start_pos[1],
         work_item.end_pos[0],
         work_item.end_pos[1],
-        work_item.job_id)
+        work_item.job_id,
+        start_offset,
+        end_offset,
+        replacement)
 
 
 def _row_to_work_result(row):
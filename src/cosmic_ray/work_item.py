@@ -102,7 +102,9 @@ class WorkItem:
                  occurrence=None,
                  start_pos=None,
                  end_pos=None,
-                 job_id=None):
+                 job_id=None,
+                 splice=None,
+                 source_digest=None):
         if start_pos[0] > end_pos[0]:
             raise ValueError('Start line must not be after end line')
 
@@ -117,6 +119,8 @@ class WorkItem:
         self._start_pos = start_pos
         self._end_pos = end_pos
         self._job_id = job_id
+        self._splice = None if splice is None else tuple(splice)
+        self._source_digest = source_digest
 
     @property
     def module_path(self):
@@ -148,6 +152,24 @@ class WorkItem:
         "The unique ID of the job"
         return self._job_id
 
+    @property
+    def splice(self):
+        """The mutation as a change to the text of the module. Possibly `None`.
+
+        This is a `(start-offset, end-offset, replacement)` tuple: the mutated
+        code is the code of the module with the characters from `start-offset`
+        up to `end-offset` replaced by `replacement`. See
+        `cosmic_ray.mutating.mutation_splice`.
+        """
+        return self._splice
+
+    @property
+    def source_digest(self):
+        """The digest of the code of the module which the splice was made for
+        (see `cosmic_ray.source_index.source_digest`). Possibly `None`.
+        """
+        return self._source_digest
+
     def as_dict(self):
         """Get fields as a dict.
         """
@@ -158,6 +180,8 @@ class WorkItem:
             'start_pos': self.start_pos,
             'end_pos': self.end_pos,
             'job_id': self.job_id,
+            'splice': self.splice,
+            'source_digest': self.source_digest,
         }
 
     def __eq__(self, rhs):
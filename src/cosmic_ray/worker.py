@@ -1,22 +1,91 @@
 """This is the body of the low-level worker tool.
 """
 
-import difflib
+import logging
+import re
+import shlex
 import traceback
 
 import cosmic_ray.mutating
 import cosmic_ray.plugins
-from cosmic_ray.testing import run_tests
+import cosmic_ray.source_index
+from cosmic_ray.ast import get_cached_ast
+from cosmic_ray.exceptions import SourceChangedError
+from cosmic_ray.schemata import ACTIVE_MUTANT_VAR, install_schema, schema_module
+from cosmic_ray.source_index import source_index
+from cosmic_ray.testing import (FAILURE_PATTERNS, KillHistory, count_failures, find_failed_test, find_failed_tests,
+                                run_tests)
 from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
 
+log = logging.getLogger(__name__)
 
-# pylint: disable=R0913
+# The tests which have killed mutants in this worker process.
+_KILL_HISTORY = KillHistory()
+
+
+def run_work_item(work_item, config, flaky_tests=frozenset()):
+    """Run `worker` for a `WorkItem`, using the settings in `config`.
+
+    This is the entry point that execution engines use to process a work item.
+
+    Args:
+        work_item: The `WorkItem` to process.
+        config: The session `ConfigDict`.
+        flaky_tests: The IDs of tests found to be flaky by the pre-flight
+            check of the workspace (see `cosmic_ray.preflight`).
+
+    Returns: A WorkResult
+    """
+    # Kill-first runs need a test command into which the tests can be plugged.
+    kill_first = config.kill_first_config
+    kill_first_command = None
+    if kill_first.get('enabled', False) and '{tests}' in config.test_command:
+        def kill_first_command(tests):
+            return config.test_command_for(work_item.module_path, tests)
+
+    active_mutant = None
+    if schema_module(config, work_item.module_path):
+        install_schema(config, work_item.module_path)
+        active_mutant = work_item.job_id
+
+    return worker(
+        work_item.module_path,
+        config.python_version,
+        work_item.operator_name,
+        work_item.occurrence,
+        config.test_command_for(work_item.module_path),
+        config.timeout_for(work_item.module_path),
+        fail_fast=config.fail_fast,
+        failure_patterns=config.failure_patterns,
+        kill_first_command=kill_first_command,
+        kill_first_limit=kill_first.get('max-tests', 5),
+        flaky_tests=flaky_tests,
+        start_pos=work_item.start_pos,
+        end_pos=work_item.end_pos,
+        splice=work_item.splice,
+        source_digest=work_item.source_digest,
+        lazy_diff=config.lazy_diffs,
+        active_mutant=active_mutant)
+
+
+# pylint: disable=R0913,R0914
 def worker(module_path,
            python_version,
            operator_name,
            occurrence,
            test_command,
-           timeout):
+           timeout,
+           fail_fast=False,
+           failure_patterns=None,
+           kill_first_command=None,
+           kill_first_limit=5,
+           flaky_tests=frozenset(),
+           start_pos=None,
+           end_pos=None,
+           splice=None,
+           source_digest=None,
+           lazy_diff=False,
+           active_mutant=None):
     """Mutate the OCCURRENCE-th site for OPERATOR_NAME in MODULE_PATH, run the
     tests, and report the results.
 
@@ -34,6 +103,9 @@ def worker(module_path,
     incompetent) so a special value is returned indicating that no mutation is
     possible.
 
+    If the mutated code doesn't compile, the mutant is reported as
+    incompetent without running the tests or writing the mutant to disk.
+
     Finally, and hopefully normally, the worker will find that it can run a
     test. It will do so and report back the result - killed, survived, or
     incompetent - in a structured way.
@@ -46,6 +118,34 @@ def worker(module_path,
         occurrence: The occurrence of the operator to apply
         test_command: The command to execute to run the tests
         timeout: The maximum amount of time (seconds) to let the tests run
+        fail_fast: Whether to stop the tests at the first failure.
+        failure_patterns: Regular expressions identifying failed tests in the
+            test output. If `None`, patterns for common test runners are used.
+        kill_first_command: If not `None`, a function which takes a list of
+            test IDs and returns the command to run just those tests. The
+            tests which killed earlier mutants in the same function or module
+            are run with this command before the full test command. If they
+            kill the mutant, the full test command is not run.
+        kill_first_limit: The maximum number of tests to run first.
+        flaky_tests: The IDs of flaky tests. Their failures neither stop the
+            tests early nor kill the mutant.
+        start_pos: The optional `(line, column)` start of the mutation. With
+            `end_pos`, this lets the mutated node be found without walking the
+            entire module.
+        end_pos: The optional `(line, column)` end of the mutation.
+        splice: The optional `(start-offset, end-offset, replacement)` of the
+            mutation (see `WorkItem.splice`). If given, the mutated code is
+            made by splicing the text of the module, without parsing it.
+        source_digest: The optional digest of the code of the module which
+            `splice` or the positions were made for. If the module's code
+            doesn't match it, the worker fails rather than test a corrupted
+            mutant.
+        lazy_diff: If true and `splice` is given, the result has no diff. It
+            can be rendered later with `cosmic_ray.mutating.result_diff`.
+        active_mutant: If not `None`, the job-id of a mutant in the installed
+            schema of the module (see `cosmic_ray.schemata`). The tests are
+            run with this mutant activated instead of mutating the module, and
+            the result has no diff.
 
     Returns: A WorkResult
 
@@ -54,25 +154,71 @@ def worker(module_path,
 
     """
     try:
-        operator_class = cosmic_ray.plugins.get_operator(operator_name)
-        operator = operator_class(python_version)
+        if active_mutant is not None:
+            test_outcome, output = _run_tests(
+                module_path, None, test_command, timeout,
+                failure_patterns or FAILURE_PATTERNS, fail_fast,
+                kill_first_command, kill_first_limit, flaky_tests,
+                {ACTIVE_MUTANT_VAR: active_mutant})
+            return WorkResult(
+                output=output,
+                test_outcome=test_outcome,
+                worker_outcome=WorkerOutcome.NORMAL)
+
+        if splice is not None:
+            with module_path.open(mode='rt', encoding='utf-8') as handle:
+                original_code = handle.read()
+            if source_digest is not None and cosmic_ray.source_index.source_digest(original_code) != source_digest:
+                raise SourceChangedError(
+                    '{} is not the code the session was initialized with'.format(module_path))
+            mutated_code = cosmic_ray.mutating.splice(original_code, *splice)
+        else:
+            operator_class = cosmic_ray.plugins.get_operator(operator_name)
+            operator = operator_class(python_version)
 
-        with cosmic_ray.mutating.use_mutation(module_path, operator,
-                                              occurrence) as (original_code,
-                                                              mutated_code):
+            module_ast = get_cached_ast(module_path, python_version=python_version)
+            if start_pos is not None and source_digest is not None and \
+                    cosmic_ray.source_index.source_digest(module_ast.get_code()) != source_digest:
+                raise SourceChangedError(
+                    '{} is not the code the session was initialized with'.format(module_path))
+            original_code, mutated_code = cosmic_ray.mutating.mutate_ast(
+                module_ast, operator, occurrence, start_pos, end_pos)
             if mutated_code is None:
                 return WorkResult(worker_outcome=WorkerOutcome.NO_TEST)
 
-            test_outcome, output = run_tests(test_command, timeout)
-
-            diff = _make_diff(original_code, mutated_code, module_path)
+        if splice is None:
+            diff = cosmic_ray.mutating.make_diff(original_code, mutated_code, module_path)
+        elif lazy_diff:
+            diff = None
+        else:
+            diff = cosmic_ray.mutating.splice_diff(original_code, *splice, module_path)
 
+        # Mutants which don't compile can't be tested. The check is skipped
+        # if the original code doesn't compile either, e.g. because it's for
+        # a different version of Python than the one running the worker.
+        error = cosmic_ray.mutating.compile_error(mutated_code, module_path)
+        if error is not None and cosmic_ray.mutating.compile_error(original_code, module_path) is None:
             return WorkResult(
-                output=output,
-                diff='\n'.join(diff),
-                test_outcome=test_outcome,
+                output=error,
+                diff=diff,
+                test_outcome=TestOutcome.INCOMPETENT,
                 worker_outcome=WorkerOutcome.NORMAL)
 
+        with cosmic_ray.mutating.use_mutated_code(module_path, original_code, mutated_code):
+            function = None
+            if kill_first_command is not None:
+                function = _mutated_function(original_code, mutated_code)
+            test_outcome, output = _run_tests(
+                module_path, function, test_command, timeout,
+                failure_patterns or FAILURE_PATTERNS, fail_fast,
+                kill_first_command, kill_first_limit, flaky_tests)
+
+        return WorkResult(
+            output=output,
+            diff=diff,
+            test_outcome=test_outcome,
+            worker_outcome=WorkerOutcome.NORMAL)
+
     except Exception:  # noqa # pylint: disable=broad-except
         return WorkResult(
             output=traceback.format_exc(),
@@ -80,13 +226,89 @@ def worker(module_path,
             worker_outcome=WorkerOutcome.EXCEPTION)
 
 
-def _make_diff(original_source, mutated_source, module_path):
-    module_diff = ["--- mutation diff ---"]
-    for line in difflib.unified_diff(
-            original_source.split('\n'),
-            mutated_source.split('\n'),
-            fromfile="a" + str(module_path),
-            tofile="b" + str(module_path),
-            lineterm=""):
-        module_diff.append(line)
-    return module_diff
+def _run_tests(module_path, function, test_command, timeout,
+               failure_patterns, fail_fast, kill_first_command, kill_first_limit,
+               flaky_tests, extra_env=None):
+    """Run the tests for a mutant, running likely killers first if requested.
+
+    `function` is the name of the function containing the mutant, if known.
+
+    Returns: A `(TestOutcome, output)` tuple.
+    """
+    fail_fast_patterns = failure_patterns if fail_fast else None
+
+    def _run(command):
+        test_outcome, output = run_tests(command, timeout, fail_fast_patterns, flaky_tests, extra_env)
+        return _discount_flaky_tests(test_outcome, output, failure_patterns, flaky_tests)
+
+    if kill_first_command is None:
+        return _run(test_command)
+
+    tests = _KILL_HISTORY.tests(module_path, function, kill_first_limit)
+    if tests:
+        test_outcome, output = _run(kill_first_command(tests))
+        # Only a failing test is a kill. The command also fails if some of the
+        # tests no longer exist, e.g. because they have been renamed.
+        if test_outcome == TestOutcome.KILLED and output != 'timeout' and \
+                find_failed_test(output, failure_patterns, flaky_tests) is not None:
+            return test_outcome, output
+
+    test_outcome, output = _run(test_command)
+    if test_outcome == TestOutcome.KILLED:
+        killer = find_failed_test(output, failure_patterns, flaky_tests)
+        if killer is not None:
+            _KILL_HISTORY.record(module_path, function, killer)
+
+    return test_outcome, output
+
+
+def _discount_flaky_tests(test_outcome, output, failure_patterns, flaky_tests):
+    """Consider a mutant to have survived if only flaky tests failed.
+
+    The failures must account for all of the failed tests in the summary of
+    the test run. Otherwise, e.g. if a module couldn't be imported, the
+    mutant stays killed.
+
+    Returns: A `(TestOutcome, output)` tuple.
+    """
+    if test_outcome != TestOutcome.KILLED or not flaky_tests or output == 'timeout':
+        return test_outcome, output
+
+    failed = list(find_failed_tests(output, failure_patterns))
+    if failed and set(failed) <= flaky_tests and count_failures(output) == len(failed):
+        output = '{}\nOnly flaky tests failed: {}'.format(output, ', '.join(sorted(set(failed))))
+        return TestOutcome.SURVIVED, output
+
+    return test_outcome, output
+
+
+def check_failure_reporting(config):
+    """Warn if fail-fast or kill-first are enabled, but the test command is
+    unlikely to report its failed tests.
+
+    Both rely on the failed tests being reported one per line, which pytest
+    and unittest only do with verbose output.
+    """
+    if config.failure_patterns is not None:
+        return
+    if not config.fail_fast and not config.kill_first_config.get('enabled', False):
+        return
+
+    if not any(arg == '--verbose' or re.match(r'^-[a-zA-Z]*v', arg) for arg in shlex.split(config.test_command)):
+        log.warning('fail-fast and kill-first need the verbose output of the test command (e.g. "pytest -v"). '
+                    'Without it they have no effect.')
+
+
+def _mutated_function(original_code, mutated_code):
+    """Find the qualified name of the innermost function containing a mutation.
+
+    Returns: The name (e.g. "Class.method"), or `None` if the mutation is not
+        in a function.
+    """
+    original_lines = original_code.splitlines()
+    mutated_lines = mutated_code.splitlines()
+    line = next(
+        (index for index, (orig, mut) in enumerate(zip(original_lines, mutated_lines), 1) if orig != mut),
+        min(len(original_lines), len(mutated_lines)) + 1)
+
+    return source_index(original_code).function_at(line)
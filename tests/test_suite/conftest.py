@@ -1,9 +1,24 @@
+import os
 from pathlib import Path
 import sys
 
 import pytest
 
 
+@pytest.fixture(scope='session', autouse=True)
+def plugin_cache_dir(tmpdir_factory):
+    """Keep the plugin index of the tests out of the user's cache directory.
+    """
+    cache_dir = str(tmpdir_factory.mktemp('cache'))
+    old_cache_dir = os.environ.get('COSMIC_RAY_CACHE_DIR')
+    os.environ['COSMIC_RAY_CACHE_DIR'] = cache_dir
+    yield cache_dir
+    if old_cache_dir is None:
+        del os.environ['COSMIC_RAY_CACHE_DIR']
+    else:
+        os.environ['COSMIC_RAY_CACHE_DIR'] = old_cache_dir
+
+
 @pytest.fixture
 def tmpdir_path(tmpdir):
     """A temporary directory as a pathlib.Path.
@@ -0,0 +1,106 @@
+"Tests for walking parse trees."
+
+# pylint: disable=C0111
+
+import parso
+
+from cosmic_ray.ast import Visitor, iter_nodes, node_index, NodeIndex, operator_sites
+
+
+class _Recorder(Visitor):
+    def __init__(self):
+        self.visited = []
+
+    def visit(self, node):
+        self.visited.append(node)
+        return node
+
+
+class _NameRemover(Visitor):
+    "Removes names called `x` and replaces numbers with `0`."
+
+    def visit(self, node):
+        if node.type == 'name' and node.value == 'x':
+            return None
+        if node.type == 'number':
+            return parso.python.tree.Number('0', node.start_pos, node.prefix)
+        return node
+
+
+def _recursive_order(node):
+    yield node
+    for child in getattr(node, 'children', ()):
+        yield from _recursive_order(child)
+
+
+def test_iter_nodes_is_pre_order():
+    tree = parso.parse('def f(a):\n    return [a + 1, (a, 2)]\n')
+    assert list(iter_nodes(tree)) == list(_recursive_order(tree))
+
+
+def test_scan_visits_every_node_without_changing_lists():
+    tree = parso.parse('x = [1, 2]\ny = x\n')
+    children = [node.children for node in iter_nodes(tree) if hasattr(node, 'children')]
+
+    recorder = _Recorder()
+    recorder.scan(tree)
+
+    assert recorder.visited == list(_recursive_order(tree))
+    assert [node.children for node in iter_nodes(tree) if hasattr(node, 'children')] == children
+
+
+def test_walk_replaces_and_removes_nodes_in_place():
+    tree = parso.parse('print(x, 1)\n')
+    module_children = tree.children
+
+    assert _NameRemover().walk(tree) is tree
+    assert tree.get_code() == 'print(, 0)\n'
+    assert tree.children is module_children
+
+
+def test_walk_handles_deep_trees():
+    code = 'x = ' + '(' * 5000 + '1' + ')' * 5000 + '\n'
+    tree = parso.parse(code)
+    recorder = _Recorder()
+    recorder.walk(tree)
+    assert len(recorder.visited) > 10000
+
+
+def test_node_index_finds_nodes_by_type_in_pre_order():
+    tree = parso.parse('def f(a):\n    return [a + 1, (a, 2.5)]\n')
+    index = NodeIndex(tree)
+    nodes = list(iter_nodes(tree))
+
+    assert index.nodes('number') == [node for node in nodes if node.type == 'number']
+    assert index.nodes('number', 'name', 'funcdef') == \
+        [node for node in nodes if node.type in ('number', 'name', 'funcdef')]
+    assert index.nodes('lambdef') == []
+
+
+def test_node_index_sorts_and_removes_duplicates():
+    tree = parso.parse('x = 1\ny = 2\n')
+    index = NodeIndex(tree)
+    numbers = index.nodes('number')
+    assert index.sorted(numbers[::-1] + numbers) == numbers
+
+
+def test_node_index_is_remembered():
+    tree = parso.parse('x = 1\n')
+    assert node_index(tree) is node_index(tree)
+    assert node_index(parso.parse('x = 1\n')) is not node_index(tree)
+
+
+class _Operator:
+    def __init__(self, sites):
+        self.sites = sites
+
+    def find_sites(self, module_tree):  # pylint: disable=unused-argument
+        return self.sites
+
+
+def test_operator_sites():
+    tree = parso.parse('x = 1\ny = 2\n')
+    numbers = node_index(tree).nodes('number')
+
+    assert list(operator_sites(_Operator(None), tree)) == list(iter_nodes(tree))
+    assert list(operator_sites(_Operator(numbers[::-1]), tree)) == numbers
@@ -0,0 +1,64 @@
+"Tests for the baseline command."
+
+# pylint: disable=C0111,W0621
+
+import contextlib
+import importlib
+import sys
+
+import pytest
+
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.work_db import use_db, WorkDB
+
+baseline_module = importlib.import_module('cosmic_ray.commands.baseline')
+
+
+@pytest.fixture
+def work_db():
+    with use_db(':memory:', WorkDB.Mode.create) as db:
+        yield db
+
+
+@pytest.fixture
+def no_cloning(monkeypatch):
+    monkeypatch.setattr(baseline_module, 'cloned_workspace', lambda *args: contextlib.suppress())
+
+
+def _config(test_code):
+    config = ConfigDict()
+    config['test-command'] = '{} -c "{}"'.format(sys.executable, test_code)
+    config['timeout'] = 100
+    config['cloning'] = ConfigDict({'method': 'copy'})
+    config['baseline'] = ConfigDict({'runs': 2})
+    return config
+
+
+def test_baseline_records_durations(work_db, no_cloning):
+    baseline_module.baseline(work_db, _config('pass'))
+
+    durations = work_db.baseline
+    assert list(durations) == [None]
+    assert len(durations[None]) == 2
+
+
+def test_baseline_raises_for_failing_tests(work_db, no_cloning):
+    with pytest.raises(baseline_module.BaselineError):
+        baseline_module.baseline(work_db, _config('raise SystemExit(1)'))
+
+
+def test_calibrate_timeouts(work_db):
+    work_db.set_baseline({None: [1.0, 2.0], 'mod.py': [0.1]})
+    config = _config('pass')
+    config['baseline']['timeout-multiplier'] = 3
+
+    baseline_module.calibrate_timeouts(work_db, config)
+
+    assert config.timeout_for('mod.py') == 1.0  # min-timeout
+    assert config.timeout_for('other.py') == 6.0
+
+
+def test_timeout_without_baseline_is_config_timeout(work_db):
+    config = _config('pass')
+    baseline_module.calibrate_timeouts(work_db, config)
+    assert config.timeout_for('mod.py') == 100.0
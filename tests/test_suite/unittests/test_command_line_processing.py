@@ -53,7 +53,7 @@ def lobotomize(monkeypatch):
     monkeypatch.setattr(cosmic_ray.modules, 'find_modules', lambda *args: [])
 
     # Make cosmic_ray.worker.worker just return a simple empty dict.
-    monkeypatch.setattr(cosmic_ray.worker, 'worker', lambda *args: {})
+    monkeypatch.setattr(cosmic_ray.worker, 'worker', lambda *args, **kwargs: {})
 
 
 def test_invalid_command_line_returns_EX_USAGE():
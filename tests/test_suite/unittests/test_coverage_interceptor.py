@@ -0,0 +1,155 @@
+"Tests for the coverage interceptor."
+
+# pylint: disable=C0111,W0621
+
+import contextlib
+import importlib
+import json
+import sys
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict, ConfigValueError
+from cosmic_ray.interceptors import coverage
+from cosmic_ray.interceptors.coverage import CoverageInterceptor, ExecutedLines, reachable_lines
+from cosmic_ray.work_db import use_db, WorkDB
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome
+
+SOURCE = '''import os
+
+
+@decorator
+def f(a,
+      b=1):
+    if a:
+        return (b +
+                2)
+    return b - 3
+
+
+def g(x):
+    try:
+        return x + 4
+    except ValueError:
+        return 5
+'''
+
+# The lines executed by importing the module and calling f(0).
+EXECUTED = [1, 4, 5, 7, 10, 13]
+
+
+@pytest.fixture
+def work_db():
+    with use_db(':memory:', WorkDB.Mode.create) as db:
+        yield db
+
+
+def _write_report(path, executed):
+    path.write_text(json.dumps({'files': {
+        module_path: {'executed_lines': lines} for module_path, lines in executed.items()}}))
+
+
+def _config(tmpdir_path, **config):
+    config.setdefault('data-file', str(tmpdir_path / 'coverage.json'))
+    return ConfigDict(config)
+
+
+def test_multiline_statements_are_reachable_if_any_line_was_executed():
+    assert reachable_lines(SOURCE, set(EXECUTED)) == {1, 4, 5, 6, 7, 10, 13}
+
+
+def test_unparsable_modules_have_no_reachable_lines():
+    assert reachable_lines('x = (1,\n', {1}) is None
+
+
+def test_modules_are_matched_by_their_relative_path(tmpdir_path):
+    executed = ExecutedLines({
+        '/tmp/clone/repo/pkg/mod.py': [1],
+        '/tmp/clone/repo/other/mod.py': [2],
+        str(tmpdir_path / 'abs.py'): [3],
+    })
+    assert executed.lines('pkg/mod.py') == {1}
+    assert executed.lines(tmpdir_path / 'abs.py') == {3}
+    assert executed.lines('mod.py') is None  # ambiguous
+    assert executed.lines('pkg/unmeasured.py') is None
+
+
+def test_invalid_outcome(tmpdir_path):
+    with pytest.raises(ConfigValueError):
+        CoverageInterceptor(_config(tmpdir_path, outcome='killed'), ConfigDict())
+
+
+def _init(module_path, work_db, interceptor_config, monkeypatch):
+    init_module = importlib.import_module('cosmic_ray.commands.init')
+    monkeypatch.setattr(init_module, 'interceptor_names', lambda: ('coverage',))
+    monkeypatch.setattr(init_module, 'get_interceptor', lambda name: CoverageInterceptor)
+
+    config = ConfigDict()
+    config['python-version'] = ''
+    config['interceptors'] = ConfigDict({'enabled': ['coverage']})
+    config['coverage'] = interceptor_config
+    init([module_path], work_db, config)
+
+
+@pytest.mark.parametrize('outcome', ['skipped', 'survived'])
+def test_unexecuted_work_items_are_marked(tmpdir_path, work_db, monkeypatch, outcome):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    _write_report(tmpdir_path / 'coverage.json', {str(module_path): EXECUTED})
+    _init(module_path, work_db, _config(tmpdir_path, outcome=outcome), monkeypatch)
+
+    pending = {item.start_pos[0] for item in work_db.pending_work_items}
+    assert pending == {4, 6, 7, 10}
+
+    marked = {item.start_pos[0] for item, _ in work_db.completed_work_items}
+    assert marked == {8, 9, 15, 16, 17}
+
+    for _, result in work_db.completed_work_items:
+        assert result.output == coverage.OUTPUT
+        if outcome == 'survived':
+            assert result.test_outcome == TestOutcome.SURVIVED
+            assert result.worker_outcome == WorkerOutcome.NORMAL
+        else:
+            assert result.worker_outcome == WorkerOutcome.SKIPPED
+
+
+def test_unmeasured_modules_are_left_alone(tmpdir_path, work_db, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    _write_report(tmpdir_path / 'coverage.json', {'other.py': [1]})
+    _init(module_path, work_db, _config(tmpdir_path), monkeypatch)
+
+    assert work_db.num_results == 0
+
+
+def test_missing_data_file_skips_nothing(tmpdir_path, work_db, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    _init(module_path, work_db, _config(tmpdir_path), monkeypatch)
+
+    assert work_db.num_results == 0
+
+
+def test_baseline_measures_coverage_and_marks_the_session(tmpdir_path, work_db, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    baseline_module = importlib.import_module('cosmic_ray.commands.baseline')
+    monkeypatch.setattr(baseline_module, 'cloned_workspace', lambda *args: contextlib.suppress())
+
+    config = ConfigDict()
+    config['python-version'] = ''
+    config['test-command'] = '{} -c "pass"'.format(sys.executable)
+    config['cloning'] = ConfigDict({'method': 'copy'})
+    config['baseline'] = ConfigDict({'runs': 1})
+    init([module_path], work_db, config)
+
+    report = json.dumps({'files': {str(module_path): {'executed_lines': EXECUTED}}})
+    config['coverage'] = _config(
+        tmpdir_path,
+        **{'baseline-command': '{} -c "import os, sys; open(os.environ[sys.argv[1]], \'w\').write(sys.argv[2])" '
+                               'COVERAGE_FILE \'{}\''.format(sys.executable, report)})
+    baseline_module.baseline(work_db, config)
+
+    pending = {item.start_pos[0] for item in work_db.pending_work_items}
+    assert pending == {4, 6, 7, 10}
@@ -0,0 +1,96 @@
+"Tests for the equivalent-mutants interceptor."
+
+# pylint: disable=C0111,W0621
+
+import importlib
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.interceptors import equivalent_mutants
+from cosmic_ray.interceptors.equivalent_mutants import code_hash
+from cosmic_ray.work_db import use_db, WorkDB
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+
+@pytest.fixture
+def work_db():
+    with use_db(':memory:', WorkDB.Mode.create) as db:
+        yield db
+
+
+def test_code_hash_ignores_line_numbers():
+    assert code_hash('x = 1\n') == code_hash('\n\nx = 1\n')
+    assert code_hash('def f():\n    return 2 * 1\n') == code_hash('def f():\n    return 2\n')
+
+
+def test_code_hash_distinguishes_constant_types():
+    assert code_hash('x = 1') != code_hash('x = 1.0')
+    assert code_hash('x = 1') != code_hash('x = True')
+
+
+def test_equivalent_and_duplicate_mutants_are_skipped(tmpdir_path, work_db):
+    module_path = tmpdir_path / 'mod.py'
+    # Constant folding makes `2 * 1` equivalent to `2 // 1`, and `5 - 2`
+    # mutated to `5 + 2` a duplicate of `5 | 2`.
+    module_path.write_text('x = 2 * 1\ny = 5 - 2\n')
+
+    config = ConfigDict()
+    config['python-version'] = ''
+    init([module_path], work_db, config)
+    equivalent_mutants.intercept(work_db, ConfigDict())
+
+    items = {item.job_id: item for item in work_db.work_items}
+    skipped = {job_id: result for job_id, result in work_db.results
+               if result.worker_outcome == WorkerOutcome.SKIPPED}
+
+    def _operators(job_ids):
+        return set(items[job_id].operator_name.rpartition('/')[2] for job_id in job_ids)
+
+    equivalent = set(job_id for job_id, result in skipped.items()
+                     if result.output.startswith('Equivalent'))
+    assert {'ReplaceBinaryOperator_Mul_FloorDiv', 'ReplaceBinaryOperator_Mul_Pow'} <= _operators(equivalent)
+
+    duplicates = work_db.duplicates
+    assert set(duplicates) == set(skipped) - equivalent
+    assert {frozenset(_operators(pair)) for pair in duplicates.items()} >= {
+        frozenset(['ReplaceBinaryOperator_Sub_Add', 'ReplaceBinaryOperator_Sub_BitOr']),
+    }
+
+    # Non-equivalent, distinct mutants are left to be tested.
+    pending = set(item.job_id for item in work_db.pending_work_items)
+    assert pending
+    assert not pending & set(skipped)
+
+
+def test_duplicates_get_the_results_of_their_originals(tmpdir_path, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('y = 5 - 2\n')
+    session = str(tmpdir_path / 'session.sqlite')
+    config = ConfigDict()
+    config['python-version'] = ''
+    config['execution-engine'] = ConfigDict({'name': 'fake'})
+    with use_db(session) as db:
+        init([module_path], db, config)
+        equivalent_mutants.intercept(db, ConfigDict())
+        duplicates = db.duplicates
+    assert duplicates
+
+    def _engine(work_items, config, on_task_complete):
+        for item in work_items:
+            on_task_complete(item.job_id, WorkResult(
+                output='killed by {}'.format(item.job_id),
+                test_outcome=TestOutcome.KILLED,
+                worker_outcome=WorkerOutcome.NORMAL))
+
+    execute_module = importlib.import_module('cosmic_ray.commands.execute')
+    monkeypatch.setattr(execute_module, 'get_execution_engine', lambda name: _engine)
+    execute_module.execute(session)
+
+    with use_db(session, WorkDB.Mode.open) as db:
+        results = dict(db.results)
+    for job_id, original in duplicates.items():
+        assert results[job_id].worker_outcome == WorkerOutcome.NORMAL
+        assert results[job_id].test_outcome == TestOutcome.KILLED
+        assert results[job_id].output == 'killed by {}'.format(original)
@@ -0,0 +1,160 @@
+"Tests for running interceptors during init."
+
+# pylint: disable=C0111,W0621
+
+import importlib
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.interceptors import Interceptor, intercept_work_db
+from cosmic_ray.interceptors.equivalent_mutants import EquivalentMutantsInterceptor
+from cosmic_ray.interceptors.pragma_no_mutate import PragmaNoMutateInterceptor
+from cosmic_ray.source_index import source_digest
+from cosmic_ray.work_db import use_db, WorkDB
+from cosmic_ray.work_item import WorkerOutcome, WorkResult
+
+
+@pytest.fixture
+def work_db():
+    with use_db(':memory:', WorkDB.Mode.create) as db:
+        yield db
+
+
+class RecordingInterceptor(Interceptor):
+    "Skips nothing, but records the work items it is passed."
+    batches = []
+    indices = []
+
+    def intercept(self, module_path, source, work_items, index):
+        RecordingInterceptor.batches.append((module_path, source, list(work_items)))
+        RecordingInterceptor.indices.append(index)
+        return ()
+
+
+class SkipAllInterceptor(Interceptor):
+    def intercept(self, module_path, source, work_items, index):
+        for item in work_items:
+            yield item.job_id, WorkResult(output='skip all', worker_outcome=WorkerOutcome.SKIPPED)
+
+
+@pytest.fixture
+def interceptors(monkeypatch):
+    "Replace the interceptor plugins with those in a dict."
+    plugins = {}
+    # `cosmic_ray.commands.init` is the function, not the module.
+    init_module = importlib.import_module('cosmic_ray.commands.init')
+    monkeypatch.setattr(init_module, 'interceptor_names', lambda: tuple(plugins))
+    monkeypatch.setattr(init_module, 'get_interceptor', plugins.__getitem__)
+    RecordingInterceptor.batches = []
+    RecordingInterceptor.indices = []
+    return plugins
+
+
+def _init(module_paths, work_db, enabled):
+    config = ConfigDict()
+    config['python-version'] = ''
+    config['interceptors'] = ConfigDict()
+    config['interceptors']['enabled'] = enabled
+    init(module_paths, work_db, config)
+
+
+def test_skipped_work_items_are_added_with_their_results(tmpdir_path, work_db, interceptors, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1  # pragma: no mutate\ny = 2\n')
+    interceptors['pragma_no_mutate'] = PragmaNoMutateInterceptor
+
+    def _fail(*args):
+        pytest.fail('Results must be added with their work items')
+
+    monkeypatch.setattr(WorkDB, 'set_result', _fail)
+    monkeypatch.setattr(WorkDB, 'set_results', _fail)
+    _init([module_path], work_db, ['pragma_no_mutate'])
+
+    skipped = {item.job_id for item, _ in work_db.completed_work_items}
+    assert skipped
+    assert all(item.start_pos[0] == 1 for item in work_db.work_items if item.job_id in skipped)
+    assert all(item.start_pos[0] == 2 for item in work_db.pending_work_items)
+
+
+def test_interceptors_get_a_batch_per_module(tmpdir_path, work_db, interceptors):
+    module_paths = [tmpdir_path / 'a.py', tmpdir_path / 'b.py']
+    for module_path in module_paths:
+        module_path.write_text('x = 1\n')
+    interceptors['recording'] = RecordingInterceptor
+    _init(module_paths, work_db, ['recording'])
+
+    assert [batch[0] for batch in RecordingInterceptor.batches] == module_paths
+    assert all(source == 'x = 1\n' for _, source, _ in RecordingInterceptor.batches)
+    assert sum(len(items) for _, _, items in RecordingInterceptor.batches) == work_db.num_work_items
+
+
+def test_later_interceptors_only_get_undecided_work_items(tmpdir_path, work_db, interceptors):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1\n')
+    interceptors['skip-all'] = SkipAllInterceptor
+    interceptors['recording'] = RecordingInterceptor
+    _init([module_path], work_db, ['skip-all', 'recording'])
+
+    assert work_db.num_results == work_db.num_work_items > 0
+    assert RecordingInterceptor.batches == []
+
+
+def test_duplicates_are_added_with_their_work_items(tmpdir_path, work_db, interceptors):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('y = 5 - 2\n')
+    interceptors['equivalent-mutants'] = EquivalentMutantsInterceptor
+    _init([module_path], work_db, ['equivalent-mutants'])
+
+    assert work_db.duplicates
+    results = dict(work_db.results)
+    assert all(results[job_id].worker_outcome == WorkerOutcome.SKIPPED for job_id in work_db.duplicates)
+
+
+def test_callable_interceptors_get_the_work_db_after_init(tmpdir_path, work_db, interceptors):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1\n')
+    calls = []
+    interceptors['legacy'] = lambda db, config: calls.append(db.num_work_items)
+    _init([module_path], work_db, ['legacy'])
+
+    assert calls == [work_db.num_work_items]
+
+
+def test_interceptors_get_the_source_index_stored_by_init(tmpdir_path, work_db, interceptors, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1  # one\n')
+    interceptors['recording'] = RecordingInterceptor
+    init_module = importlib.import_module('cosmic_ray.commands.init')
+    indexed = []
+    source_index = init_module.source_index
+
+    def _source_index(source):
+        indexed.append(source)
+        return source_index(source)
+
+    monkeypatch.setattr(init_module, 'source_index', _source_index)
+    _init([module_path], work_db, ['recording'])
+
+    # The module is indexed once, and the interceptor gets the stored index.
+    assert indexed == ['x = 1  # one\n']
+    index, = RecordingInterceptor.indices
+    assert index.to_json() == work_db.get_source_index(module_path).to_json()
+
+
+def test_interceptors_applied_to_a_session_get_its_source_index(tmpdir_path, work_db, interceptors, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1  # one\n')
+    _init([module_path], work_db, [])
+    interceptors_module = importlib.import_module('cosmic_ray.interceptors')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(interceptors_module, 'source_index', lambda source: pytest.fail('Module indexed again'))
+        intercept_work_db(RecordingInterceptor(ConfigDict(), ConfigDict()), work_db)
+    assert RecordingInterceptor.indices[-1].comments == {1: '# one'}
+
+    # Modules which have changed since init are indexed again.
+    module_path.write_text('x = 1  # two\n')
+    intercept_work_db(RecordingInterceptor(ConfigDict(), ConfigDict()), work_db)
+    assert RecordingInterceptor.indices[-1].digest == source_digest('x = 1  # two\n')
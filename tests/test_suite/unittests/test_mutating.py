@@ -0,0 +1,178 @@
+"Tests for applying mutations."
+
+# pylint: disable=C0111
+
+import parso
+import pytest
+
+import cosmic_ray.mutating
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.source_index import source_digest
+from cosmic_ray.mutating import (iter_mutants, line_offsets, make_diff, mutate_ast, MutationVisitor, render_diffs,
+                                  splice, splice_diff)
+from cosmic_ray.plugins import get_operator, operator_names
+from cosmic_ray.work_db import use_db, WorkDB
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+SOURCE = '''
+@decorator
+def f(a, b=2):
+    try:
+        if not a < b <= 3: return -a * b
+    except (ValueError, KeyError):
+        pass
+    for i in range(3):
+        x = a if i else b
+        break
+    return a + 1.5, i is None, x
+'''
+
+
+def _work_items(tmpdir_path, python_version, source=SOURCE):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(source)
+    config = ConfigDict()
+    config['python-version'] = python_version
+    with use_db(':memory:', WorkDB.Mode.create) as work_db:
+        init([module_path], work_db, config)
+        return list(work_db.work_items)
+
+
+def test_mutation_by_position_matches_walk(tmpdir_path, python_version):
+    module_ast = parso.parse(SOURCE, version=python_version)
+
+    for item in _work_items(tmpdir_path, python_version):
+        operator = get_operator(item.operator_name)(python_version)
+        expected = mutate_ast(module_ast, operator, item.occurrence)
+        assert mutate_ast(module_ast, operator, item.occurrence, item.start_pos, item.end_pos) == expected
+        assert module_ast.get_code() == SOURCE
+
+
+def test_unambiguous_positions_do_not_walk(tmpdir_path, python_version, monkeypatch):
+    module_ast = parso.parse(SOURCE, version=python_version)
+    items = [item for item in _work_items(tmpdir_path, python_version)
+             if not item.operator_name.endswith('NumberReplacer')]
+    assert items
+
+    monkeypatch.setattr(cosmic_ray.mutating, 'MutationVisitor', None)
+    for item in items:
+        operator = get_operator(item.operator_name)(python_version)
+        _, mutated_code = mutate_ast(module_ast, operator, item.occurrence, item.start_pos, item.end_pos)
+        assert mutated_code not in (None, SOURCE)
+
+
+def test_occurrence_must_be_at_the_position(tmpdir_path, python_version):
+    module_ast = parso.parse(SOURCE, version=python_version)
+    items = [item for item in _work_items(tmpdir_path, python_version)
+             if item.operator_name == 'core/NumberReplacer']
+    first, other = items[0], next(item for item in items if item.start_pos != items[0].start_pos)
+    operator = get_operator(first.operator_name)(python_version)
+
+    _, mutated_code = mutate_ast(module_ast, operator, other.occurrence, first.start_pos, first.end_pos)
+    assert mutated_code is None
+
+
+def test_unambiguous_positions_are_found_without_walking_the_tree(tmpdir_path, python_version, monkeypatch):
+    monkeypatch.setattr(cosmic_ray.mutating, '_occurrences', lambda *args: pytest.fail('Tree walked'))
+    for item in _work_items(tmpdir_path, python_version):
+        if item.operator_name == 'core/NumberReplacer':
+            continue
+        module_ast = parso.parse(SOURCE, version=python_version)
+        operator = get_operator(item.operator_name)(python_version)
+        _, mutated_code = mutate_ast(module_ast, operator, item.occurrence, item.start_pos, item.end_pos)
+        assert mutated_code is not None
+
+
+def test_mutation_visitor_uses_found_sites(tmpdir_path, python_version):
+    for item in _work_items(tmpdir_path, python_version):
+        operator_class = get_operator(item.operator_name)
+
+        class _EveryNode(operator_class):  # pylint: disable=too-few-public-methods
+            def find_sites(self, module_tree):
+                return None
+
+        codes = []
+        for operator in (operator_class(python_version), _EveryNode(python_version)):
+            module_ast = parso.parse(SOURCE, version=python_version)
+            visitor = MutationVisitor(item.occurrence, operator)
+            codes.append(visitor.walk(module_ast).get_code())
+            visitor.undo()
+            assert module_ast.get_code() == SOURCE
+        assert codes[0] == codes[1] != SOURCE
+
+
+def test_splices_match_ast_mutations(tmpdir_path, python_version):
+    module_ast = parso.parse(SOURCE, version=python_version)
+
+    items = _work_items(tmpdir_path, python_version)
+    assert all(item.splice is not None for item in items)
+    for item in items:
+        operator = get_operator(item.operator_name)(python_version)
+        _, expected = mutate_ast(module_ast, operator, item.occurrence)
+        assert splice(SOURCE, *item.splice) == expected
+
+
+def test_splices_are_minimal(tmpdir_path, python_version):
+    items = _work_items(tmpdir_path, python_version)
+    mul_to_add = next(item for item in items if item.operator_name == 'core/ReplaceBinaryOperator_Mul_Add')
+    start, end, replacement = mul_to_add.splice
+    assert (SOURCE[start:end], replacement) == ('*', '+')
+
+
+def test_line_offsets_skip_byte_order_mark():
+    code = '\ufeffx = 1\ny = 2\n'
+    module_ast = parso.parse(code)
+    offsets = line_offsets(code)
+    for leaf in (module_ast.get_first_leaf(), module_ast.get_last_leaf().get_previous_leaf()):
+        line, column = leaf.start_pos
+        assert code[offsets[line - 1] + column:].startswith(leaf.value)
+
+
+def test_splice_diffs_match_full_diffs(tmpdir_path, python_version):
+    # Enough lines around the function that the diffs are really localized.
+    source = '\n' * 10 + SOURCE + ''.join('y{} = 1\n'.format(idx) for idx in range(10))
+    for item in _work_items(tmpdir_path, python_version, source):
+        mutated_code = splice(source, *item.splice)
+        assert splice_diff(source, *item.splice, item.module_path) == \
+            make_diff(source, mutated_code, item.module_path)
+
+
+def test_lazy_diffs_are_rendered_on_demand(tmpdir_path, python_version):
+    items = _work_items(tmpdir_path, python_version)
+    normal = WorkResult(worker_outcome=WorkerOutcome.NORMAL, test_outcome=TestOutcome.KILLED)
+    skipped = WorkResult(worker_outcome=WorkerOutcome.SKIPPED)
+
+    rendered = list(render_diffs([(items[0], normal), (items[1], skipped)]))
+
+    mutated_code = splice(SOURCE, *items[0].splice)
+    assert rendered[0][1].diff == make_diff(SOURCE, mutated_code, items[0].module_path)
+    assert rendered[0][1].test_outcome == TestOutcome.KILLED
+    assert rendered[1][1].diff is None
+
+
+def test_lazy_diffs_are_not_rendered_for_changed_modules(tmpdir_path, python_version):
+    items = _work_items(tmpdir_path, python_version)
+    normal = WorkResult(worker_outcome=WorkerOutcome.NORMAL, test_outcome=TestOutcome.KILLED)
+    module_path = str(items[0].module_path)
+
+    digests = {module_path: source_digest(SOURCE)}
+    assert list(render_diffs([(items[0], normal)], digests))[0][1].diff is not None
+
+    digests = {module_path: source_digest(SOURCE + '\n')}
+    assert list(render_diffs([(items[0], normal)], digests))[0][1].diff is None
+
+
+def test_iter_mutants_yields_every_mutant(tmpdir_path, python_version):
+    module_ast = parso.parse(SOURCE, version=python_version)
+    items = _work_items(tmpdir_path, python_version)
+    module_path = items[0].module_path
+
+    mutants = dict(iter_mutants(module_path, operator_names(), python_version))
+
+    assert set(mutants) == set((item.operator_name, item.occurrence) for item in items)
+    for item in items:
+        operator = get_operator(item.operator_name)(python_version)
+        _, expected = mutate_ast(module_ast, operator, item.occurrence)
+        assert mutants[item.operator_name, item.occurrence] == expected
+    assert module_path.read_text() == SOURCE
@@ -0,0 +1,89 @@
+"Tests for selecting the operators to apply."
+
+# pylint: disable=C0111
+
+from pathlib import Path
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict, ConfigValueError
+from cosmic_ray.operator_selection import OperatorSelection
+from cosmic_ray.plugins import operator_names
+from cosmic_ray.work_db import use_db, WorkDB
+
+ALL_OPERATORS = operator_names()
+
+
+def _selection(**settings):
+    return OperatorSelection(ConfigDict(settings), ALL_OPERATORS)
+
+
+def test_all_operators_are_selected_by_default():
+    assert _selection().operators_for(Path('mod.py')) == ALL_OPERATORS
+
+
+def test_presets_are_nested():
+    full = set(_selection(preset='full').operators_for(Path('mod.py')))
+    selective = set(_selection(preset='selective').operators_for(Path('mod.py')))
+    minimal = set(_selection(preset='minimal').operators_for(Path('mod.py')))
+
+    assert minimal < selective < full
+    assert 'core/ReplaceBinaryOperator_Add_Sub' in minimal
+    assert 'core/ReplaceBinaryOperator_Add_Mul' in selective - minimal
+    assert 'core/ReplaceBinaryOperator_Add_BitOr' in full - selective
+
+
+def test_include_and_exclude():
+    selected = _selection(
+        preset='minimal',
+        include=['core/NumberReplacer'],
+        exclude=['core/ReplaceComparisonOperator_.*']).operators_for(Path('mod.py'))
+
+    assert 'core/NumberReplacer' in selected
+    assert 'core/AddNot' in selected
+    assert not any(name.startswith('core/ReplaceComparisonOperator_') for name in selected)
+
+
+def test_include_without_preset_is_an_allow_list():
+    selected = _selection(include=['core/Replace.*With.*']).operators_for(Path('mod.py'))
+    assert set(selected) == {
+        'core/ReplaceTrueWithFalse', 'core/ReplaceFalseWithTrue',
+        'core/ReplaceAndWithOr', 'core/ReplaceOrWithAnd',
+        'core/ReplaceBreakWithContinue', 'core/ReplaceContinueWithBreak',
+    }
+
+
+def test_scopes_apply_to_matching_paths(tmpdir_path, path_utils):
+    (tmpdir_path / 'legacy').mkdir()
+    (tmpdir_path / 'legacy' / 'old.py').write_text('')
+    (tmpdir_path / 'new.py').write_text('')
+
+    with path_utils.excursion(tmpdir_path):
+        selection = _selection(
+            exclude=['core/NumberReplacer'],
+            scopes=[{'paths': ['legacy/*.py'], 'preset': 'minimal'}])
+
+        legacy = selection.operators_for(Path('legacy/old.py'))
+        assert legacy == _selection(preset='minimal').operators_for(Path('legacy/old.py'))
+        assert len(selection.operators_for(Path('new.py'))) == len(ALL_OPERATORS) - 1
+
+
+@pytest.mark.parametrize('settings', [{'preset': 'everything'}, {'exclude': ['(']}])
+def test_invalid_settings(settings):
+    with pytest.raises(ConfigValueError):
+        _selection(**settings)
+
+
+def test_init_only_applies_selected_operators(tmpdir_path):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = a + 1 if b < 2 else c\n')
+    config = ConfigDict()
+    config['operators'] = ConfigDict(preset='minimal')
+
+    with use_db(':memory:', WorkDB.Mode.create) as work_db:
+        init([module_path], work_db, config)
+        names = {item.operator_name for item in work_db.work_items}
+
+    assert names == {
+        'core/ReplaceBinaryOperator_Add_Sub', 'core/ReplaceComparisonOperator_Lt_LtE', 'core/AddNot'}
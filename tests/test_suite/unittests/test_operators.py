@@ -4,10 +4,11 @@ import pytest
 
 import parso
 
-from cosmic_ray.plugins import get_operator, operator_names
+from cosmic_ray.ast import iter_nodes
+from cosmic_ray.plugins import get_operator, operator_families, operator_names
 from cosmic_ray.operators.unary_operator_replacement import ReplaceUnaryOperator_USub_UAdd
 from cosmic_ray.operators.binary_operator_replacement import ReplaceBinaryOperator_Add_Mul
-from cosmic_ray.mutating import MutationVisitor
+from cosmic_ray.mutating import MutationVisitor, mutate_ast
 
 
 class Sample:
@@ -50,3 +51,45 @@ def test_no_mutation_leaves_ast_unchanged(sample, python_version):
     mutant = visitor.walk(node)
 
     assert mutant.get_code() == sample.from_code
+
+
+@pytest.mark.parametrize('sample', OPERATOR_SAMPLES)
+def test_mutate_ast_leaves_ast_unchanged(sample, python_version):
+    node = parso.parse(sample.from_code)
+
+    for _ in range(2):
+        original, mutant = mutate_ast(node, sample.operator(python_version), sample.index)
+        assert original == sample.from_code
+        assert (mutant or original) == sample.to_code
+        assert node.get_code() == sample.from_code
+
+
+FAMILY_SOURCE = """
+x = -a + b * c ** -2 if not a < b <= 3 else ~a
+y = a is None or a is not b or a == 1 or b != None
+z = (a) // +b % c | d & e ^ f >> g << h - i / j
+"""
+
+
+@pytest.mark.parametrize('family, members', operator_families(), ids=lambda arg: getattr(arg, '__name__', ''))
+def test_families_find_the_mutations_of_their_members(family, members, python_version):
+    node = parso.parse(FAMILY_SOURCE)
+    family = family(python_version)
+
+    found = {name: [] for name in members}
+    for child in iter_nodes(node):
+        for name, start, stop in family.mutation_positions(child):
+            found[name].append((start, stop))
+
+    for name, op_name in members.items():
+        operator = get_operator(op_name)(python_version)
+        expected = [position for child in iter_nodes(node) for position in operator.mutation_positions(child)]
+        assert found[name] == expected
+
+
+def test_family_members_are_operators():
+    names = set(operator_names())
+    for _, members in operator_families():
+        assert set(members.values()) <= names
+    assert 'core/ReplaceBinaryOperator_Add_Mul' in names
+    assert get_operator('core/ReplaceBinaryOperator_Add_Mul') is ReplaceBinaryOperator_Add_Mul
@@ -54,3 +54,11 @@ def test_operators_filter():
     data = Data()
     operators_filter.intercept(data, data.config)
     assert data.results == data.expected
+
+
+def test_operators_filter_interceptor():
+    data = Data()
+    interceptor = operators_filter.OperatorsFilterInterceptor(data.config, None)
+    results = [(job_id, result.worker_outcome)
+               for job_id, result in interceptor.intercept(None, '', data.pending_work_items, None)]
+    assert results == data.expected
@@ -0,0 +1,91 @@
+"Tests for the plugin index."
+
+# pylint: disable=C0111
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from cosmic_ray import plugins
+from cosmic_ray.interceptors.spor import SporInterceptor
+
+
+@pytest.fixture
+def plugin_cache(tmpdir_path, monkeypatch):
+    "Use an empty plugin cache directory and a fresh index."
+    monkeypatch.setenv('COSMIC_RAY_CACHE_DIR', str(tmpdir_path))
+    monkeypatch.setattr(plugins, '_INDEX', {})
+    return tmpdir_path
+
+
+def test_index_is_cached(plugin_cache):
+    assert 'spor' in plugins.interceptor_names()
+    cache_files = list(plugin_cache.glob('plugins-*.json'))
+    assert len(cache_files) == 1
+    index = json.loads(cache_files[0].read_text())['index']
+    assert index['cosmic_ray.interceptors']['spor'] == 'cosmic_ray.interceptors.spor:SporInterceptor'
+
+
+def test_cached_index_is_used(plugin_cache, monkeypatch):
+    plugins.interceptor_names()
+    monkeypatch.setattr(plugins, '_INDEX', {})
+    monkeypatch.setattr(plugins, '_scan_entry_points', lambda: pytest.fail('index was rebuilt'))
+    assert 'spor' in plugins.interceptor_names()
+
+
+def test_stale_index_is_rebuilt(plugin_cache, monkeypatch):
+    plugins.interceptor_names()
+    cache_file, = plugin_cache.glob('plugins-*.json')
+    cached = json.loads(cache_file.read_text())
+    cached['index'] = {'cosmic_ray.interceptors': {}}
+    cache_file.write_text(json.dumps(cached))
+    monkeypatch.setattr(plugins, '_INDEX', {})
+    assert plugins.interceptor_names() == ()
+    assert plugins.get_interceptor('spor') is SporInterceptor
+
+
+def test_index_is_rebuilt_in_place_when_sys_path_changes(plugin_cache, monkeypatch, tmpdir_path):
+    plugins.interceptor_names()
+    monkeypatch.setattr(plugins, '_INDEX', {})
+    monkeypatch.syspath_prepend(str(tmpdir_path))
+    scans = []
+    monkeypatch.setattr(plugins, '_scan_entry_points', lambda: scans.append(1) or {})
+    assert plugins.interceptor_names() == ()
+    assert scans == [1]
+    assert len(list(plugin_cache.glob('plugins-*.json'))) == 1
+
+
+def test_index_with_unimportable_plugin_is_rebuilt(plugin_cache, monkeypatch):
+    plugins.interceptor_names()
+    cache_file, = plugin_cache.glob('plugins-*.json')
+    cached = json.loads(cache_file.read_text())
+    cached['index']['cosmic_ray.interceptors']['spor'] = 'cosmic_ray.interceptors.moved_spor:SporInterceptor'
+    cache_file.write_text(json.dumps(cached))
+    monkeypatch.setattr(plugins, '_INDEX', {})
+    assert plugins.get_interceptor('spor') is SporInterceptor
+
+
+def test_unimportable_plugin_raises_import_error(plugin_cache, monkeypatch):
+    index = {'cosmic_ray.interceptors': {'broken': 'cosmic_ray.interceptors.no_such_module:Broken'}}
+    monkeypatch.setattr(plugins, '_scan_entry_points', lambda: index)
+    with pytest.raises(ImportError):
+        plugins.get_interceptor('broken')
+
+
+def test_unknown_plugin_raises_key_error(plugin_cache):
+    with pytest.raises(KeyError):
+        plugins.get_interceptor('no-such-interceptor')
+
+
+def test_operators_are_found(plugin_cache):
+    assert 'core/NumberReplacer' in plugins.operator_names()
+    assert plugins.get_operator('core/NumberReplacer').__name__ == 'NumberReplacer'
+
+
+def test_cli_import_is_light():
+    code = ('import sys, cosmic_ray.cli, cosmic_ray.worker; '
+            'print(sorted({"git", "parso", "virtualenv"} & set(sys.modules)))')
+    output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+    assert output.strip() == '[]'
@@ -0,0 +1,107 @@
+"Tests for the pragma_no_mutate interceptor."
+
+# pylint: disable=C0111,W0621
+
+import importlib
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.interceptors import pragma_no_mutate
+from cosmic_ray.interceptors.pragma_no_mutate import PragmaNoMutateInterceptor, excluded_regions
+from cosmic_ray.work_db import use_db, WorkDB
+
+SOURCE = '''x = 1
+def f(a=1):  # pragma: no mutate
+    # comment
+    if a:
+        return 2
+    return 3
+y = 4
+class C:
+    def g(self): return 5  # pragma: no mutate
+    def h(self):
+        return 6
+# pragma: no mutate: start
+z = 7
+w = 8
+# pragma: no mutate: end
+async def k(
+        b):  # pragma: no mutate
+    return b
+q = 9  # pragma: no mutate
+r = 10
+'''
+
+
+def test_excluded_regions():
+    assert excluded_regions(SOURCE) == [(2, 6), (9, 9), (12, 15), (16, 18)]
+
+
+def test_unended_start_marker_excludes_the_rest_of_the_module():
+    assert excluded_regions('x = 1\n# pragma: no mutate: start\ny = 2\nz = 3\n') == [(2, 4)]
+
+
+def test_pragma_on_other_statements_is_not_a_scope():
+    assert excluded_regions('if x:  # pragma: no mutate\n    y = 2\n') == []
+
+
+def test_pragma_on_async_statements_is_not_a_scope():
+    source = ('async def f(xs):\n'
+              '    async for x in xs:  # pragma: no mutate\n'
+              '        y = 2\n'
+              '    async with x:  # pragma: no mutate\n'
+              '        z = 3\n')
+    assert excluded_regions(source) == []
+
+
+def test_untokenizable_modules_have_no_excluded_regions(tmpdir_path):
+    interceptor = PragmaNoMutateInterceptor(ConfigDict(), ConfigDict())
+    assert interceptor.excluded_regions(tmpdir_path / 'mod.py', 'x = (1,\n', None) is None
+
+
+@pytest.fixture
+def work_db():
+    with use_db(':memory:', WorkDB.Mode.create) as db:
+        yield db
+
+
+def test_excluded_regions_are_not_added_to_the_session(tmpdir_path, work_db, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    init_module = importlib.import_module('cosmic_ray.commands.init')
+    monkeypatch.setattr(init_module, 'interceptor_names', lambda: ('pragma_no_mutate',))
+    monkeypatch.setattr(init_module, 'get_interceptor', lambda name: PragmaNoMutateInterceptor)
+
+    config = ConfigDict()
+    config['python-version'] = ''
+    config['interceptors'] = ConfigDict()
+    config['interceptors']['enabled'] = ['pragma_no_mutate']
+    init([module_path], work_db, config)
+
+    lines = {item.start_pos[0] for item in work_db.work_items}
+    assert lines == {1, 7, 11, 19, 20}
+
+    # Single-line pragmas still mark their mutations as skipped.
+    skipped = {item.start_pos[0] for item, _ in work_db.completed_work_items}
+    assert skipped == {19}
+
+    # Occurrences are numbered as if no work items had been dropped.
+    occurrences = {(item.operator_name, item.occurrence) for item in work_db.work_items
+                   if item.operator_name == 'core/NumberReplacer'}
+    assert min(occurrence for _, occurrence in occurrences) == 0
+    assert max(occurrence for _, occurrence in occurrences) > len(occurrences) - 1
+
+
+def test_existing_work_items_in_excluded_regions_are_skipped(tmpdir_path, work_db):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    config = ConfigDict()
+    config['python-version'] = ''
+    init([module_path], work_db, config)
+
+    pragma_no_mutate.intercept(work_db)
+
+    pending = {item.start_pos[0] for item in work_db.pending_work_items}
+    assert pending == {1, 7, 11, 20}
@@ -0,0 +1,89 @@
+"Tests for the pre-flight check."
+
+# pylint: disable=C0111
+
+import sys
+
+import pytest
+
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.preflight import PreflightError, preflight
+from cosmic_ray.testing import FAILURE_PATTERNS
+from cosmic_ray.work_item import TestOutcome
+from cosmic_ray.worker import _discount_flaky_tests
+
+
+def _config(code, **preflight_config):
+    config = ConfigDict()
+    config['test-command'] = '{} -c "{}"'.format(sys.executable, code)
+    config['timeout'] = 20
+    config['preflight'] = ConfigDict(enabled=True, runs=3, **preflight_config)
+    return config
+
+
+# Fails `test_flaky` in the second of the concurrent runs.
+_FLAKY = """
+import os, sys
+run = 0
+while True:
+    try:
+        os.mkdir('run{}'.format(run))
+        break
+    except FileExistsError:
+        run += 1
+print('tests/test_foo.py::test_flaky FAILED' if run == 1 else 'ok')
+sys.exit(run == 1)
+"""
+
+
+def _flaky_config(path, **preflight_config):
+    (path / 'flaky.py').write_text(_FLAKY)
+    config = _config('', **preflight_config)
+    config['test-command'] = '{} flaky.py'.format(sys.executable)
+    return config
+
+
+def test_passing_suite_has_no_flaky_tests():
+    assert preflight(_config("print('ok')")) == frozenset()
+
+
+def test_disabled_by_default():
+    config = _config("import sys; sys.exit(1)")
+    del config['preflight']
+    assert preflight(config) == frozenset()
+
+
+def test_failing_suite_raises():
+    config = _config("import sys; print('tests/test_foo.py::test_bar FAILED'); sys.exit(1)")
+    with pytest.raises(PreflightError) as exc_info:
+        preflight(config)
+    assert 'failing tests: tests/test_foo.py::test_bar' in str(exc_info.value)
+
+
+def test_failure_without_test_ids_raises():
+    with pytest.raises(PreflightError):
+        preflight(_config("import sys; sys.exit(1)"))
+
+
+def test_flaky_tests_raise_by_default(tmpdir_path, path_utils):
+    with path_utils.excursion(tmpdir_path):
+        with pytest.raises(PreflightError) as exc_info:
+            preflight(_flaky_config(tmpdir_path))
+    assert 'flaky tests: tests/test_foo.py::test_flaky' in str(exc_info.value)
+
+
+def test_allowed_flaky_tests_are_returned(tmpdir_path, path_utils):
+    with path_utils.excursion(tmpdir_path):
+        flaky = preflight(_flaky_config(tmpdir_path, **{'allow-flaky': True}))
+    assert flaky == {'tests/test_foo.py::test_flaky'}
+
+
+def test_only_flaky_failures_do_not_kill():
+    flaky = frozenset(['tests/test_foo.py::test_flaky'])
+    output = 'tests/test_foo.py::test_flaky FAILED\n==== 1 failed, 1 passed in 0.1s ====\n'
+    outcome, _ = _discount_flaky_tests(TestOutcome.KILLED, output, FAILURE_PATTERNS, flaky)
+    assert outcome == TestOutcome.SURVIVED
+
+    output = 'tests/test_foo.py::test_flaky FAILED\ntests/test_foo.py::test_bar FAILED\n'
+    outcome, _ = _discount_flaky_tests(TestOutcome.KILLED, output, FAILURE_PATTERNS, flaky)
+    assert outcome == TestOutcome.KILLED
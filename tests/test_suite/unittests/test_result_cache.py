@@ -0,0 +1,200 @@
+"Tests for the cross-session result cache."
+
+# pylint: disable=C0111,W0621
+
+import importlib
+import os
+import threading
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.result_cache import ResultCache, cacheable, result_cache, work_item_keys
+from cosmic_ray.test_selection import configure_test_selection, imported_modules
+from cosmic_ray.work_db import use_db, WorkDB
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkResult
+
+execute_module = importlib.import_module('cosmic_ray.commands.execute')
+
+KILLED = WorkResult(output='killed', test_outcome=TestOutcome.KILLED, worker_outcome=WorkerOutcome.NORMAL)
+
+
+def test_results_are_stored_and_retrieved(tmpdir_path):
+    cache = ResultCache(tmpdir_path / 'cache', 1024)
+    assert cache.get('abcdef') is None
+
+    cache.put('abcdef', KILLED)
+    assert cache.get('abcdef') == KILLED
+
+
+def test_unreadable_results_are_misses(tmpdir_path):
+    cache = ResultCache(tmpdir_path / 'cache', 1024)
+    (tmpdir_path / 'cache' / 'ab').mkdir(parents=True)
+    (tmpdir_path / 'cache' / 'ab' / 'abcdef.json').write_text('{')
+    assert cache.get('abcdef') is None
+
+
+def test_least_recently_used_results_are_evicted(tmpdir_path):
+    cache = ResultCache(tmpdir_path / 'cache', 1024)
+    for index, key in enumerate(['aa1', 'bb2', 'cc3']):
+        cache.put(key, KILLED)
+        os.utime(str(tmpdir_path / 'cache' / key[:2] / '{}.json'.format(key)), (index, index))
+    size = (tmpdir_path / 'cache' / 'aa' / 'aa1.json').stat().st_size
+
+    # Reading a result makes it the most recently used one.
+    assert cache.get('aa1') is not None
+
+    cache = ResultCache(tmpdir_path / 'cache', 2 * size)
+    assert cache.evict() == 1
+    assert cache.get('bb2') is None
+    assert cache.get('aa1') == cache.get('cc3') == KILLED
+
+
+def test_concurrent_writers(tmpdir_path):
+    cache = ResultCache(tmpdir_path / 'cache', 1024 * 1024)
+    threads = [threading.Thread(target=lambda: [cache.put('abcdef', KILLED) for _ in range(20)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.get('abcdef') == KILLED
+    assert [path.name for path in (tmpdir_path / 'cache' / 'ab').iterdir()] == ['abcdef.json']
+
+
+def test_timeouts_are_not_cacheable():
+    assert cacheable(KILLED)
+    assert not cacheable(WorkResult(output='timeout', test_outcome=TestOutcome.KILLED,
+                                    worker_outcome=WorkerOutcome.NORMAL))
+    assert not cacheable(WorkResult(output='error', worker_outcome=WorkerOutcome.EXCEPTION))
+
+
+def test_cache_is_optional():
+    assert result_cache(ConfigDict()) is None
+
+
+def _session(tmpdir_path, name, source, test_command='pytest', other_source=None, settings=None):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(source)
+    module_paths = [module_path]
+    if other_source is not None:
+        module_paths.append(tmpdir_path / 'other.py')
+        module_paths[-1].write_text(other_source)
+    config = ConfigDict()
+    config['python-version'] = ''
+    config['test-command'] = test_command
+    config['execution-engine'] = ConfigDict({'name': 'fake'})
+    config['result-cache'] = ConfigDict({
+        'dir': str(tmpdir_path / 'cache'),
+        'suite-files': [str(tmpdir_path / 'test_*.py')],
+    })
+    config.update(settings or {})
+    session = str(tmpdir_path / name)
+    with use_db(session) as work_db:
+        work_db.set_config(config)
+        init(module_paths, work_db, config)
+        configure_test_selection(work_db, config)
+        keys = work_item_keys(work_db.pending_work_items, config, work_db.source_digests,
+                              imported_modules(work_db.module_paths, work_db, config))
+        items = {item.job_id: item for item in work_db.pending_work_items}
+    return session, {(items[job_id].module_path.name, items[job_id].operator_name, items[job_id].occurrence): key
+                     for job_id, key in keys.items()}
+
+
+def test_identical_mutants_have_identical_keys(tmpdir_path):
+    _, keys = _session(tmpdir_path, 'a.sqlite', 'x = 1\ny = 2\n')
+    _, other_keys = _session(tmpdir_path, 'b.sqlite', 'x = 1\ny = 2\n')
+    assert keys and keys == other_keys
+    assert len(set(keys.values())) == len(keys)
+
+    # Changes to the module, the test command or the test suite change the keys.
+    _, other_keys = _session(tmpdir_path, 'c.sqlite', 'x = 1\ny = 3\n')
+    assert not set(keys.values()) & set(other_keys.values())
+    _, other_keys = _session(tmpdir_path, 'd.sqlite', 'x = 1\ny = 2\n', test_command='pytest -x')
+    assert not set(keys.values()) & set(other_keys.values())
+    (tmpdir_path / 'test_mod.py').write_text('def test(): pass\n')
+    _, other_keys = _session(tmpdir_path, 'e.sqlite', 'x = 1\ny = 2\n')
+    assert not set(keys.values()) & set(other_keys.values())
+
+
+def test_without_test_selection_changes_to_any_module_change_the_keys(tmpdir_path):
+    _, keys = _session(tmpdir_path, 'a.sqlite', 'x = 1\n', other_source='y = 2\n')
+    _, other_keys = _session(tmpdir_path, 'b.sqlite', 'x = 1\n', other_source='y = 3\n')
+    mod_keys = {key for (name, *_), key in keys.items() if name == 'mod.py'}
+    assert mod_keys
+    assert not mod_keys & set(other_keys.values())
+
+
+def _mod_keys(keys):
+    return {key for (name, *_), key in keys.items() if name == 'mod.py'}
+
+
+def test_only_changes_to_modules_the_tests_import_change_the_keys(tmpdir_path):
+    selection = {'test-selection': ConfigDict({
+        'method': 'import-graph',
+        'test-paths': [str(tmpdir_path)],
+        'source-roots': [str(tmpdir_path)],
+    })}
+    (tmpdir_path / 'test_mod.py').write_text('import mod\n')
+    _, keys = _session(tmpdir_path, 'a.sqlite', 'x = 1\n', 'pytest {tests}', 'y = 2\n', selection)
+    _, other_keys = _session(tmpdir_path, 'b.sqlite', 'x = 1\n', 'pytest {tests}', 'y = 3\n', selection)
+    assert _mod_keys(keys)
+    assert _mod_keys(keys) == _mod_keys(other_keys)
+
+    (tmpdir_path / 'test_mod.py').write_text('import mod\nimport other\n')
+    _, keys = _session(tmpdir_path, 'c.sqlite', 'x = 1\n', 'pytest {tests}', 'y = 2\n', selection)
+    _, other_keys = _session(tmpdir_path, 'd.sqlite', 'x = 1\n', 'pytest {tests}', 'y = 3\n', selection)
+    assert _mod_keys(keys)
+    assert not _mod_keys(keys) & _mod_keys(other_keys)
+
+
+@pytest.mark.parametrize('settings', [
+    {'fail-fast': True},
+    {'failure-patterns': [r'^FAIL: (?P<test>\S+)']},
+    {'kill-first': ConfigDict({'enabled': True})},
+    {'preflight': ConfigDict({'enabled': True, 'allow-flaky': True})},
+])
+def test_settings_of_test_runs_change_the_keys(tmpdir_path, settings):
+    _, keys = _session(tmpdir_path, 'a.sqlite', 'x = 1\n')
+    _, other_keys = _session(tmpdir_path, 'b.sqlite', 'x = 1\n', settings=settings)
+    assert keys
+    assert not set(keys.values()) & set(other_keys.values())
+
+
+def test_modules_changed_since_init_have_no_keys(tmpdir_path):
+    session, _ = _session(tmpdir_path, 'a.sqlite', 'x = 1\n')
+    (tmpdir_path / 'mod.py').write_text('x = 2\n')
+    with use_db(session, WorkDB.Mode.open) as work_db:
+        keys = work_item_keys(work_db.pending_work_items, work_db.get_config(), work_db.source_digests)
+    assert keys == {}
+
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    "Replace the execution engine with one which records the work items it's passed."
+    executed = []
+
+    def _engine(work_items, config, on_task_complete):
+        for item in work_items:
+            executed.append(item.job_id)
+            on_task_complete(item.job_id, KILLED)
+
+    monkeypatch.setattr(execute_module, 'get_execution_engine', lambda name: _engine)
+    return executed
+
+
+def test_exec_uses_cached_results(tmpdir_path, fake_engine):
+    session, _ = _session(tmpdir_path, 'a.sqlite', 'x = 1\ny = 2\n')
+    execute_module.execute(session)
+    assert fake_engine
+
+    # A re-initialized session gets all its results from the cache.
+    fake_engine.clear()
+    session, _ = _session(tmpdir_path, 'b.sqlite', 'x = 1\ny = 2\n')
+    execute_module.execute(session)
+    assert fake_engine == []
+    with use_db(session, WorkDB.Mode.open) as work_db:
+        assert work_db.num_results == work_db.num_work_items
+        assert all(result.test_outcome == TestOutcome.KILLED for _, result in work_db.results)
@@ -0,0 +1,125 @@
+"Tests for mutant schemata."
+
+# pylint: disable=C0111,W0621
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.mutating import apply_mutation
+from cosmic_ray.plugins import get_operator
+from cosmic_ray.schemata import ACTIVE_MUTANT_VAR, build_schema, configure_schemata
+from cosmic_ray.work_db import use_db, WorkDB
+from cosmic_ray.work_item import TestOutcome
+from cosmic_ray.worker import run_work_item, worker
+
+SOURCE = '''"""A module."""
+
+
+@staticmethod
+def ident(x):
+    return x
+
+
+def f(a, b=2):
+    """Compute
+    something."""
+    text = """first
+second"""
+    if a < b: return a * b
+    for i in range(3):
+        if i == a:
+            break
+    return a + b, i, len(text)
+'''
+
+
+@pytest.fixture
+def module(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+
+    config = ConfigDict()
+    config['python-version'] = python_version
+    with use_db(':memory:', WorkDB.Mode.create) as work_db:
+        init([module_path], work_db, config)
+        yield module_path, list(work_db.pending_work_items)
+
+
+def _run_f(code, *args):
+    namespace = {}
+    exec(compile(code, 'mod.py', 'exec'), namespace)  # pylint: disable=exec-used
+    try:
+        return namespace['f'](*args), namespace['f'].__doc__
+    except Exception as exc:  # pylint: disable=broad-except
+        return type(exc)
+
+
+def test_schema_activates_each_mutant(module, python_version, monkeypatch):
+    module_path, items = module
+    schema = build_schema(module_path, items, python_version)
+    assert set(schema.diffs) == set(item.job_id for item in items)
+
+    monkeypatch.delenv(ACTIVE_MUTANT_VAR, raising=False)
+    assert _run_f(schema.code, 1) == _run_f(SOURCE, 1)
+
+    for item in items:
+        if item.job_id in schema.incompetent:
+            continue
+        operator = get_operator(item.operator_name)(python_version)
+        _, mutated_code = apply_mutation(module_path, operator, item.occurrence)
+        module_path.write_text(SOURCE)
+
+        monkeypatch.setenv(ACTIVE_MUTANT_VAR, item.job_id)
+        for args in ((1,), (5,), (0, 0)):
+            assert _run_f(schema.code, *args) == _run_f(mutated_code, *args), item
+
+
+def test_schema_keeps_multiline_strings(module, python_version):
+    module_path, items = module
+    schema = build_schema(module_path, items, python_version)
+    assert '\nsecond"""' in schema.code
+    assert '\n    something."""' in schema.code
+
+
+def test_worker_activates_mutant(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    command = '{} -c "import os, sys; sys.exit(os.environ[\'{}\'] == \'job\')"'.format(
+        sys.executable, ACTIVE_MUTANT_VAR)
+
+    result = worker(module_path, python_version, 'core/NumberReplacer', 0, command, 100,
+                    active_mutant='job')
+
+    assert result.test_outcome == TestOutcome.KILLED
+    assert result.diff is None
+    assert module_path.read_text() == SOURCE
+
+
+def test_schemata_are_stored_beside_the_session(tmpdir_path, python_version, path_utils):
+    workspace = tmpdir_path / 'workspace'
+    workspace.mkdir()
+    (workspace / 'mod.py').write_text(SOURCE)
+    config = ConfigDict()
+    config['python-version'] = python_version
+    config['test-command'] = '{} -c "import mod"'.format(sys.executable)
+    config['timeout'] = 100
+    config['schemata'] = ConfigDict({'enabled': True})
+
+    with path_utils.excursion(workspace):
+        with use_db(str(tmpdir_path / 'session.sqlite')) as work_db:
+            init([Path('mod.py')], work_db, config)
+            configure_schemata(work_db, config)
+            item = next(iter(work_db.pending_work_items))
+
+        # The config only refers to the instrumented module.
+        schema_path = Path(config['schemata']['modules']['mod.py'])
+        assert schema_path.parent == tmpdir_path / 'session.sqlite.schemata'
+        assert ACTIVE_MUTANT_VAR in schema_path.read_text()
+
+        result = run_work_item(item, config)
+        assert result.test_outcome is not None
+        assert (workspace / 'mod.py').read_text() == schema_path.read_text()
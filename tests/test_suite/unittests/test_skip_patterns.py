@@ -0,0 +1,103 @@
+"Tests for the skip-patterns interceptor."
+
+# pylint: disable=C0111,W0621
+
+import importlib
+
+import parso
+import pytest
+
+from cosmic_ray.ast import get_cached_ast
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.interceptors.skip_patterns import SkipPatternsInterceptor
+from cosmic_ray.work_db import use_db, WorkDB
+
+SOURCE = '''from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    X = 1
+else:
+    X = 2
+class C:
+    def __repr__(self):
+        return "C(%d)" % (3 + 4)
+    def f(self):
+        """Doc."""
+        raise NotImplementedError("f")
+    def g(self):
+        raise ValueError(5)
+def k(x):
+    log.info("x %d", x + 6)
+    self.logger.debug(x, 7)
+    assert x > 8
+    print(x, 9)
+    raise NotImplementedError(10)
+'''
+
+
+def _regions(source, **config):
+    interceptor = SkipPatternsInterceptor(ConfigDict(config), ConfigDict())
+    return sorted(interceptor.find_regions(parso.parse(source)))
+
+
+def test_default_patterns():
+    assert _regions(SOURCE) == [
+        ((2, 0), (4, 0)),
+        ((7, 4), (9, 0)),
+        ((9, 4), (12, 0)),
+        ((11, 8), (11, 38)),
+        ((15, 4), (15, 27)),
+        ((16, 4), (16, 27)),
+        ((17, 4), (17, 16)),
+        ((19, 4), (19, 33)),
+    ]
+
+
+def test_patterns_can_be_disabled():
+    assert _regions(SOURCE, **{
+        'type-checking': False,
+        'functions': [],
+        'calls': [],
+        'assert': False,
+        'not-implemented': False,
+    }) == []
+
+
+def test_function_and_call_patterns_are_wildcards():
+    source = 'def get_x():\n    return 1\ndef set_x():\n    emit.info(2)\n    emit(3)\n'
+    assert _regions(source, functions=['get_*'], calls=['emit.*']) == [
+        ((1, 0), (3, 0)),
+        ((4, 4), (4, 16)),
+    ]
+
+
+def test_only_stubs_which_raise_not_implemented_error_are_skipped():
+    source = 'def f():\n    x = 1\n    raise NotImplementedError\n'
+    assert _regions(source) == [((3, 4), (3, 29))]
+
+
+@pytest.fixture
+def work_db():
+    with use_db(':memory:', WorkDB.Mode.create) as db:
+        yield db
+
+
+def test_matching_code_is_not_added_to_the_session(tmpdir_path, work_db, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    init_module = importlib.import_module('cosmic_ray.commands.init')
+    monkeypatch.setattr(init_module, 'interceptor_names', lambda: ('skip-patterns',))
+    monkeypatch.setattr(init_module, 'get_interceptor', lambda name: SkipPatternsInterceptor)
+
+    config = ConfigDict()
+    config['python-version'] = ''
+    config['interceptors'] = ConfigDict()
+    config['interceptors']['enabled'] = ['skip-patterns']
+    init([module_path], work_db, config)
+
+    lines = {item.start_pos[0] for item in work_db.work_items}
+    assert lines == {5, 13, 18}
+
+    # The interceptor and init share the parse tree of the module.
+    tree = get_cached_ast(module_path, config.python_version, source=SOURCE)
+    assert get_cached_ast(module_path, config.python_version) is tree
@@ -0,0 +1,91 @@
+"Tests for the source index."
+
+# pylint: disable=C0111
+
+import pytest
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.source_index import SourceIndex, source_digest, source_index
+from cosmic_ray.work_db import use_db, WorkDB
+
+SOURCE = '''import os  # imports
+
+
+@decorator
+class C:
+    def f(self):
+        def g():
+            return 1  # pragma: no mutate
+        return g
+
+    async def h(self):
+        s = "# not a comment"
+
+
+x = 1
+'''
+
+
+def test_offsets():
+    index = source_index(SOURCE)
+    lines = SOURCE.splitlines(keepends=True)
+    assert index.num_lines == len(lines)
+    for line_number, line in enumerate(lines, 1):
+        assert SOURCE[index.offset(line_number, 0):].startswith(line)
+    assert index.offset(15, 6) == len(SOURCE)
+
+
+@pytest.mark.parametrize('line', [0, 16])
+def test_offsets_of_missing_lines(line):
+    with pytest.raises(ValueError):
+        source_index(SOURCE).offset(line, 0)
+
+
+def test_comments():
+    assert source_index(SOURCE).comments == {1: '# imports', 8: '# pragma: no mutate'}
+
+
+def test_scopes():
+    index = source_index(SOURCE)
+    assert index.scopes == [
+        (5, 12, 'class', 'C'),
+        (6, 9, 'def', 'C.f'),
+        (7, 8, 'def', 'C.f.g'),
+        (11, 12, 'def', 'C.h'),
+    ]
+    assert index.scope_at(5) == 'C'
+    assert index.function_at(5) is None
+    assert index.function_at(8) == 'C.f.g'
+    assert index.function_at(9) == 'C.f'
+    assert index.function_at(12) == 'C.h'
+    assert index.scope_at(15) is None
+
+
+def test_digest():
+    assert source_index(SOURCE).digest == source_digest(SOURCE)
+    assert source_digest(SOURCE) != source_digest(SOURCE + '\n')
+
+
+def test_json_round_trip():
+    index = source_index(SOURCE)
+    copy = SourceIndex.from_json(index.to_json())
+    assert (copy.digest, copy.comments, copy.scopes) == (index.digest, index.comments, index.scopes)
+    assert copy.offset(15, 0) == index.offset(15, 0)
+
+
+def test_broken_code_is_indexed_as_far_as_possible():
+    index = source_index('x = 1  # one\ny = (\n')
+    assert index.num_lines == 2
+    assert index.comments == {1: '# one'}
+    assert index.scopes == []
+
+
+def test_init_stores_the_source_index(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(SOURCE)
+    config = ConfigDict()
+    config['python-version'] = python_version
+    with use_db(':memory:', WorkDB.Mode.create) as work_db:
+        init([module_path], work_db, config)
+        assert work_db.get_source_index(module_path).scopes == source_index(SOURCE).scopes
@@ -1,101 +1,117 @@
 import pytest
 
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.source_index import source_index
 from cosmic_ray.work_item import WorkItem
-from cosmic_ray.interceptors.spor import _item_in_context, _line_and_col_to_offset
-from spor.anchor import Context
-
-
-@pytest.fixture
-def lines():
-    return ['123\n', '456\n', '789']
-
-
-class Test_line_and_col_to_offset:
-    def test_simple(self, lines):
-        offset = _line_and_col_to_offset(lines, 2, 1)
-        assert offset == 5
-
-    def test_non_existent_col(self, lines):
-        assert _line_and_col_to_offset(lines, 3, 5) == 13
-
-    def test_raises_value_error_for_bad_line(self, lines):
-        with pytest.raises(ValueError):
-            _line_and_col_to_offset(lines, 4, 1)
-
-    def test_raises_value_error_for_one_past_end(self, lines):
-        assert _line_and_col_to_offset(lines, 3, 3) == 11
-
-    def test_first_char(self, lines):
-        assert _line_and_col_to_offset(lines, 1, 0) == 0
-
-    def test_last_char(self, lines):
-        assert _line_and_col_to_offset(lines, 3, 2) == 10
-
-
-class Test_item_in_context:
-    def test_positive(self, lines):
-        item = WorkItem(
-            module_path='foo.py',
-            operator_name='operator',
-            occurrence=0,
-            start_pos=(1, 1),
-            end_pos=(2, 3),
-            job_id='jobid')
-
-        context = Context(
-            offset=0, topic=' ' * 11, before='', after='', width=0)
-
-        assert _item_in_context(lines, item, context)
-
-    def test_positive_for_perfect_match(self, lines):
-        item = WorkItem(
-            module_path='foo.py',
-            operator_name='operator',
-            occurrence=0,
-            start_pos=(1, 0),
-            end_pos=(3, 2),
-            job_id='jobid')
-
-        context = Context(
-            offset=0, topic=' ' * 11, before='', after='', width=0)
-
-        assert _item_in_context(lines, item, context)
-
-    def test_negative_fully_outside(self, lines):
-        item = WorkItem(
-            module_path='foo.py',
-            operator_name='operator',
-            occurrence=0,
-            start_pos=(1, 0),
-            end_pos=(1, 2),
-            job_id='jobid')
-
-        context = Context(offset=5, topic='', before='', after='', width=3)
-
-        assert not _item_in_context(lines, item, context)
-
-    def test_negative_overlap_front(self, lines):
-        item = WorkItem(
-            module_path='foo.py',
-            operator_name='operator',
-            occurrence=0,
-            start_pos=(1, 0),
-            end_pos=(2, 0),
-            job_id='jobid')
-
-        context = Context(offset=1, topic='', before='', after='', width=2)
-
-        assert not _item_in_context(lines, item, context)
-
-    def test_negative_overlap_back(self, lines):
-        item = WorkItem(
-            module_path='foo.py',
-            operator_name='operator',
-            occurrence=0,
-            start_pos=(2, 0),
-            end_pos=(3, 3),
-            job_id='jobid')
-
-        context = Context(offset=5, topic='', before='', after='', width=6)
-
-        assert not _item_in_context(lines, item, context)
+from cosmic_ray.interceptors import spor as spor_interceptor
+from cosmic_ray.interceptors.spor import _AnchorIndex
+from spor.anchor import Context, make_anchor
+
+
+class Test_AnchorIndex:
+    def test_contains_regions_inside_any_anchor(self):
+        index = _AnchorIndex([
+            Context(offset=10, topic='x' * 5, before='', after='', width=0),
+            Context(offset=0, topic='x' * 20, before='', after='', width=0),
+            Context(offset=30, topic='x' * 3, before='', after='', width=0),
+        ])
+
+        assert index.contains(0, 20)
+        assert index.contains(12, 15)
+        assert index.contains(30, 33)
+        assert not index.contains(19, 21)
+        assert not index.contains(25, 31)
+        assert not index.contains(32, 34)
+
+    def test_empty(self):
+        assert not _AnchorIndex([]).contains(0, 1)
+
+
+class FakeRepository:
+    "A spor repository with anchors for a single module."
+    reads = 0
+    opens = 0
+
+    def __init__(self, root, anchors):
+        self.root = root
+        self._anchors = anchors
+
+    def items(self):
+        FakeRepository.reads += 1
+        return enumerate(self._anchors)
+
+
+def _open(repo):
+    FakeRepository.opens += 1
+    return repo
+
+
+def test_intercept_skips_items_in_anchors(tmpdir_path, monkeypatch):
+    module_path = (tmpdir_path / 'mod.py').absolute()
+    source = 'x = 1\ny = 2\nz = 3\n'
+    module_path.write_text(source)
+    repo = FakeRepository(tmpdir_path, [
+        make_anchor(module_path, offset=6, width=5, context_width=3, metadata={'mutate': False}),
+        make_anchor(module_path, offset=12, width=5, context_width=3, metadata={'mutate': True}),
+    ])
+    monkeypatch.setattr(spor_interceptor, 'open_repository', lambda path: _open(repo))
+    FakeRepository.reads = 0
+    FakeRepository.opens = 0
+
+    items = [
+        WorkItem(module_path=module_path, operator_name='operator', occurrence=0,
+                 start_pos=(line, 4), end_pos=(line, 5), job_id=str(line))
+        for line in (1, 2, 3)
+    ]
+    interceptor = spor_interceptor.SporInterceptor(ConfigDict(), ConfigDict())
+    for _ in range(2):
+        skipped = [job_id for job_id, _ in interceptor.intercept(module_path, source, items, source_index(source))]
+        assert skipped == ['2']
+
+    # The repository is only opened and its anchors are only read once.
+    assert FakeRepository.opens == 1
+    assert FakeRepository.reads == 1
+
+
+@pytest.mark.parametrize('start_pos, end_pos, skipped', [
+    ((2, 0), (2, 3), True),
+    ((2, 1), (2, 2), True),
+    ((1, 3), (2, 1), False),
+    ((2, 2), (3, 0), False),
+    # Short items after an anchor are not inside it.
+    ((3, 0), (3, 1), False),
+])
+def test_intercept_only_skips_items_completely_inside_anchors(tmpdir_path, monkeypatch, start_pos, end_pos, skipped):
+    module_path = (tmpdir_path / 'mod.py').absolute()
+    source = '123\n456\n789\n'
+    module_path.write_text(source)
+    repo = FakeRepository(tmpdir_path, [
+        make_anchor(module_path, offset=4, width=3, context_width=0, metadata={'mutate': False}),
+    ])
+    monkeypatch.setattr(spor_interceptor, 'open_repository', lambda path: repo)
+
+    item = WorkItem(module_path=module_path, operator_name='operator', occurrence=0,
+                    start_pos=start_pos, end_pos=end_pos, job_id='jobid')
+    interceptor = spor_interceptor.SporInterceptor(ConfigDict(), ConfigDict())
+    results = list(interceptor.intercept(module_path, source, [item], source_index(source)))
+    assert bool(results) == skipped
+
+
+def test_modules_without_a_repository_are_not_intercepted(tmpdir_path, monkeypatch):
+    module_path = (tmpdir_path / 'mod.py').absolute()
+    source = 'x = 1\n'
+    module_path.write_text(source)
+
+    def no_repository(path):
+        FakeRepository.opens += 1
+        raise ValueError('no repository')
+
+    monkeypatch.setattr(spor_interceptor, 'open_repository', no_repository)
+    FakeRepository.opens = 0
+
+    item = WorkItem(module_path=module_path, operator_name='operator', occurrence=0,
+                    start_pos=(1, 4), end_pos=(1, 5), job_id='jobid')
+    interceptor = spor_interceptor.SporInterceptor(ConfigDict(), ConfigDict())
+    for _ in range(2):
+        assert list(interceptor.intercept(module_path, source, [item], source_index(source))) == []
+    assert FakeRepository.opens == 1
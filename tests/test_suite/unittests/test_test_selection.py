@@ -0,0 +1,90 @@
+"Tests for import-graph test selection."
+
+# pylint: disable=C0111,W0621
+
+import pytest
+
+from cosmic_ray.config import ConfigDict, ConfigValueError
+from cosmic_ray.test_selection import imported_modules, select_tests
+from cosmic_ray.work_db import use_db, WorkDB
+
+
+@pytest.fixture
+def work_db():
+    with use_db(':memory:', WorkDB.Mode.create) as db:
+        yield db
+
+
+@pytest.fixture
+def project(tmpdir_path, path_utils):
+    files = {
+        'pkg/__init__.py': '',
+        'pkg/core.py': 'X = 1\n',
+        'pkg/util.py': 'from .core import X\n',
+        'pkg/other.py': 'Y = 2\n',
+        'tests/__init__.py': '',
+        'tests/helpers.py': 'import pkg.util\n',
+        'tests/test_util.py': 'from tests import helpers\n',
+        'tests/test_core.py': 'def test():\n    from pkg import core\n',
+    }
+    for name, contents in files.items():
+        path = tmpdir_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents)
+
+    with path_utils.excursion(tmpdir_path):
+        yield tmpdir_path
+
+
+def _config():
+    config = ConfigDict()
+    config['test-command'] = 'pytest {tests}'
+    config['test-selection'] = ConfigDict({'method': 'import-graph'})
+    return config
+
+
+def test_selects_transitive_importers(project, work_db):
+    selection = select_tests(['pkg/core.py', 'pkg/util.py', 'pkg/other.py'], work_db, _config())
+
+    assert selection == {
+        'pkg/core.py': ['tests/test_core.py', 'tests/test_util.py'],
+        'pkg/util.py': ['tests/test_util.py'],
+    }
+
+
+def test_finds_the_modules_the_selected_tests_import(project, work_db):
+    module_paths = ['pkg/core.py', 'pkg/util.py', 'pkg/other.py']
+    config = _config()
+    config['test-selection']['selected'] = ConfigDict(select_tests(module_paths, work_db, config))
+
+    assert imported_modules(module_paths, work_db, config) == {
+        'pkg/core.py': {'pkg/util.py'},
+        'pkg/util.py': {'pkg/core.py'},
+    }
+
+
+def test_test_command_needs_a_placeholder(project, work_db):
+    config = _config()
+    config['test-command'] = 'pytest'
+    with pytest.raises(ConfigValueError):
+        select_tests(['pkg/core.py'], work_db, config)
+
+
+def test_imports_are_cached_by_hash(project, work_db):
+    select_tests(['pkg/core.py'], work_db, _config())
+    graph = work_db.import_graph
+    assert graph['tests/helpers.py'][1] == ['pkg', 'pkg.util']
+
+    (project / 'tests' / 'helpers.py').write_text('import pkg.other\n')
+    selection = select_tests(['pkg/other.py'], work_db, _config())
+
+    assert work_db.import_graph['tests/helpers.py'][0] != graph['tests/helpers.py'][0]
+    assert selection == {'pkg/other.py': ['tests/test_util.py']}
+
+
+def test_test_command_for_uses_selection():
+    config = _config()
+    config['test-selection']['selected'] = ConfigDict({'pkg/core.py': ['tests/test_core.py']})
+
+    assert config.test_command_for('pkg/core.py') == 'pytest tests/test_core.py'
+    assert config.test_command_for('pkg/other.py') == 'pytest '
@@ -0,0 +1,74 @@
+"Tests for running test commands."
+
+# pylint: disable=C0111
+
+import sys
+
+from cosmic_ray.testing import FAILURE_PATTERNS, KillHistory, count_failures, find_failed_test, run_tests
+from cosmic_ray.timing import Timer
+from cosmic_ray.work_item import TestOutcome
+
+
+def _python_command(code):
+    return '{} -c "{}"'.format(sys.executable, code)
+
+
+def test_fail_fast_stops_at_first_failure():
+    command = _python_command(
+        "import sys, time; print('tests/test_foo.py::test_bar FAILED'); sys.stdout.flush(); time.sleep(30)")
+
+    with Timer() as timer:
+        outcome, output = run_tests(command, 20, FAILURE_PATTERNS)
+
+    assert outcome == TestOutcome.KILLED
+    assert 'test_bar' in output
+    assert timer.elapsed.total_seconds() < 10
+
+
+def test_passing_run_without_failures_survives():
+    outcome, _ = run_tests(_python_command("print('ok')"), 20, FAILURE_PATTERNS)
+    assert outcome == TestOutcome.SURVIVED
+
+
+def test_find_failed_pytest_test():
+    output = 'tests/test_foo.py::test_ok PASSED\ntests/test_foo.py::test_bar FAILED   [ 50%]\n'
+    assert find_failed_test(output) == 'tests/test_foo.py::test_bar'
+
+
+def test_find_failed_unittest_test():
+    output = 'test_ok (tests.test_foo.Tests) ... ok\ntest_bar (tests.test_foo.Tests) ... FAIL\n'
+    assert find_failed_test(output) == 'tests.test_foo.Tests.test_bar'
+
+
+def test_find_failed_unittest_test_with_full_id():
+    output = 'test_bar (tests.test_foo.Tests.test_bar) ... ERROR\n'
+    assert find_failed_test(output) == 'tests.test_foo.Tests.test_bar'
+
+
+def test_find_failed_test_returns_None_without_failures():
+    assert find_failed_test('test_ok (tests.test_foo.Tests) ... ok\n') is None
+
+
+def test_count_failures_in_pytest_summary():
+    assert count_failures('x\n===== 1 failed, 2 passed, 1 error in 0.05s =====\n') == 2
+    assert count_failures('3 passed in 0.05s\n') == 0
+
+
+def test_count_failures_in_unittest_summary():
+    assert count_failures('Ran 3 tests in 0.001s\n\nFAILED (failures=1, errors=2)\n') == 3
+
+
+def test_count_failures_without_summary():
+    assert count_failures('tests/test_foo.py::test_bar FAILED\n') is None
+
+
+def test_kill_history_prefers_function_then_module():
+    history = KillHistory()
+    history.record('mod.py', 'f', 'test_f')
+    history.record('mod.py', 'g', 'test_g')
+    history.record('mod.py', 'g', 'test_g')
+
+    assert history.tests('mod.py', 'f', 5) == ['test_f', 'test_g']
+    assert history.tests('mod.py', 'h', 5) == ['test_g', 'test_f']
+    assert history.tests('mod.py', 'f', 1) == ['test_f']
+    assert history.tests('other.py', 'f', 5) == []
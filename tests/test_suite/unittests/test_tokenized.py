@@ -0,0 +1,115 @@
+"Tests for finding mutations without parso."
+
+# pylint: disable=C0111
+
+from pathlib import Path
+
+import pytest
+
+import cosmic_ray
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.plugins import get_operator, operator_names
+from cosmic_ray.tokenized import tokenize_module
+from cosmic_ray.work_db import use_db, WorkDB
+
+TRICKY_SOURCE = '''
+import os
+from os.path import *
+
+
+@decorator  # a comment
+@other.decorator(1, *args, **kwargs)
+class C(Base, metaclass=Meta):
+    def f(self, a, *args, b=-1, **kwargs):
+        return (a) < b, a is not None, not a in b, a not in (b), x if y else z if a else ~b
+
+    async def g(self):
+        async for item in (self.items):
+            yield -item ** 2 // 3
+        while (a and
+               b):  # comment
+            assert a, b
+        else:
+            pass
+
+
+def h(x=1.5e3, y=0x10, *, z=1j):
+    try:
+        s = 'ünïcödé' + "x" * 2; t = [*x, *y]; u = {**x}
+    except (ValueError, KeyError) as exc:
+        raise
+    except IndexError:
+        return lambda *a, **k: a @ k - -1
+    if x:
+        pass
+    elif y:
+        x += 1
+    for i in range(10): continue
+    print(x, y, sep=-1 if x else +2)
+'''
+
+_SOURCES = {
+    'tricky': TRICKY_SOURCE,
+    'operators': ''.join(
+        from_code + '\n'
+        for operator_class in map(get_operator, operator_names())
+        for from_code, *_ in operator_class.examples()),
+}
+
+
+def _work_items(module_path, python_version, parser):
+    config = ConfigDict()
+    config['python-version'] = python_version
+    config['parser'] = parser
+    with use_db(':memory:', WorkDB.Mode.create) as work_db:
+        init([module_path], work_db, config)
+        return sorted(
+            (item.operator_name, item.occurrence, item.start_pos, item.end_pos, item.splice)
+            for item in work_db.work_items)
+
+
+def _assert_same_work_items(module_path, python_version):
+    assert tokenize_module(module_path.read_text(), python_version) is not None
+    assert _work_items(module_path, python_version, 'tokenize') == \
+        _work_items(module_path, python_version, 'parso')
+
+
+@pytest.mark.parametrize('name', sorted(_SOURCES))
+def test_parsers_find_the_same_mutations(name, tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text(_SOURCES[name])
+    _assert_same_work_items(module_path, python_version)
+
+
+@pytest.mark.parametrize(
+    'module_path',
+    sorted(Path(cosmic_ray.__file__).parent.glob('**/*.py')),
+    ids=lambda path: path.name)
+def test_parsers_find_the_same_mutations_in_cosmic_ray(module_path, python_version):
+    _assert_same_work_items(module_path, python_version)
+
+
+@pytest.mark.parametrize('code', [
+    "x = f'{a + 1}'\n",
+    'x = 1 +\n',
+    '\ufeffx = 1 + 2\n',
+    'x = 1 + 2\r\n',
+])
+def test_unsupported_modules_use_parso(code, python_version):
+    assert tokenize_module(code, python_version) is None
+
+
+def test_other_python_versions_use_parso():
+    assert tokenize_module('x = 1\n', '2.7') is None
+
+
+@pytest.mark.parametrize('op_name, code', [
+    ('core/ExceptionReplacer', 'try:\n    pass\nexcept (ValueError):\n    pass\n'),
+    ('core/ReplaceBinaryOperator_Mul_Add', 'def f(a, *, b):\n    pass\n'),
+])
+def test_operators_fall_back_on_unusual_code(op_name, code, python_version):
+    module = tokenize_module(code, python_version)
+    operator = get_operator(op_name)(python_version)
+    assert operator.token_mutations(module) is None
+
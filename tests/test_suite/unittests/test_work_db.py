@@ -1,8 +1,11 @@
 "Tests for the WorkDB"
 
+import sqlite3
+
 import pytest
 
 from cosmic_ray.config import ConfigDict
+from cosmic_ray.source_index import source_index
 from cosmic_ray.work_db import use_db, WorkDB
 from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkItem, WorkResult
 
@@ -26,6 +29,28 @@ def test_find_pending_job(work_db):
     assert pending == [item]
 
 
+def test_work_item_splice_is_stored(work_db):
+    item = WorkItem('path', 'operator', 0, (0, 0), (0, 1), 'job_id', splice=(3, 4, '+'))
+    work_db.add_work_item(item)
+    assert list(work_db.work_items) == [item]
+    assert list(work_db.work_items)[0].splice == (3, 4, '+')
+
+
+def test_splice_columns_are_added_to_old_sessions(tmpdir_path):
+    db_path = str(tmpdir_path / 'session.sqlite')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+        CREATE TABLE work_items
+        (module_path text, operator text, occurrence int, start_line int,
+         start_col int, end_line int, end_col int, job_id text primary key)
+        ''')
+        conn.execute("INSERT INTO work_items VALUES ('path', 'operator', 0, 0, 0, 0, 1, 'job_id')")
+    conn.close()
+
+    with use_db(db_path, WorkDB.Mode.open) as work_db:
+        assert [item.splice for item in work_db.work_items] == [None]
+
+
 def test_jobs_with_results_are_not_pending(work_db):
     work_db.add_work_item(
         WorkItem('path', 'operator', 0, (0, 0), (0, 1), 'job_id'))
@@ -212,3 +237,34 @@ def test_get_config_returns_correct_config(work_db):
 
     actual_config = work_db.get_config()
     assert actual_config['color'] == 'blue'
+
+
+def test_source_index_is_stored(work_db):
+    index = source_index('def f():\n    return 1  # one\n')
+    work_db.set_source_index('mod.py', index)
+
+    stored = work_db.get_source_index('mod.py')
+    assert stored.digest == index.digest
+    assert stored.comments == index.comments
+    assert stored.scopes == index.scopes
+    assert work_db.source_digests == {'mod.py': index.digest}
+    assert work_db.get_source_index('other.py') is None
+
+
+def test_clear_removes_source_indices(work_db):
+    work_db.set_source_index('mod.py', source_index('x = 1\n'))
+    work_db.clear()
+    assert work_db.source_digests == {}
+
+
+def test_work_items_have_the_digest_of_their_module(work_db):
+    index = source_index('x = 1\n')
+    work_db.set_source_index('mod.py', index)
+    work_db.add_work_item(WorkItem('mod.py', 'operator', 0, (1, 4), (1, 5), 'job_id', splice=(4, 5, '2')))
+    work_db.add_work_item(WorkItem('other.py', 'operator', 0, (1, 4), (1, 5), 'other_job_id'))
+    work_db.set_result('job_id', WorkResult(worker_outcome=WorkerOutcome.NORMAL, test_outcome=TestOutcome.KILLED))
+
+    digests = {item.job_id: item.source_digest for item in work_db.work_items}
+    assert digests == {'job_id': index.digest, 'other_job_id': None}
+    assert [item.source_digest for item, _ in work_db.completed_work_items] == [index.digest]
+    assert [item.source_digest for item in work_db.pending_work_items] == [None]
@@ -2,7 +2,12 @@
 
 from pathlib import Path
 
-from cosmic_ray.work_item import WorkerOutcome, WorkResult
+import cosmic_ray.worker
+from cosmic_ray.ast import get_cached_ast
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.source_index import source_digest
+from cosmic_ray.testing import FAILURE_PATTERNS
+from cosmic_ray.work_item import TestOutcome, WorkerOutcome, WorkItem, WorkResult
 from cosmic_ray.worker import worker
 
 
@@ -17,3 +22,169 @@ def test_no_test_return_value(path_utils, data_dir, python_version):
             diff=None,
             worker_outcome=WorkerOutcome.NO_TEST)
         assert result == expected
+
+
+def test_mutant_which_does_not_compile_is_incompetent(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    source = 'def f(*, a=1):\n    return a\n'
+    module_path.write_text(source)
+    marker = tmpdir_path / 'tests-ran'
+
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'touch {}'.format(marker), 1000)
+
+    assert result.worker_outcome == WorkerOutcome.NORMAL
+    assert result.test_outcome == TestOutcome.INCOMPETENT
+    assert 'SyntaxError' in result.output
+    assert '+def f(+, a=1):' in result.diff
+    assert not marker.exists()
+    assert module_path.read_text() == source
+
+
+def test_cached_ast_is_reused_until_code_changes(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1\n')
+
+    module_ast = get_cached_ast(module_path, python_version)
+    assert get_cached_ast(module_path, python_version) is module_ast
+
+    module_path.write_text('x = 2\n')
+    assert get_cached_ast(module_path, python_version).get_code() == 'x = 2\n'
+
+
+def test_splice_is_applied_without_parsing(tmpdir_path, python_version, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    source = 'x = 1 * 2\n'
+    module_path.write_text(source)
+    copy_path = tmpdir_path / 'mutant.py'
+
+    def _no_parse(*args, **kwargs):
+        raise AssertionError('the module was parsed')
+
+    monkeypatch.setattr(cosmic_ray.worker, 'get_cached_ast', _no_parse)
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'cp {} {}'.format(module_path, copy_path), 1000,
+        splice=(6, 7, '+'))
+
+    assert result.worker_outcome == WorkerOutcome.NORMAL
+    assert result.test_outcome == TestOutcome.SURVIVED
+    assert '+x = 1 + 2' in result.diff
+    assert copy_path.read_text() == 'x = 1 + 2\n'
+    assert module_path.read_text() == source
+
+
+def test_lazy_diff_is_left_out(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1 * 2\n')
+
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'true', 1000, splice=(6, 7, '+'), lazy_diff=True)
+
+    assert result.test_outcome == TestOutcome.SURVIVED
+    assert result.diff is None
+
+
+def test_kill_first_failure_without_a_failing_test_runs_all_tests(tmpdir_path, python_version, monkeypatch):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1 * 2\n')
+    history = cosmic_ray.worker.KillHistory()
+    history.record(module_path, None, 'tests/test_mod.py::test_renamed')
+    monkeypatch.setattr(cosmic_ray.worker, '_KILL_HISTORY', history)
+
+    # The kill-first command fails like pytest does if its tests aren't found.
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'true', 1000, splice=(6, 7, '+'),
+        kill_first_command=lambda tests: 'echo "ERROR: not found: {}"; exit 4'.format(' '.join(tests)))
+
+    assert result.test_outcome == TestOutcome.SURVIVED
+
+
+def test_splice_for_different_code_is_an_exception(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1 * 2\n')
+    marker = tmpdir_path / 'tests-ran'
+
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'touch {}'.format(marker), 1000, splice=(6, 7, '+'),
+        source_digest=source_digest('y = 10 * 2\n'))
+
+    assert result.worker_outcome == WorkerOutcome.EXCEPTION
+    assert 'SourceChangedError' in result.output
+    assert not marker.exists()
+    assert module_path.read_text() == 'x = 1 * 2\n'
+
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'true', 1000, splice=(6, 7, '+'), source_digest=source_digest('x = 1 * 2\n'))
+    assert result.test_outcome == TestOutcome.SURVIVED
+
+
+def _flaky_run(summary):
+    return (TestOutcome.KILLED,
+            'tests/test_mod.py::test_flaky FAILED\n{}\n'.format(summary))
+
+
+def test_runs_where_only_flaky_tests_failed_survive():
+    test_outcome, _ = cosmic_ray.worker._discount_flaky_tests(  # pylint: disable=protected-access
+        *_flaky_run('==== 1 failed, 3 passed in 0.1s ===='), FAILURE_PATTERNS, {'tests/test_mod.py::test_flaky'})
+    assert test_outcome == TestOutcome.SURVIVED
+
+
+def test_unexplained_failures_are_not_discounted():
+    flaky_tests = {'tests/test_mod.py::test_flaky'}
+    # A collection error is only visible in the summary.
+    for summary in ('==== 1 failed, 1 error in 0.1s ====', 'no summary'):
+        test_outcome, _ = cosmic_ray.worker._discount_flaky_tests(  # pylint: disable=protected-access
+            *_flaky_run(summary), FAILURE_PATTERNS, flaky_tests)
+        assert test_outcome == TestOutcome.KILLED
+
+
+def test_kill_first_uses_the_selected_test_command(monkeypatch):
+    config = ConfigDict()
+    config['test-command'] = 'pytest -v {tests}'
+    config['timeout'] = 10
+    config['kill-first'] = ConfigDict({'enabled': True})
+    config['test-selection'] = ConfigDict({'selected': ConfigDict({'mod.py': ['tests/test_mod.py']})})
+    calls = {}
+    monkeypatch.setattr(cosmic_ray.worker, 'worker', lambda *args, **kwargs: calls.update(args=args, **kwargs))
+
+    cosmic_ray.worker.run_work_item(
+        WorkItem(module_path='mod.py', operator_name='operator', occurrence=0,
+                 start_pos=(1, 0), end_pos=(1, 1), job_id='job'), config)
+
+    assert calls['args'][4] == 'pytest -v tests/test_mod.py'
+    assert calls['kill_first_command'](['tests/test_mod.py::test_a']) == 'pytest -v tests/test_mod.py::test_a'
+
+
+def test_fail_fast_without_verbose_output_warns(caplog):
+    config = ConfigDict()
+    config['test-command'] = 'pytest -x tests'
+    config['fail-fast'] = True
+    cosmic_ray.worker.check_failure_reporting(config)
+    assert 'verbose' in caplog.text
+
+    caplog.clear()
+    config['test-command'] = 'pytest -xv tests'
+    cosmic_ray.worker.check_failure_reporting(config)
+    assert caplog.text == ''
+
+
+def test_positions_for_different_code_are_an_exception(tmpdir_path, python_version):
+    module_path = tmpdir_path / 'mod.py'
+    module_path.write_text('x = 1 * 2\n')
+
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'true', 1000, start_pos=(1, 6), end_pos=(1, 7), source_digest=source_digest('y = 10 * 2\n'))
+    assert result.worker_outcome == WorkerOutcome.EXCEPTION
+    assert 'SourceChangedError' in result.output
+
+    result = worker(
+        module_path, python_version, 'core/ReplaceBinaryOperator_Mul_Add', 0,
+        'true', 1000, start_pos=(1, 6), end_pos=(1, 7), source_digest=source_digest('x = 1 * 2\n'))
+    assert result.test_outcome == TestOutcome.SURVIVED
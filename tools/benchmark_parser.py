@@ -0,0 +1,75 @@
+# Compare how long `init` takes to find the mutations in some modules with
+# the parso and tokenize parsers.
+#
+# Usage: python tools/benchmark_parser.py [--cosmic-ray] [--synthetic] [module-path ...]
+#
+# By default the modules of the example project in tests/example_project are
+# used. --cosmic-ray adds the modules of Cosmic Ray itself, --synthetic adds a
+# large synthetic module, and any module paths are benchmarked together.
+
+import argparse
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from cosmic_ray.commands.init import init
+from cosmic_ray.config import ConfigDict
+from cosmic_ray.work_db import use_db, WorkDB
+
+SYNTHETIC_FUNCTION = '''
+def function_{0}(a, b, *args):
+    if a < b and not args:
+        return a + b * {0} - (a % 3)
+    for item in args:
+        if item is None or item >= {0}:
+            break
+    return -a if b else a ** 2 // {0}
+'''
+
+
+def run_init(module_paths, parser):
+    config = ConfigDict()
+    config['parser'] = parser
+    with use_db(':memory:', WorkDB.Mode.create) as work_db:
+        start = time.perf_counter()
+        init(module_paths, work_db, config)
+        elapsed = time.perf_counter() - start
+        return elapsed, work_db.num_work_items
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def example_project_modules():
+    "The modules of the example project, without its tests."
+    project = ROOT / 'tests' / 'example_project'
+    return sorted(path for path in project.glob('**/*.py') if 'tests' not in path.relative_to(project).parts)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Compare the parso and tokenize parsers of init.')
+    parser.add_argument('--cosmic-ray', action='store_true', help='also benchmark the modules of Cosmic Ray')
+    parser.add_argument('--synthetic', action='store_true', help='also benchmark a large synthetic module')
+    parser.add_argument('module_paths', nargs='*', help='also benchmark these modules')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        benchmarks = [('example', example_project_modules())]
+        if args.cosmic_ray:
+            benchmarks.append(('cosmic_ray', sorted((ROOT / 'src' / 'cosmic_ray').glob('**/*.py'))))
+        if args.synthetic:
+            synthetic = Path(tmpdir) / 'synthetic.py'
+            synthetic.write_text(''.join(SYNTHETIC_FUNCTION.format(i) for i in range(1, 1001)))
+            benchmarks.append(('synthetic', [synthetic]))
+        if args.module_paths:
+            benchmarks.append(('arguments', [Path(path) for path in args.module_paths]))
+
+        for name, module_paths in benchmarks:
+            for parser in ('parso', 'tokenize'):
+                elapsed, count = run_init(module_paths, parser)
+                print('{:<12} {:<10} {:>8} mutations {:>8.2f}s'.format(name, parser, count, elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])